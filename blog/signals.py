@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from directory.page_cache import BLOG_TAG, purge_page_tags
+
+from .models import Post
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def purge_blog_pages(sender, instance, **kwargs):
+    purge_page_tags([BLOG_TAG])
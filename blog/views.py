@@ -1,12 +1,37 @@
+from django.db.models import Count, Max, Q
 from django.shortcuts import render, get_object_or_404
+from directory.conditional import conditional_page
+from directory.middleware import public_page
+from directory.page_cache import BLOG_TAG, cache_anonymous_page, tag_response
 from .models import Post
 
 
+def post_list_validators(request):
+    # Any save bumps the latest updated_at; the counts catch deletions
+    stats = Post.objects.aggregate(
+        total=Count("id"), published=Count("id", filter=Q(is_published=True)), latest=Max("updated_at")
+    )
+    return (request.path, stats["total"], stats["published"], stats["latest"]), stats["latest"]
+
+
+def post_detail_validators(request, slug):
+    updated_at = Post.objects.filter(slug=slug, is_published=True).values_list("updated_at", flat=True).first()
+    if updated_at is None:
+        return None
+    return (request.path, updated_at), updated_at
+
+
+@public_page
+@conditional_page(post_list_validators)
+@cache_anonymous_page
 def post_list(request):
     posts = Post.objects.filter(is_published=True)
-    return render(request, 'blog/post_list.html', {'posts': posts})
+    return tag_response(render(request, 'blog/post_list.html', {'posts': posts}), BLOG_TAG)
 
 
+@public_page
+@conditional_page(post_detail_validators)
+@cache_anonymous_page
 def post_detail(request, slug):
     post = get_object_or_404(Post, slug=slug, is_published=True)
-    return render(request, 'blog/post_detail.html', {'post': post})
+    return tag_response(render(request, 'blog/post_detail.html', {'post': post}), BLOG_TAG)
@@ -1,5 +1,16 @@
 from django.contrib import admin
-from .models import Listing, SaunaSubmission
+from django.utils import timezone
+from .generation import bump_listing_generation
+from .page_cache import listing_page_tags, purge_page_tags
+from .models import County, Listing, SaunaSubmission
+
+
+def _listing_page_tags(queryset):
+    # Collected before update(), which can move rows out of a filtered queryset
+    tags = set()
+    for listing_id, county in queryset.values_list("id", "county"):
+        tags |= listing_page_tags(listing_id, county)
+    return tags
 
 
 @admin.register(Listing)
@@ -10,16 +21,30 @@ class ListingAdmin(admin.ModelAdmin):
     actions = ["mark_as_featured", "mark_as_not_featured"]
     
     def mark_as_featured(self, request, queryset):
-        updated = queryset.update(is_featured=True)
+        tags = _listing_page_tags(queryset)
+        updated = queryset.update(is_featured=True, updated_at=timezone.now())
+        bump_listing_generation()
+        purge_page_tags(tags)
         self.message_user(request, f"{updated} listing(s) marked as featured.")
     mark_as_featured.short_description = "Mark selected as featured"
     
     def mark_as_not_featured(self, request, queryset):
-        updated = queryset.update(is_featured=False)
+        tags = _listing_page_tags(queryset)
+        updated = queryset.update(is_featured=False, updated_at=timezone.now())
+        bump_listing_generation()
+        purge_page_tags(tags)
         self.message_user(request, f"{updated} listing(s) marked as not featured.")
     mark_as_not_featured.short_description = "Remove featured status"
 
 
+@admin.register(County)
+class CountyAdmin(admin.ModelAdmin):
+    list_display = ("name", "slug", "listings_count", "average_rating", "updated_at")
+    search_fields = ("name",)
+    # Maintained from Listing saves; see directory.counties
+    readonly_fields = [field.name for field in County._meta.fields]
+
+
 @admin.register(SaunaSubmission)
 class SaunaSubmissionAdmin(admin.ModelAdmin):
     list_display = ("name", "city", "county", "status", "submitter_email", "created_at")
@@ -0,0 +1,79 @@
+"""Cached listing cards for the result grids.
+
+A card's markup depends only on its listing row, the card template, FILTERS
+and the photo formats we can serve (if any), so it is cached under the listing's id and ``updated_at``
+plus a digest of the rest; an edit produces a new key and the old entry
+expires on its own. The near-me distance badge differs per request and is
+spliced into the cached markup.
+"""
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.html import format_html
+from django.utils.safestring import SafeString, mark_safe
+
+from .models import Listing
+from .niche_config import FILTERS
+from .photos import available_formats, photos_enabled
+
+CARD_TEMPLATE = "partials/listing_card.html"
+CARD_CACHE_PREFIX = "directory:card"
+# Placeholder for the per-request distance badge in the cached markup
+DISTANCE_SLOT = "<!--listing-distance-->"
+# Where a streamed page's cards go; see directory.streaming
+CARDS_SLOT = "<!--listing-cards-->"
+
+
+def display_attributes(listing: Listing) -> List[Dict[str, Any]]:
+    """The filter values a card shows, in FILTERS order."""
+    attributes = listing.attributes or {}
+    return [
+        {"label": definition["label"], "type": definition.get("type", "choice"), "value": attributes[definition["key"]]}
+        for definition in FILTERS
+        if definition.get("key") and attributes.get(definition["key"]) is not None
+    ]
+
+
+def _card_digest() -> str:
+    source = get_template(CARD_TEMPLATE).template.source
+    payload = json.dumps([source, FILTERS, available_formats(), photos_enabled()], sort_keys=True, default=str)
+    return hashlib.md5(payload.encode()).hexdigest()
+
+
+def _card_key(digest: str, listing: Listing) -> str:
+    updated_at = listing.updated_at.timestamp() if listing.updated_at else 0
+    return f"{CARD_CACHE_PREFIX}:{digest}:{listing.id}:{updated_at}"
+
+
+def _distance_badge(listing: Listing) -> str:
+    distance_km = getattr(listing, "distance_km", None)
+    if distance_km is None:
+        return ""
+    return format_html('<span class="text-xs font-semibold text-slate-600">· {} km away</span>', distance_km)
+
+
+def render_listing_cards(listings: Iterable[Listing]) -> SafeString:
+    """Return the concatenated cards for ``listings``, rendering only the uncached ones."""
+    listings = list(listings)
+    timeout = getattr(settings, "LISTING_CARD_CACHE_TIMEOUT", 86400)
+    digest = _card_digest()
+    keys = [_card_key(digest, listing) for listing in listings]
+    cached = cache.get_many(keys) if timeout else {}
+
+    template = get_template(CARD_TEMPLATE)
+    rendered: Dict[str, str] = {}
+    cards = []
+    for key, listing in zip(keys, listings):
+        card = cached.get(key) or rendered.get(key)
+        if card is None:
+            card = rendered[key] = template.render(
+                {"listing": listing, "display_attributes": display_attributes(listing)}
+            )
+        cards.append(card.replace(DISTANCE_SLOT, _distance_badge(listing), 1))
+    if rendered and timeout:
+        cache.set_many(rendered, timeout)
+    return mark_safe("".join(cards))
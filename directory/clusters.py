@@ -0,0 +1,231 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+
+from .generation import get_listing_generation
+
+
+# Grid cells are 64 px at every zoom, so zoom z has 2**(z + 2) cells per axis
+# and each cell splits into exactly four at the next zoom.
+CELL_PIXELS = 64
+CLUSTER_MAX_ZOOM = 16
+MAX_MERCATOR_LAT = 85.05112878
+# Filter combinations whose index stays in memory per worker.
+CLUSTER_INDEX_CACHE_SIZE = 32
+
+# (id, name, slug, location, latitude, longitude)
+ClusterPoint = Tuple[int, str, str, str, float, float]
+
+
+def _project(lat: float, lng: float) -> Tuple[float, float]:
+    # Web Mercator, normalised to [0, 1) on both axes
+    lat = max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, lat))
+    x = (lng + 180.0) / 360.0
+    sin_lat = math.sin(math.radians(lat))
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return min(max(x, 0.0), 1.0 - 1e-12), min(max(y, 0.0), 1.0 - 1e-12)
+
+
+def _unproject(x: float, y: float) -> Tuple[float, float]:
+    lng = x * 360.0 - 180.0
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+    return lat, lng
+
+
+class _Cell:
+    __slots__ = ("ids", "sum_x", "sum_y")
+
+    def __init__(self):
+        self.ids: Set[int] = set()
+        self.sum_x = 0.0
+        self.sum_y = 0.0
+
+
+class ClusterIndex:
+    """Hierarchical grid of marker clusters for every zoom level.
+
+    Points can be added and removed one at a time; ``sync`` applies the
+    difference against a fresh set of rows so a listing change only touches
+    the cells of the listings that moved. ``sync`` and ``query`` may run
+    concurrently; ``add`` and ``remove`` are not locked.
+    """
+
+    def __init__(self, points: Iterable[ClusterPoint] = (), max_zoom: int = CLUSTER_MAX_ZOOM):
+        self.max_zoom = max_zoom
+        self.generation: Optional[int] = None
+        self.synced_at = 0.0
+        self.lock = threading.Lock()
+        self.points: Dict[int, ClusterPoint] = {}
+        self.levels: List[Dict[Tuple[int, int], _Cell]] = [{} for _ in range(max_zoom + 1)]
+        for point in points:
+            self.add(point)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _cells(self, point: ClusterPoint) -> Iterable[Tuple[int, Dict[Tuple[int, int], _Cell], Tuple[int, int]]]:
+        x, y = _project(point[4], point[5])
+        scale = 1 << (self.max_zoom + 2)
+        cell_x, cell_y = int(x * scale), int(y * scale)
+        for zoom in range(self.max_zoom, -1, -1):
+            shift = self.max_zoom - zoom
+            yield zoom, self.levels[zoom], (cell_x >> shift, cell_y >> shift)
+
+    def add(self, point: ClusterPoint) -> None:
+        if point[0] in self.points:
+            self.remove(point[0])
+        self.points[point[0]] = point
+        x, y = _project(point[4], point[5])
+        for _, level, key in self._cells(point):
+            cell = level.get(key)
+            if cell is None:
+                cell = level[key] = _Cell()
+            cell.ids.add(point[0])
+            cell.sum_x += x
+            cell.sum_y += y
+
+    def remove(self, point_id: int) -> None:
+        point = self.points.pop(point_id, None)
+        if point is None:
+            return
+        x, y = _project(point[4], point[5])
+        for _, level, key in self._cells(point):
+            cell = level[key]
+            cell.ids.discard(point_id)
+            if not cell.ids:
+                del level[key]
+            else:
+                cell.sum_x -= x
+                cell.sum_y -= y
+
+    def sync(self, points: Iterable[ClusterPoint]) -> None:
+        fresh = {point[0]: point for point in points}
+        with self.lock:
+            for point_id in set(self.points) - set(fresh):
+                self.remove(point_id)
+            for point_id, point in fresh.items():
+                if self.points.get(point_id) != point:
+                    self.add(point)
+            self.synced_at = time.monotonic()
+
+    def bounds(self) -> Optional[Tuple[float, float, float, float]]:
+        """Return ``(south, west, north, east)`` around every point, or None."""
+        with self.lock:
+            points = list(self.points.values())
+        if not points:
+            return None
+        lats = [point[4] for point in points]
+        lngs = [point[5] for point in points]
+        return min(lats), min(lngs), max(lats), max(lngs)
+
+    def query(
+        self,
+        zoom: int,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+    ) -> Tuple[List[Tuple[float, float, int]], List[ClusterPoint]]:
+        """Return ``(clusters, points)`` visible in ``bbox`` at ``zoom``.
+
+        ``bbox`` is ``(west, south, east, north)``. Clusters are
+        ``(lat, lng, count)``; cells holding a single listing, and every
+        listing beyond ``max_zoom``, come back as points.
+        """
+        with self.lock:
+            return self._query(zoom, bbox)
+
+    def _query(
+        self,
+        zoom: int,
+        bbox: Optional[Tuple[float, float, float, float]],
+    ) -> Tuple[List[Tuple[float, float, int]], List[ClusterPoint]]:
+        expand = zoom > self.max_zoom
+        zoom = max(0, min(int(zoom), self.max_zoom))
+        level = self.levels[zoom]
+        scale = 1 << (zoom + 2)
+
+        if bbox is None:
+            cells = level.values()
+        else:
+            west, south, east, north = bbox
+            min_x, min_y = _project(north, west)
+            max_x, max_y = _project(south, east)
+            x_ranges = [(int(min_x * scale), int(max_x * scale))]
+            if west > east:
+                # The viewport crosses the antimeridian.
+                x_ranges = [(int(min_x * scale), scale - 1), (0, int(max_x * scale))]
+            y_range = (int(min_y * scale), int(max_y * scale))
+            span = sum(end - start + 1 for start, end in x_ranges) * (y_range[1] - y_range[0] + 1)
+            if span > len(level):
+                cells = [
+                    cell for (cell_x, cell_y), cell in level.items()
+                    if y_range[0] <= cell_y <= y_range[1]
+                    and any(start <= cell_x <= end for start, end in x_ranges)
+                ]
+            else:
+                cells = [
+                    level[(cell_x, cell_y)]
+                    for start, end in x_ranges
+                    for cell_x in range(start, end + 1)
+                    for cell_y in range(y_range[0], y_range[1] + 1)
+                    if (cell_x, cell_y) in level
+                ]
+
+        clusters: List[Tuple[float, float, int]] = []
+        points: List[ClusterPoint] = []
+        for cell in cells:
+            if expand or len(cell.ids) == 1:
+                points.extend(self.points[point_id] for point_id in cell.ids)
+            else:
+                count = len(cell.ids)
+                lat, lng = _unproject(cell.sum_x / count, cell.sum_y / count)
+                clusters.append((lat, lng, count))
+        clusters.sort()
+        points.sort()
+        return clusters, points
+
+
+_indexes: "OrderedDict[str, ClusterIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _is_current(index: ClusterIndex, generation: int) -> bool:
+    if index.generation != generation:
+        return False
+    ttl = getattr(settings, "LISTING_SNAPSHOT_TTL", 300)
+    return time.monotonic() - index.synced_at < ttl
+
+
+def get_cluster_index(key: str, load_points) -> ClusterIndex:
+    """Return this worker's cluster index for the filter combination ``key``.
+
+    ``load_points`` returns the current points; it is only called when the
+    listing generation moved on, and the index is then synced incrementally.
+    """
+    generation = get_listing_generation()
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is not None:
+            _indexes.move_to_end(key)
+            if _is_current(index, generation):
+                return index
+
+    points: List[Any] = list(load_points())
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = ClusterIndex()
+            _indexes[key] = index
+            while len(_indexes) > CLUSTER_INDEX_CACHE_SIZE:
+                _indexes.popitem(last=False)
+    if not _is_current(index, generation):
+        index.sync(points)
+        index.generation = generation
+    return index
+
+
+def clear_cluster_indexes() -> None:
+    with _indexes_lock:
+        _indexes.clear()
@@ -0,0 +1,144 @@
+"""ETag and Last-Modified validators for the public pages.
+
+Each page's validators come from cheap version data: the listing generation
+and totals, ``updated_at`` values and a digest of the templates. A matching
+``If-None-Match`` (or ``If-Modified-Since``) is answered with a 304 before the
+page cache, the page's own queries or any template rendering.
+"""
+import hashlib
+from datetime import datetime, timezone
+from functools import lru_cache, wraps
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db.models import Max
+from django.http import HttpRequest, HttpResponse
+from django.template import engines
+from django.views.decorators.http import condition
+
+from .generation import get_listing_changed_at
+from .map_data import get_listing_stats, get_listing_version
+from .models import Listing
+from .utils import parse_open_at
+
+# (parts hashed into the ETag, last-modified time), or None for no validators
+Validators = Optional[Tuple[Sequence, Optional[datetime]]]
+
+
+def _template_files() -> List[Path]:
+    return [
+        path
+        for engine in engines.all()
+        for directory in getattr(engine, "template_dirs", ())
+        for path in sorted(Path(directory).rglob("*.html"))
+    ]
+
+
+def template_digest() -> str:
+    """Digest of every template file; template edits change every page."""
+    digest = hashlib.sha256()
+    for path in _template_files():
+        digest.update(str(path).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def templates_modified_at() -> Optional[datetime]:
+    """When a template file last changed; pages are no older than their templates."""
+    mtimes = [path.stat().st_mtime for path in _template_files()]
+    return datetime.fromtimestamp(max(mtimes), tz=timezone.utc) if mtimes else None
+
+
+@lru_cache(maxsize=1)
+def _deployed_templates() -> Tuple[str, Optional[datetime]]:
+    return template_digest(), templates_modified_at()
+
+
+def _current_templates() -> Tuple[str, Optional[datetime]]:
+    # Templates only change on deploy, which restarts the workers; in
+    # development they are re-read so edits aren't answered with a 304.
+    return (template_digest(), templates_modified_at()) if settings.DEBUG else _deployed_templates()
+
+
+def _latest(*moments: Optional[datetime]) -> Optional[datetime]:
+    moments = [moment for moment in moments if moment is not None]
+    return max(moments) if moments else None
+
+
+def conditional_page(validators: Callable[..., Validators]):
+    """Decorate a view with ETag/Last-Modified from ``validators(request, *args, **kwargs)``."""
+
+    def found(request: HttpRequest, *args, **kwargs) -> Validators:
+        # condition() asks for the ETag and Last-Modified separately
+        if not hasattr(request, "_page_validators"):
+            request._page_validators = validators(request, *args, **kwargs)
+        return request._page_validators
+
+    def etag(request: HttpRequest, *args, **kwargs) -> Optional[str]:
+        page = found(request, *args, **kwargs)
+        if page is None:
+            return None
+        payload = repr((tuple(page[0]), _current_templates()[0]))
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    def last_modified(request: HttpRequest, *args, **kwargs) -> Optional[datetime]:
+        page = found(request, *args, **kwargs)
+        if page is None or page[1] is None:
+            return None
+        return _latest(page[1], _current_templates()[1])
+
+    conditional = condition(etag_func=etag, last_modified_func=last_modified)
+
+    def decorator(view):
+        conditional_view = conditional(view)
+
+        @wraps(view)
+        def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+            return _weaken_encoded_etag(conditional_view(request, *args, **kwargs))
+
+        return wrapper
+
+    return decorator
+
+
+def _weaken_encoded_etag(response: HttpResponse) -> HttpResponse:
+    # Page cache hits arrive already gzip/brotli encoded, so GZipMiddleware
+    # skips them; weaken their ETag the way it does for the bodies it compresses.
+    etag = response.get("ETag")
+    if etag and etag.startswith('"') and response.has_header("Content-Encoding"):
+        response["ETag"] = f"W/{etag}"
+    return response
+
+
+def listing_index_validators(request: HttpRequest, *args, **kwargs) -> Validators:
+    """Home and county pages: results and facet counts move with any listing change."""
+    query = sorted((key, request.GET.getlist(key)) for key in request.GET)
+    htmx = request.headers.get("HX-Request", "false").lower() == "true"
+    # "open now" pages change every minute, without any listing changing
+    open_at = parse_open_at(request.GET)
+    parts = (request.path, query, htmx, open_at, get_listing_version())
+    if open_at is not None:
+        return parts, None
+    return parts, _latest(get_listing_changed_at(), get_listing_stats()["latest"])
+
+
+def listing_detail_validators(request: HttpRequest, slug: str) -> Validators:
+    """A listing page: the listing itself and the related listings it shows."""
+    row = (
+        Listing.objects.filter(slug=slug, is_active=True)
+        .annotate(
+            related_ids=ArrayAgg("related_links__related_id", ordering="related_links__position"),
+            related_distances=ArrayAgg("related_links__distance_km", ordering="related_links__position"),
+            related_updated_at=Max("related_links__related__updated_at"),
+        )
+        .values_list("id", "updated_at", "related_ids", "related_distances", "related_updated_at")
+        .first()
+    )
+    if row is None:
+        # Let the view answer with its 404
+        return None
+    # bulk_update and related refreshes leave updated_at alone but move the generation
+    changed_at = get_listing_changed_at()
+    return (request.path, *row, changed_at), _latest(row[1], row[4], changed_at)
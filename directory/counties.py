@@ -0,0 +1,62 @@
+from decimal import Decimal
+from typing import Iterable
+
+from django.db.models import Avg, Count, Max, Min
+from django.utils.text import slugify
+
+from .models import County, Listing
+
+
+def refresh_county_summary(county: str) -> None:
+    """Recompute the summary row for ``county`` from its active listings."""
+    slug = slugify(county or "")
+    if not slug:
+        return
+
+    # Every spelling that shares the slug, as the landing page and prerender group them
+    active = Listing.objects.filter(is_active=True)
+    spellings = {
+        row["county"]: row["total"]
+        for row in active.values("county").annotate(total=Count("id"))
+        if slugify(row["county"] or "") == slug
+    }
+    listings = active.filter(county__in=spellings)
+    stats = listings.aggregate(
+        listings_count=Count("id"),
+        average_rating=Avg("rating"),
+        min_latitude=Min("latitude"),
+        max_latitude=Max("latitude"),
+        min_longitude=Min("longitude"),
+        max_longitude=Max("longitude"),
+        center_latitude=Avg("latitude"),
+        center_longitude=Avg("longitude"),
+    )
+    if not stats["listings_count"]:
+        County.objects.filter(slug=slug).delete()
+        return
+
+    # The most common spelling becomes the display name.
+    stats["name"] = min(spellings, key=lambda spelling: (-spellings[spelling], spelling))
+    if stats["average_rating"] is not None:
+        stats["average_rating"] = Decimal(stats["average_rating"]).quantize(Decimal("0.01"))
+    County.objects.update_or_create(slug=slug, defaults=stats)
+
+
+def refresh_county_summaries(counties: Iterable[str]) -> None:
+    seen = set()
+    for county in counties:
+        slug = slugify(county or "")
+        if slug and slug not in seen:
+            seen.add(slug)
+            refresh_county_summary(county)
+
+
+def rebuild_county_summaries() -> int:
+    """Rebuild every county summary; returns the number of counties."""
+    counties = (
+        Listing.objects.filter(is_active=True).exclude(county="").values_list("county", flat=True).distinct()
+    )
+    refresh_county_summaries(counties)
+    slugs = {slugify(county) for county in counties}
+    County.objects.exclude(slug__in=slugs).delete()
+    return County.objects.count()
@@ -0,0 +1,79 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .generation import get_listing_generation
+from .models import Listing
+from .niche_config import FILTERS
+from .utils import choice_condition, filter_conditions, filter_state_key, near_condition, snapshot_supports
+
+
+FACET_CACHE_PREFIX = "directory:facets"
+
+
+def _facet_choices() -> Dict[str, List[str]]:
+    return {
+        definition["key"]: list(definition["choices"])
+        for definition in FILTERS
+        if definition.get("key")
+        and definition.get("type", "choice") == "choice"
+        and definition.get("choices")
+    }
+
+
+def _database_facet_counts(
+    filter_state: Dict[str, Any], facets: Dict[str, List[str]], near: Optional[Tuple[float, float, float]]
+) -> Dict[str, Dict[str, int]]:
+    # One conditional COUNT per choice, all in a single aggregate query.
+    conditions = filter_conditions(filter_state)
+    aggregates = {}
+    for facet_index, (key, choices) in enumerate(facets.items()):
+        others = Q(*[condition for other_key, condition in conditions.items() if other_key != key])
+        for choice_index, choice in enumerate(choices):
+            aggregates[f"facet_{facet_index}_{choice_index}"] = Count(
+                "id", filter=others & choice_condition(key, choice)
+            )
+
+    listings = Listing.objects.filter(is_active=True)
+    if near is not None:
+        listings = listings.filter(near_condition(*near))
+    row = listings.aggregate(**aggregates)
+    return {
+        key: {
+            choice: row[f"facet_{facet_index}_{choice_index}"]
+            for choice_index, choice in enumerate(choices)
+        }
+        for facet_index, (key, choices) in enumerate(facets.items())
+    }
+
+
+def get_facet_counts(
+    filter_state: Dict[str, Any], near: Optional[Tuple[float, float, float]] = None
+) -> Dict[str, Dict[str, int]]:
+    """Return ``{filter key: {choice: matching listings}}`` for every choice filter.
+
+    Each filter is counted against all the *other* active filters, so a choice's
+    count is the number of results selecting it would give. ``near`` is the
+    near-me ``(lat, lng, distance_km)`` radius, which every count stays within.
+    """
+    # Near-me counts are per visitor, so they aren't worth caching
+    timeout = getattr(settings, "FACET_CACHE_TIMEOUT", 0) if near is None else 0
+    generation = get_listing_generation()
+    cache_key = f"{FACET_CACHE_PREFIX}:{generation}:{filter_state_key(filter_state)}"
+    counts = cache.get(cache_key) if timeout else None
+    if counts is not None:
+        return counts
+
+    facets = _facet_choices()
+    if getattr(settings, "LISTING_SNAPSHOT_ENABLED", False) and snapshot_supports(filter_state):
+        from .snapshot import get_listing_snapshot
+
+        counts = get_listing_snapshot().facet_counts(filter_state, facets, near)
+    else:
+        counts = _database_facet_counts(filter_state, facets, near)
+
+    if timeout:
+        cache.set(cache_key, counts, timeout)
+    return counts
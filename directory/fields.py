@@ -0,0 +1,44 @@
+from typing import List, Optional, Tuple
+
+from django.db import models
+from django.db.models import Lookup
+from psycopg.types.multirange import Multirange
+from psycopg.types.range import Range
+
+
+class IntegerMultiRangeField(models.Field):
+    """Postgres ``int4multirange`` holding sorted, non-overlapping ``[start, end)`` pairs.
+
+    Python values are lists of ``(start, end)`` tuples.
+    """
+
+    description = "Set of half-open integer ranges"
+
+    def db_type(self, connection) -> str:
+        return "int4multirange"
+
+    def from_db_value(self, value, expression, connection) -> Optional[List[Tuple[int, int]]]:
+        return self.to_python(value)
+
+    def to_python(self, value) -> Optional[List[Tuple[int, int]]]:
+        if value is None:
+            return None
+        return [(item.lower, item.upper) if isinstance(item, Range) else tuple(item) for item in value]
+
+    def get_prep_value(self, value):
+        if value is None:
+            return None
+        return Multirange([Range(start, end, "[)") for start, end in value])
+
+
+@IntegerMultiRangeField.register_lookup
+class MultiRangeContains(Lookup):
+    """``field__contains=n``: some range includes the integer ``n``."""
+
+    lookup_name = "contains"
+    prepare_rhs = False
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} @> ({rhs})::integer", (*lhs_params, *rhs_params)
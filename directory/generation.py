@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Optional
+
+from django.core.cache import cache
+from django.utils import timezone
+
+
+LISTING_GENERATION_KEY = "directory:listing_generation"
+LISTING_CHANGED_AT_KEY = "directory:listing_changed_at"
+
+
+def get_listing_generation() -> int:
+    """Return the current listing generation shared by all workers."""
+    return cache.get(LISTING_GENERATION_KEY, 0)
+
+
+def bump_counter(key: str) -> int:
+    """Atomically increment a shared, non-expiring cache counter."""
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # The key was evicted between add() and incr().
+        cache.set(key, 1, timeout=None)
+        return 1
+
+
+def get_listing_changed_at() -> Optional[datetime]:
+    """Return when the listing generation last moved, if still known."""
+    return cache.get(LISTING_CHANGED_AT_KEY)
+
+
+def bump_listing_generation() -> int:
+    """Advance the listing generation so per-worker caches rebuild."""
+    # Deletions leave no updated_at behind, so Last-Modified needs this too
+    cache.set(LISTING_CHANGED_AT_KEY, timezone.now(), timeout=None)
+    return bump_counter(LISTING_GENERATION_KEY)
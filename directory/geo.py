@@ -0,0 +1,132 @@
+import heapq
+from math import asin, cos, floor, radians, sin, sqrt
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.195
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    # Haversine formula to compute great-circle distance in km.
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
+    c = 2 * asin(sqrt(a))
+    return EARTH_RADIUS_KM * c
+
+
+def bounding_box(lat: float, lng: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """Return (min_lat, max_lat, min_lng, max_lng) enclosing the radius around a point."""
+    dlat = radius_km / KM_PER_DEGREE
+    min_lat = max(lat - dlat, -90.0)
+    max_lat = min(lat + dlat, 90.0)
+    # Longitude degrees shrink towards the poles; use the widest latitude in the box.
+    widest = max(abs(min_lat), abs(max_lat))
+    cos_lat = cos(radians(widest))
+    if widest >= 90.0 or cos_lat <= 0 or radius_km / (KM_PER_DEGREE * cos_lat) >= 180.0:
+        return min_lat, max_lat, -180.0, 180.0
+    dlng = radius_km / (KM_PER_DEGREE * cos_lat)
+    return min_lat, max_lat, lng - dlng, lng + dlng
+
+
+class GeoGridIndex:
+    """Bucket points into a fixed lat/lng grid for radius and k-nearest queries.
+
+    Queries only visit the cells overlapping the search area, so their cost grows
+    with the number of nearby points rather than the size of the index.
+    """
+
+    def __init__(self, points: Iterable[Tuple[Hashable, float, float]], cell_degrees: float = 0.1):
+        self.cell_degrees = cell_degrees
+        self.cells: Dict[Tuple[int, int], List[Tuple[float, float, Hashable]]] = {}
+        self.size = 0
+        for key, lat, lng in points:
+            self.cells.setdefault(self._cell(lat, lng), []).append((lat, lng, key))
+            self.size += 1
+        if self.cells:
+            rows = [cell[0] for cell in self.cells]
+            cols = [cell[1] for cell in self.cells]
+            self._extent = (min(rows), max(rows), min(cols), max(cols))
+        else:
+            self._extent = (0, -1, 0, -1)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return floor(lat / self.cell_degrees), floor(lng / self.cell_degrees)
+
+    def _cells_in_box(self, min_lat: float, max_lat: float, min_lng: float, max_lng: float):
+        row_min, col_min = self._cell(min_lat, min_lng)
+        row_max, col_max = self._cell(max_lat, max_lng)
+        if (row_max - row_min + 1) * (col_max - col_min + 1) > len(self.cells):
+            # Sparse index: scanning occupied cells is cheaper than the box.
+            for (row, col), bucket in self.cells.items():
+                if row_min <= row <= row_max and col_min <= col <= col_max:
+                    yield bucket
+            return
+        for row in range(row_min, row_max + 1):
+            for col in range(col_min, col_max + 1):
+                bucket = self.cells.get((row, col))
+                if bucket:
+                    yield bucket
+
+    def within(self, lat: float, lng: float, radius_km: float) -> List[Tuple[float, Hashable]]:
+        """Return (distance_km, key) for every point within ``radius_km``, nearest first."""
+        min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+        hits: List[Tuple[float, Hashable]] = []
+        for bucket in self._cells_in_box(min_lat, max_lat, min_lng, max_lng):
+            for point_lat, point_lng, key in bucket:
+                if not (min_lat <= point_lat <= max_lat and min_lng <= point_lng <= max_lng):
+                    continue
+                distance = haversine_km(lat, lng, point_lat, point_lng)
+                if distance <= radius_km:
+                    hits.append((distance, key))
+        hits.sort(key=lambda hit: hit[0])
+        return hits
+
+    def nearest(
+        self, lat: float, lng: float, k: int, max_km: Optional[float] = None
+    ) -> List[Tuple[float, Hashable]]:
+        """Return up to ``k`` (distance_km, key) pairs closest to the point, nearest first."""
+        if k <= 0 or not self.cells:
+            return []
+        center_row, center_col = self._cell(lat, lng)
+        row_lo, row_hi, col_lo, col_hi = self._extent
+        max_ring = max(
+            abs(center_row - row_lo), abs(center_row - row_hi),
+            abs(center_col - col_lo), abs(center_col - col_hi),
+        )
+        cell_km = self.cell_degrees * KM_PER_DEGREE
+        # Max-heap of the best k candidates as (-distance, order, key).
+        best: List[Tuple[float, int, Hashable]] = []
+        seen = 0
+
+        for ring in range(max_ring + 1):
+            for row in range(center_row - ring, center_row + ring + 1):
+                edge = row in (center_row - ring, center_row + ring)
+                cols = range(center_col - ring, center_col + ring + 1) if edge else (
+                    center_col - ring, center_col + ring
+                )
+                for col in cols:
+                    for point_lat, point_lng, key in self.cells.get((row, col), ()):
+                        distance = haversine_km(lat, lng, point_lat, point_lng)
+                        if max_km is not None and distance > max_km:
+                            continue
+                        seen += 1
+                        entry = (-distance, -seen, key)
+                        if len(best) < k:
+                            heapq.heappush(best, entry)
+                        elif distance < -best[0][0]:
+                            heapq.heapreplace(best, entry)
+
+            # Anything outside the rings searched so far is at least this far away.
+            widest = min(abs(lat) + (ring + 1) * self.cell_degrees, 90.0)
+            bound = ring * cell_km * min(1.0, cos(radians(widest)))
+            if max_km is not None and bound > max_km:
+                break
+            if len(best) >= k and -best[0][0] <= bound:
+                break
+
+        return [(-distance, key) for distance, _, key in sorted(best, reverse=True)]
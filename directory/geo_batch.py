@@ -0,0 +1,132 @@
+"""Batch great-circle distances for the offline proximity jobs.
+
+With NumPy installed, a block of source points at a time is ranked against
+every target with one matrix product and the k nearest picked with
+``argpartition``; without it the same calls fall back to one GeoGridIndex
+query per point.
+"""
+import csv
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from .geo import EARTH_RADIUS_KM, GeoGridIndex
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the grid index covers small jobs
+    np = None
+
+
+Point = Tuple[Hashable, float, float]
+Neighbours = Dict[Hashable, List[Tuple[float, Hashable]]]
+
+# Upper bound on source × target cells per block (~16 MB per float64 array)
+BLOCK_CELLS = 2_000_000
+
+
+def haversine_matrix(source_lats, source_lngs, target_lats, target_lngs):
+    """Return the (sources × targets) matrix of great-circle distances in km. Needs NumPy."""
+    lat1 = np.radians(np.asarray(source_lats, dtype=np.float64))[:, None]
+    lng1 = np.radians(np.asarray(source_lngs, dtype=np.float64))[:, None]
+    lat2 = np.radians(np.asarray(target_lats, dtype=np.float64))[None, :]
+    lng2 = np.radians(np.asarray(target_lngs, dtype=np.float64))[None, :]
+    return _haversine(lat1, lng1, np.cos(lat1), lat2, lng2, np.cos(lat2))
+
+
+def _haversine(lat1, lng1, cos_lat1, lat2, lng2, cos_lat2):
+    a = np.sin((lat2 - lat1) * 0.5) ** 2 + cos_lat1 * cos_lat2 * np.sin((lng2 - lng1) * 0.5) ** 2
+    return (2 * EARTH_RADIUS_KM) * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _unit_vectors(lat, lng):
+    # Radians in, one (x, y, z) row per point out
+    cos_lat = np.cos(lat)
+    return np.stack((cos_lat * np.cos(lng), cos_lat * np.sin(lng), np.sin(lat)), axis=1)
+
+
+def _nearest_with_grid(
+    sources: Sequence[Point], targets: Sequence[Point], k: int, max_km: Optional[float], exclude_self: bool
+) -> Neighbours:
+    index = GeoGridIndex(targets)
+    neighbours: Neighbours = {}
+    for key, lat, lng in sources:
+        hits = index.nearest(lat, lng, k + 1 if exclude_self else k, max_km=max_km)
+        if exclude_self:
+            hits = [hit for hit in hits if hit[1] != key]
+        neighbours[key] = hits[:k]
+    return neighbours
+
+
+def nearest_neighbours(
+    sources: Iterable[Point],
+    targets: Iterable[Point],
+    k: int,
+    max_km: Optional[float] = None,
+    exclude_self: bool = False,
+) -> Neighbours:
+    """Return up to ``k`` (distance_km, target_key) pairs per source key, nearest first.
+
+    ``exclude_self`` drops targets with the source's own key, for listings
+    against listings.
+    """
+    sources, targets = list(sources), list(targets)
+    if k <= 0 or not targets:
+        return {key: [] for key, _, _ in sources}
+    if np is None:
+        return _nearest_with_grid(sources, targets, k, max_km, exclude_self)
+
+    # Nearest by great-circle distance is largest dot product of unit vectors,
+    # so blocks are ranked with one matrix product and only the k picks per
+    # source get an exact haversine distance.
+    target_keys = [key for key, _, _ in targets]
+    target_lat = np.radians(np.array([lat for _, lat, _ in targets], dtype=np.float64))
+    target_lng = np.radians(np.array([lng for _, _, lng in targets], dtype=np.float64))
+    target_cos = np.cos(target_lat)
+    target_vectors = _unit_vectors(target_lat, target_lng)
+    position = {key: column for column, key in enumerate(target_keys)} if exclude_self else {}
+    take = min(k + 1 if exclude_self else k, len(targets))
+    block = max(1, BLOCK_CELLS // len(targets))
+
+    neighbours: Neighbours = {}
+    for start in range(0, len(sources), block):
+        chunk = sources[start:start + block]
+        lat = np.radians(np.array([point[1] for point in chunk], dtype=np.float64))
+        lng = np.radians(np.array([point[2] for point in chunk], dtype=np.float64))
+        closeness = _unit_vectors(lat, lng) @ target_vectors.T
+        for row, (key, _, _) in enumerate(chunk):
+            if key in position:
+                closeness[row, position[key]] = -np.inf
+
+        # Unordered k closest per row, then exact distances and sorted
+        if take < len(targets):
+            columns = np.argpartition(-closeness, take - 1, axis=1)[:, :take]
+        else:
+            columns = np.broadcast_to(np.arange(len(targets)), (len(chunk), len(targets)))
+        excluded = np.take_along_axis(closeness, columns, axis=1) == -np.inf
+        distances = _haversine(
+            lat[:, None], lng[:, None], np.cos(lat)[:, None],
+            target_lat[columns], target_lng[columns], target_cos[columns],
+        )
+        distances[excluded] = np.inf
+        if max_km is not None:
+            distances[distances > max_km] = np.inf
+        order = np.lexsort((columns, distances), axis=1)
+        columns = np.take_along_axis(columns, order, axis=1)
+        distances = np.take_along_axis(distances, order, axis=1)
+
+        for row, (key, _, _) in enumerate(chunk):
+            neighbours[key] = [
+                (float(distance), target_keys[column])
+                for distance, column in zip(distances[row][:k], columns[row][:k])
+                if distance != np.inf
+            ]
+    return neighbours
+
+
+def load_gazetteer(path) -> List[Point]:
+    """Read towns from a CSV with ``name``, ``latitude`` and ``longitude`` columns."""
+    with open(path, newline="", encoding="utf-8") as handle:
+        return [
+            (row["name"].strip(), float(row["latitude"]), float(row["longitude"]))
+            for row in csv.DictReader(handle)
+            if row.get("name") and row.get("latitude") and row.get("longitude")
+        ]
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from directory.models import Listing
+from directory.photos import VARIANTS, PhotoStore, PhotoUnavailable, available_formats, get_photo_store
+
+
+class Command(BaseCommand):
+    help = "Fetch every listing photo once and render its sizes into the local photo cache"
+
+    def handle(self, *args, **options):
+        # Trim the cache once at the end rather than after every file
+        store = PhotoStore(max_bytes=0)
+        cached = missing = 0
+        for slug, photo_ref in (
+            Listing.objects.filter(is_active=True).exclude(photo_ref="").values_list("slug", "photo_ref").iterator()
+        ):
+            try:
+                for variant, (widths, _) in VARIANTS.items():
+                    for width in widths:
+                        for fmt in available_formats():
+                            store.get(photo_ref, variant, width, fmt)
+            except PhotoUnavailable as exc:
+                missing += 1
+                self.stderr.write(f"✗ {slug}: {exc}")
+                continue
+            cached += 1
+        get_photo_store().evict()
+        self.stdout.write(self.style.SUCCESS(f"✓ Cached photos for {cached} listings ({missing} unavailable)"))
@@ -1,7 +1,7 @@
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
-from django.db.models import Count
-from django.utils.text import slugify
-from directory.models import Listing
+from directory.counties import rebuild_county_summaries
+from directory.models import County
 
 
 class Command(BaseCommand):
@@ -14,19 +14,20 @@ class Command(BaseCommand):
             default=2,
             help="Minimum number of listings required to generate a page (default: 2)",
         )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Recompute the county summaries, listing JSON-LD and opening hours from listings first",
+        )
 
     def handle(self, *args, **options):
         min_listings = options["min_listings"]
+        if options["rebuild"]:
+            rebuild_county_summaries()
+            # JSON-LD embeds settings such as the Maps key, so refresh it too
+            call_command("refresh_listing_fields", stdout=self.stdout)
 
-        # Get all active listings grouped by county
-        pages = (
-            Listing.objects.filter(is_active=True)
-            .exclude(county="")
-            .values("county")
-            .annotate(count=Count("id"))
-            .filter(count__gte=min_listings)
-            .order_by("-count", "county")
-        )
+        pages = County.objects.filter(listings_count__gte=min_listings).order_by("-listings_count", "name")
 
         if not pages:
             self.stdout.write(
@@ -44,11 +45,10 @@ class Command(BaseCommand):
 
         total_listings = 0
         for page in pages:
-            county = page["county"]
-            count = page["count"]
+            count = page.listings_count
             total_listings += count
 
-            url = f"/{slugify(county)}/"
+            url = f"/{page.slug}/"
             self.stdout.write(
                 f"  {self.style.HTTP_INFO(url)} - {count} listing{'s' if count != 1 else ''}"
             )
@@ -3,6 +3,7 @@ import re
 from django.core.management.base import BaseCommand
 from django.utils.text import slugify
 from directory.models import Listing
+from directory.related import related_listings_rebuilt_afterwards
 
 
 class Command(BaseCommand):
@@ -184,6 +185,8 @@ class Command(BaseCommand):
         
         return attributes
 
+    # One rebuild at the end instead of a refresh per imported listing
+    @related_listings_rebuilt_afterwards()
     def handle(self, *args, **options):
         csv_file = options["csv_file"]
         clear = options.get("clear", False)
@@ -2,6 +2,7 @@ import csv
 from django.core.management.base import BaseCommand
 from django.utils.text import slugify
 from directory.models import Listing
+from directory.related import related_listings_rebuilt_afterwards
 
 
 class Command(BaseCommand):
@@ -15,6 +16,8 @@ class Command(BaseCommand):
             help="Clear existing listings before import",
         )
 
+    # One rebuild at the end instead of a refresh per imported listing
+    @related_listings_rebuilt_afterwards()
     def handle(self, *args, **options):
         csv_file = options["csv_file"]
         clear = options.get("clear", False)
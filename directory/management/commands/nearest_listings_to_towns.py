@@ -0,0 +1,38 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from directory.geo_batch import load_gazetteer, nearest_neighbours
+from directory.models import Listing
+
+
+class Command(BaseCommand):
+    help = "Store the nearest active listings to every town in a gazetteer CSV (name, latitude, longitude)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("gazetteer", help="CSV file with name, latitude and longitude columns")
+        parser.add_argument("output", help="JSON file to write the neighbours to")
+        parser.add_argument("--k", type=int, default=10, help="Listings to keep per town (default: 10)")
+        parser.add_argument(
+            "--max-km",
+            type=float,
+            default=50.0,
+            help="Ignore listings further away than this (default: 50)",
+        )
+
+    def handle(self, *args, **options):
+        towns = load_gazetteer(options["gazetteer"])
+        listings = Listing.objects.filter(
+            is_active=True, latitude__isnull=False, longitude__isnull=False
+        ).values_list("slug", "latitude", "longitude")
+        neighbours = nearest_neighbours(towns, listings, options["k"], max_km=options["max_km"])
+
+        payload = {
+            town: [{"slug": slug, "distance_km": round(distance, 2)} for distance, slug in nearest]
+            for town, nearest in neighbours.items()
+        }
+        with open(options["output"], "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, indent=2, sort_keys=True)
+
+        covered = sum(1 for nearest in payload.values() if nearest)
+        self.stdout.write(self.style.SUCCESS(f"✓ {covered} of {len(towns)} towns have listings within {options['max_km']} km"))
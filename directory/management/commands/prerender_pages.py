@@ -0,0 +1,45 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from directory.prerender import prerender_site
+
+
+class Command(BaseCommand):
+    help = "Render home, county, listing and blog pages to static files (with .gz/.br) for nginx"
+
+    def add_arguments(self, parser):
+        parser.add_argument("output_dir", help="Directory to write the pages to")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Render processes to use (default: number of CPUs)",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Re-render every page, ignoring the manifest",
+        )
+        parser.add_argument(
+            "--min-listings",
+            type=int,
+            default=1,
+            help="Minimum number of listings for a county page to be rendered (default: 1)",
+        )
+
+    def handle(self, *args, **options):
+        stats = prerender_site(
+            options["output_dir"],
+            workers=options["workers"],
+            force=options["force"],
+            min_listings=options["min_listings"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ {stats['pages']} pages: {stats['rendered']} rendered, {stats['written']} written, "
+                f"{stats['removed']} removed"
+            )
+        )
+        if stats["failed"]:
+            self.stdout.write(self.style.WARNING(f"{stats['failed']} pages did not render and were left to the live site"))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from directory.related import rebuild_related_listings
+
+
+class Command(BaseCommand):
+    help = "Recompute the precomputed nearby listings shown on every listing page"
+
+    def handle(self, *args, **options):
+        links = rebuild_related_listings()
+        self.stdout.write(self.style.SUCCESS(f"✓ Stored {links} related listing links"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from directory.generation import bump_listing_generation
+from directory.models import DERIVED_FIELDS, Listing
+from directory.page_cache import listing_page_tags, purge_page_tags
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = "Recompute the JSON-LD and opening hours columns of every listing, e.g. after migrating"
+
+    def handle(self, *args, **options):
+        count = 0
+        batch = []
+        for listing in Listing.objects.iterator(chunk_size=BATCH_SIZE):
+            listing.set_derived_fields()
+            batch.append(listing)
+            if len(batch) == BATCH_SIZE:
+                count += self._update(batch)
+                batch = []
+        count += self._update(batch)
+        self.stdout.write(self.style.SUCCESS(f"✓ Refreshed {count} listings"))
+
+    def _update(self, listings):
+        # bulk_update sends no save signals, so drop what was cached from the old columns here
+        Listing.objects.bulk_update(listings, DERIVED_FIELDS)
+        bump_listing_generation()
+        purge_page_tags(tag for listing in listings for tag in listing_page_tags(listing.pk, listing.county))
+        return len(listings)
@@ -0,0 +1,146 @@
+import copy
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, QuerySet
+
+from .clusters import get_cluster_index
+from .generation import get_listing_generation
+from .models import Listing
+from .results import CachedListingResults
+from .utils import _parse_float, filter_state_key, get_filtered_listings, parse_bbox, parse_open_at
+
+
+# Coordinates are sent as integers scaled by 10**precision (5 digits is ~1 m).
+MAP_COORDINATE_PRECISION = 5
+# Deepest zoom accepted from clients (Leaflet tiles stop at 19).
+MAX_ZOOM = 22
+MAP_FIELDS = ("id", "name", "slug", "county", "city", "latitude", "longitude")
+
+# (id, name, slug, county, city, latitude, longitude, distance_km)
+MapRow = Tuple[int, str, str, str, str, float, float, Optional[float]]
+
+
+def get_listing_stats() -> Dict[str, Any]:
+    """Return the number of listings and their latest ``updated_at``, cached per generation."""
+    if not getattr(settings, "SHARED_CACHE", False):
+        # A per-process generation misses edits made by other workers and commands
+        return Listing.objects.aggregate(latest=Max("updated_at"), total=Count("id"))
+    cache_key = f"directory:listing_stats:{get_listing_generation()}"
+    stats = cache.get(cache_key)
+    if stats is None:
+        stats = Listing.objects.aggregate(latest=Max("updated_at"), total=Count("id"))
+        cache.set(cache_key, stats, getattr(settings, "LISTING_SNAPSHOT_TTL", 300))
+    return stats
+
+
+def get_listing_version() -> str:
+    """Return a token that changes whenever any listing is added, edited or removed."""
+    stats = get_listing_stats()
+    latest = stats["latest"].timestamp() if stats["latest"] else 0
+    return f"{stats['total']}-{latest}"
+
+
+def map_data_etag(request) -> str:
+    # Filters, search and the near-me origin all change the payload, and
+    # "open now" changes it as the clock moves
+    state = {
+        "version": get_listing_version(),
+        "open_at": parse_open_at(request.GET),
+        "params": sorted((key, request.GET.getlist(key)) for key in request.GET if key not in {"cursor", "sort"}),
+    }
+    return filter_state_key(state)
+
+
+def _map_rows(listings: Union[QuerySet[Listing], Sequence[Listing]]) -> List[MapRow]:
+    if isinstance(listings, QuerySet):
+        distance = ("distance_km",) if "distance_km" in listings.query.annotations else ()
+        rows = listings.filter(latitude__isnull=False, longitude__isnull=False).values_list(*MAP_FIELDS, *distance)
+        return [tuple(row) if distance else (*row, None) for row in rows]
+
+    if isinstance(listings, CachedListingResults):
+        # Only the marker columns, not whole listings.
+        rows = (
+            Listing.objects.filter(id__in=listings.ids, latitude__isnull=False, longitude__isnull=False)
+            .order_by()
+            .values_list(*MAP_FIELDS)
+        )
+        return [(*row, None) for row in rows]
+
+    return [
+        (*(getattr(listing, field) for field in MAP_FIELDS), getattr(listing, "distance_km", None))
+        for listing in listings
+        if listing.latitude is not None and listing.longitude is not None
+    ]
+
+
+def encode_map_data(listings: Union[QuerySet[Listing], Sequence[Listing]]) -> Dict[str, Any]:
+    """Return the map markers for ``listings`` as parallel arrays."""
+    scale = 10 ** MAP_COORDINATE_PRECISION
+    rows = sorted(_map_rows(listings), key=lambda row: row[0])
+    data: Dict[str, Any] = {
+        "precision": MAP_COORDINATE_PRECISION,
+        "id": [row[0] for row in rows],
+        "lat": [round(row[5] * scale) for row in rows],
+        "lng": [round(row[6] * scale) for row in rows],
+        "name": [row[1] for row in rows],
+        "slug": [row[2] for row in rows],
+        "location": [row[3] or row[4] for row in rows],
+    }
+    if any(row[7] is not None for row in rows):
+        data["distance_km"] = [row[7] for row in rows]
+    return data
+
+
+def get_map_data(request) -> Dict[str, Any]:
+    listings, _ = get_filtered_listings(request)
+    return encode_map_data(listings)
+
+
+def get_cluster_data(request) -> Dict[str, Any]:
+    """Return clusters and single markers for the request's viewport and zoom.
+
+    Each filter combination keeps a cluster index per worker, synced when
+    listings change, so the payload depends on what is visible rather than
+    on the size of the catalogue.
+    """
+    params = request.GET.copy()
+    zoom = int(min(max(_parse_float(params.pop("zoom", [None])[-1]) or 0, 0), MAX_ZOOM))
+    # The viewport only selects cells; the index covers the whole result.
+    bbox = parse_bbox(params.pop("bbox", [None])[-1])
+    for key in ("cursor", "sort"):
+        params.pop(key, None)
+
+    def load_points():
+        filter_request = copy.copy(request)
+        filter_request.GET = params
+        listings, _ = get_filtered_listings(filter_request)
+        return [
+            (row[0], row[1], row[2], row[3] or row[4], row[5], row[6])
+            for row in _map_rows(listings)
+        ]
+
+    key = filter_state_key({"params": sorted(params.lists()), "open_at": parse_open_at(params)})
+    index = get_cluster_index(key, load_points)
+    clusters, points = index.query(zoom, bbox)
+
+    scale = 10 ** MAP_COORDINATE_PRECISION
+    return {
+        "precision": MAP_COORDINATE_PRECISION,
+        "zoom": zoom,
+        "bounds": index.bounds(),
+        "clusters": {
+            "lat": [round(lat * scale) for lat, _, _ in clusters],
+            "lng": [round(lng * scale) for _, lng, _ in clusters],
+            "count": [count for _, _, count in clusters],
+        },
+        "points": {
+            "id": [point[0] for point in points],
+            "lat": [round(point[4] * scale) for point in points],
+            "lng": [round(point[5] * scale) for point in points],
+            "name": [point[1] for point in points],
+            "slug": [point[2] for point in points],
+            "location": [point[3] for point in points],
+        },
+    }
@@ -0,0 +1,132 @@
+import secrets
+from functools import wraps
+from gzip import GzipFile
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware as BaseAuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware as BaseMessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware as BaseSessionMiddleware
+from django.middleware.csrf import CsrfViewMiddleware as BaseCsrfViewMiddleware
+from django.middleware.gzip import GZipMiddleware
+from django.urls import Resolver404, resolve
+from django.utils.cache import patch_cache_control
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.text import StreamingBuffer
+
+from .page_cache import LOCATION_PARAMS
+
+# Most "open now" results are stale after a minute
+OPEN_NOW_S_MAXAGE = 60
+
+
+def public_page(view):
+    """Mark ``view`` as a read-only page that anonymous visitors get without cookies."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        return view(*args, **kwargs)
+
+    wrapper.public_page = True
+    return wrapper
+
+
+class PublicPageMiddleware(MiddlewareMixin):
+    """Route anonymous GETs of public pages around the cookie middleware.
+
+    Such responses never touch the session, so they carry no ``Vary: Cookie``
+    or cookies, and get a Cache-Control that lets nginx or a CDN share them.
+    """
+
+    def process_request(self, request):
+        request.public_page = False
+        if request.method not in ("GET", "HEAD"):
+            return
+        # Logged-in staff and visitors with pending messages keep the full stack
+        if settings.SESSION_COOKIE_NAME in request.COOKIES or "messages" in request.COOKIES:
+            return
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return
+        request.public_page = getattr(match.func, "public_page", False)
+
+    def process_response(self, request, response):
+        if not getattr(request, "public_page", False) or response.status_code not in (200, 304):
+            return response
+        if response.has_header("Cache-Control") or response.cookies:
+            return response
+        # Results around the visitor's location are theirs alone
+        if any(param in request.GET for param in LOCATION_PARAMS):
+            patch_cache_control(response, private=True, max_age=0)
+            return response
+        s_maxage = settings.PUBLIC_PAGE_S_MAXAGE
+        if "open_now" in request.GET:
+            s_maxage = min(s_maxage, OPEN_NOW_S_MAXAGE)
+        # Browsers revalidate with the ETag; shared caches keep the page for s-maxage
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=0,
+            s_maxage=s_maxage,
+            stale_while_revalidate=settings.PUBLIC_PAGE_STALE_WHILE_REVALIDATE,
+        )
+        return response
+
+
+class SkippedOnPublicPages:
+    """Mixin for middleware that public pages don't need."""
+
+    def __call__(self, request):
+        if getattr(request, "public_page", False):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(SkippedOnPublicPages, BaseSessionMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(SkippedOnPublicPages, BaseCsrfViewMiddleware):
+    pass
+
+
+class AuthenticationMiddleware(SkippedOnPublicPages, BaseAuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(SkippedOnPublicPages, BaseMessageMiddleware):
+    pass
+
+
+def compress_sequence_flushing(sequence, *, max_random_bytes=None):
+    """Like Django's ``compress_sequence``, but every chunk is flushed to the client.
+
+    A sync flush after each item ends the current deflate block, so the
+    browser can decode and render what has arrived so far. Django's version
+    can't flush, as it keeps its GzipFile to itself.
+    """
+    buf = StreamingBuffer()
+    # A filename of random length pads the gzip header against BREACH, as Django does
+    filename = b"a" * secrets.randbelow(max_random_bytes) if max_random_bytes else None
+    with GzipFile(filename=filename, mode="wb", compresslevel=6, fileobj=buf, mtime=0) as zfile:
+        yield buf.read()
+        for item in sequence:
+            zfile.write(item)
+            zfile.flush()
+            yield buf.read()
+    yield buf.read()
+
+
+class StreamingGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that keeps streamed responses streaming."""
+
+    def process_response(self, request, response):
+        if not response.streaming or response.is_async or response.has_header("Content-Encoding"):
+            return super().process_response(request, response)
+        content = response.streaming_content
+        response = super().process_response(request, response)
+        if response.get("Content-Encoding") == "gzip":
+            response.streaming_content = compress_sequence_flushing(
+                content, max_random_bytes=self.max_random_bytes
+            )
+        return response
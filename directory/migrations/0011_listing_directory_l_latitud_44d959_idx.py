@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("directory", "0010_remove_listing_directory_l_city_b70624_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["latitude", "longitude"], name="directory_l_latitud_44d959_idx"
+            ),
+        ),
+    ]
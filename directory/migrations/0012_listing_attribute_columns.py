@@ -0,0 +1,125 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:12
+
+import django.db.models.fields.json
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("directory", "0011_listing_directory_l_latitud_44d959_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="listing",
+            name="attr_changing_facilities",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.functions.text.Upper(
+                    django.db.models.fields.json.KeyTextTransform(
+                        "changing_facilities", "attributes"
+                    )
+                ),
+                output_field=models.TextField(null=True),
+            ),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="attr_cold_plunge",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.functions.text.Upper(
+                    django.db.models.fields.json.KeyTextTransform(
+                        "cold_plunge", "attributes"
+                    )
+                ),
+                output_field=models.TextField(null=True),
+            ),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="attr_dog_friendly",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.functions.text.Upper(
+                    django.db.models.fields.json.KeyTextTransform(
+                        "dog_friendly", "attributes"
+                    )
+                ),
+                output_field=models.TextField(null=True),
+            ),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="attr_heat_source",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.functions.text.Upper(
+                    django.db.models.fields.json.KeyTextTransform(
+                        "heat_source", "attributes"
+                    )
+                ),
+                output_field=models.TextField(null=True),
+            ),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="attr_sea_view",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.functions.text.Upper(
+                    django.db.models.fields.json.KeyTextTransform(
+                        "sea_view", "attributes"
+                    )
+                ),
+                output_field=models.TextField(null=True),
+            ),
+        ),
+        migrations.AddField(
+            model_name="listing",
+            name="attr_showers",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=django.db.models.functions.text.Upper(
+                    django.db.models.fields.json.KeyTextTransform(
+                        "showers", "attributes"
+                    )
+                ),
+                output_field=models.TextField(null=True),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["attr_heat_source"], name="attr_heat_source_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["attr_cold_plunge"], name="attr_cold_plunge_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["attr_changing_facilities"], name="attr_changing_facilities_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(fields=["attr_showers"], name="attr_showers_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(fields=["attr_sea_view"], name="attr_sea_view_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(
+                fields=["attr_dog_friendly"], name="attr_dog_friendly_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:20
+
+from django.db import migrations, models
+
+
+def backfill_counties(apps, schema_editor):
+    from decimal import Decimal
+
+    from django.db.models import Avg, Count, Max, Min
+    from django.utils.text import slugify
+
+    Listing = apps.get_model("directory", "Listing")
+    County = apps.get_model("directory", "County")
+    seen = set()
+    active = Listing.objects.filter(is_active=True).exclude(county="")
+    for county in active.values_list("county", flat=True).distinct():
+        slug = slugify(county)
+        if not slug or slug in seen:
+            continue
+        seen.add(slug)
+        listings = active.filter(county__iexact=county.strip())
+        stats = listings.aggregate(
+            listings_count=Count("id"),
+            average_rating=Avg("rating"),
+            min_latitude=Min("latitude"),
+            max_latitude=Max("latitude"),
+            min_longitude=Min("longitude"),
+            max_longitude=Max("longitude"),
+            center_latitude=Avg("latitude"),
+            center_longitude=Avg("longitude"),
+        )
+        stats["name"] = (
+            listings.values("county")
+            .annotate(total=Count("id"))
+            .order_by("-total", "county")
+            .first()["county"]
+        )
+        if stats["average_rating"] is not None:
+            stats["average_rating"] = Decimal(stats["average_rating"]).quantize(
+                Decimal("0.01")
+            )
+        County.objects.create(slug=slug, **stats)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("directory", "0013_listing_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="County",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=120)),
+                ("slug", models.SlugField(max_length=120, unique=True)),
+                ("listings_count", models.IntegerField(default=0)),
+                (
+                    "average_rating",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=3, null=True
+                    ),
+                ),
+                ("min_latitude", models.FloatField(blank=True, null=True)),
+                ("max_latitude", models.FloatField(blank=True, null=True)),
+                ("min_longitude", models.FloatField(blank=True, null=True)),
+                ("max_longitude", models.FloatField(blank=True, null=True)),
+                ("center_latitude", models.FloatField(blank=True, null=True)),
+                ("center_longitude", models.FloatField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "counties",
+                "ordering": ["name"],
+            },
+        ),
+        migrations.RunPython(backfill_counties, migrations.RunPython.noop),
+    ]
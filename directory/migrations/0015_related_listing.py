@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("directory", "0014_county"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RelatedListing",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("position", models.PositiveSmallIntegerField()),
+                ("distance_km", models.FloatField(blank=True, null=True)),
+                (
+                    "listing",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="related_links",
+                        to="directory.listing",
+                    ),
+                ),
+                (
+                    "related",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="directory.listing",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["listing", "position"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("listing", "position"),
+                        name="related_listing_position_unique",
+                    )
+                ],
+            },
+        ),
+    ]
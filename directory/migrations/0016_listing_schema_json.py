@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("directory", "0015_related_listing"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="listing",
+            name="schema_json",
+            field=models.TextField(blank=True, editable=False),
+        ),
+    ]
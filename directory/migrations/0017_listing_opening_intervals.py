@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:35
+
+import directory.fields
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("directory", "0016_listing_schema_json"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="listing",
+            name="opening_intervals",
+            field=directory.fields.IntegerMultiRangeField(
+                blank=True, editable=False, null=True
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=django.contrib.postgres.indexes.GistIndex(
+                fields=["opening_intervals"], name="listing_opening_intervals_idx"
+            ),
+        ),
+    ]
@@ -1,6 +1,46 @@
+from django.contrib.postgres.indexes import GinIndex, GistIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models import Case, Value, When
+from django.db.models.fields.json import KT
+from django.db.models.functions import Upper
 from django.utils.text import slugify
 
+from .fields import IntegerMultiRangeField
+from .niche_config import FILTERS
+from .opening_hours import weekly_intervals
+from .schema import listing_schema_json
+
+
+# Attribute filters from FILTERS that get a generated, indexed column on Listing.
+ATTRIBUTE_FILTERS = [
+    definition
+    for definition in FILTERS
+    if definition.get("key") and definition.get("field_type", "attribute") == "attribute"
+]
+
+
+def attribute_column(key: str) -> str:
+    """Name of the generated column that mirrors ``attributes[key]``."""
+    return f"attr_{key}"
+
+
+def _attribute_column_field(definition) -> models.GeneratedField:
+    key = definition["key"]
+    if definition.get("type", "choice") == "boolean":
+        expression = Case(
+            When(**{f"attributes__{key}": True}, then=Value(True)),
+            When(**{f"attributes__{key}": False}, then=Value(False)),
+            default=None,
+            output_field=models.BooleanField(null=True),
+        )
+        output_field = models.BooleanField(null=True)
+    else:
+        # Upper-cased like the case-insensitive filter values compared against it.
+        expression = Upper(KT(f"attributes__{key}"))
+        output_field = models.TextField(null=True)
+    return models.GeneratedField(expression=expression, output_field=output_field, db_persist=True)
+
 
 class Listing(models.Model):
     name = models.CharField(max_length=255)
@@ -19,20 +59,131 @@ class Listing(models.Model):
     reviews_count = models.IntegerField(null=True, blank=True)
     attributes = models.JSONField(default=dict, blank=True)
     structured_data = models.JSONField(default=dict, blank=True)
+    # schema.org LocalBusiness JSON-LD, serialised on save
+    schema_json = models.TextField(blank=True, editable=False)
+    # Minute-of-week ranges parsed from attributes["opening_hours"] on save; null when unknown
+    opening_intervals = IntegerMultiRangeField(null=True, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Weighted full-text document, maintained by Postgres on every write
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector("name", weight="A", config="english")
+            + SearchVector("city", "county", weight="B", config="english")
+            + SearchVector("address", "description", weight="C", config="english")
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
 
     class Meta:
         indexes = [
             models.Index(fields=["county"]),
             models.Index(fields=["-is_featured", "name"]),
+            models.Index(fields=["latitude", "longitude"]),
+            GinIndex(fields=["search_vector"], name="listing_search_vector_idx"),
+            # Trigram indexes for typo-tolerant matching of names and places
+            GinIndex(fields=["name"], name="listing_name_trgm_idx", opclasses=["gin_trgm_ops"]),
+            GinIndex(fields=["city"], name="listing_city_trgm_idx", opclasses=["gin_trgm_ops"]),
+            GinIndex(fields=["county"], name="listing_county_trgm_idx", opclasses=["gin_trgm_ops"]),
+            GistIndex(fields=["opening_intervals"], name="listing_opening_intervals_idx"),
+        ] + [
+            models.Index(fields=[attribute_column(definition["key"])], name=f"attr_{definition['key']}_idx"[:30])
+            for definition in ATTRIBUTE_FILTERS
         ]
 
     def __str__(self) -> str:
         return self.name
 
+    def set_derived_fields(self) -> None:
+        """Recompute the columns kept in step with the listing's own data."""
+        self.schema_json = listing_schema_json(self)
+        self.opening_intervals = weekly_intervals((self.attributes or {}).get("opening_hours"))
+
+    def save(self, *args, **kwargs):
+        self.set_derived_fields()
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], *DERIVED_FIELDS}
+        super().save(*args, **kwargs)
+
+
+# Columns Listing.save() computes from the others
+DERIVED_FIELDS = ("schema_json", "opening_intervals")
+
+
+# Columns the result cards, cursors and map markers read. List views load only
+# these, leaving the review payload in structured_data, schema_json and the
+# search vector in Postgres.
+LISTING_CARD_FIELDS = (
+    "id",
+    "name",
+    "slug",
+    "city",
+    "county",
+    "description",
+    "address",
+    "website",
+    "phone",
+    "photo_ref",
+    "latitude",
+    "longitude",
+    "rating",
+    "reviews_count",
+    "attributes",
+    "is_featured",
+    "updated_at",
+)
+
+
+# Postgres keeps these in sync with ``attributes``, which stays the source of
+# truth; adding a filter key to FILTERS and running makemigrations adds its column.
+for _definition in ATTRIBUTE_FILTERS:
+    Listing.add_to_class(attribute_column(_definition["key"]), _attribute_column_field(_definition))
+
+
+class County(models.Model):
+    """Per-county summary of active listings, kept current by Listing signals."""
+
+    name = models.CharField(max_length=120)
+    slug = models.SlugField(max_length=120, unique=True)
+    listings_count = models.IntegerField(default=0)
+    average_rating = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
+    min_latitude = models.FloatField(null=True, blank=True)
+    max_latitude = models.FloatField(null=True, blank=True)
+    min_longitude = models.FloatField(null=True, blank=True)
+    max_longitude = models.FloatField(null=True, blank=True)
+    center_latitude = models.FloatField(null=True, blank=True)
+    center_longitude = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["name"]
+        verbose_name_plural = "counties"
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class RelatedListing(models.Model):
+    """One precomputed "nearby" listing for a listing's detail page."""
+
+    listing = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name="related_links")
+    related = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name="+")
+    position = models.PositiveSmallIntegerField()
+    # Null when either listing has no coordinates (county/city fallback)
+    distance_km = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["listing", "position"]
+        constraints = [
+            models.UniqueConstraint(fields=["listing", "position"], name="related_listing_position_unique"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.listing} → {self.related}"
+
 
 class SaunaSubmission(models.Model):
     STATUS_CHOICES = [
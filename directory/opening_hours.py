@@ -0,0 +1,143 @@
+"""Parsing of the pipe-separated ``attributes["opening_hours"]`` text.
+
+Accepts the Google Places weekday text in our CSVs ("Monday: 10:00 AM – 4:00 PM",
+"Friday: 5:00 – 8:00 PM, 9:00 – 11:00 PM", "Sunday: Open 24 hours",
+"Tuesday: Closed") as well as the short "Monday: 9am-5pm" form.
+"""
+import re
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+MINUTES_PER_DAY = 24 * 60
+
+# Google separates times with thin and narrow no-break spaces, which \s matches.
+_SPACES = re.compile(r"\s+")
+_RANGE_SEPARATOR = re.compile(r"\s*(?:-|–|—|\bto\b)\s*")
+_TIME = re.compile(r"^(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm)?$")
+_ALL_DAY = re.compile(r"^(?:open\s+)?24\s*hours$|^24/7$")
+
+# (day index, opens, closes) in minutes from midnight; closes <= opens runs past midnight.
+DayRange = Tuple[int, int, int]
+
+
+def _parse_time(token: str, meridiem: Optional[str] = None) -> Optional[int]:
+    match = _TIME.match(token)
+    if not match:
+        return None
+    hour, minute = int(match.group(1)), int(match.group(2) or "0")
+    meridiem = match.group(3) or meridiem
+    if minute > 59:
+        return None
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    elif hour > 24 or (hour == 24 and minute):
+        return None
+    return hour * 60 + minute
+
+
+def _meridiem(token: str) -> Optional[str]:
+    match = _TIME.match(token)
+    return match.group(3) if match else None
+
+
+def parse_time_ranges(text: str) -> List[Tuple[int, int]]:
+    """Return the (opens, closes) minute pairs in one day's hours; [] when closed or unreadable."""
+    text = _SPACES.sub(" ", text).strip().lower()
+    if _ALL_DAY.match(text):
+        return [(0, MINUTES_PER_DAY)]
+    ranges = []
+    for part in text.split(","):
+        bounds = _RANGE_SEPARATOR.split(part.strip(), maxsplit=1)
+        if len(bounds) != 2:
+            continue
+        start_raw, end_raw = bounds[0].strip(), bounds[1].strip()
+        # "5:00 – 8:00 PM": the start shares the end's AM/PM
+        end = _parse_time(end_raw)
+        start = _parse_time(start_raw, _meridiem(end_raw))
+        if start is None or end is None:
+            continue
+        # Closing at midnight ends the day rather than starting it
+        ranges.append((start, end or MINUTES_PER_DAY))
+    return ranges
+
+
+def parse_opening_hours(text: Optional[str]) -> List[DayRange]:
+    """Parse "Day: hours|Day: hours" text into (day index, opens, closes) ranges, Monday = 0."""
+    ranges: List[DayRange] = []
+    for day_hours in (text or "").split("|"):
+        day, separator, hours = day_hours.partition(":")
+        day = day.strip().lower()
+        if not separator or day not in DAYS:
+            continue
+        ranges.extend((DAYS.index(day), opens, closes) for opens, closes in parse_time_ranges(hours))
+    return ranges
+
+
+def format_minutes(minutes: int) -> str:
+    # schema.org has no 24:00; end-of-day closing is written as 23:59
+    minutes = min(minutes, MINUTES_PER_DAY - 1)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+Intervals = List[Tuple[int, int]]
+
+
+def weekly_intervals(text: Optional[str]) -> Optional[Intervals]:
+    """Return merged ``[start, end)`` minute-of-week intervals, or None when no hours are known.
+
+    Minute 0 is Monday 00:00; ranges past midnight carry into the next day and
+    Sunday night wraps round to Monday morning.
+    """
+    ranges = parse_opening_hours(text)
+    if not ranges:
+        return None
+    pieces = []
+    for day, opens, closes in ranges:
+        start = day * MINUTES_PER_DAY + opens
+        end = day * MINUTES_PER_DAY + closes + (MINUTES_PER_DAY if closes <= opens else 0)
+        if end > MINUTES_PER_WEEK:
+            pieces.append((0, end - MINUTES_PER_WEEK))
+            end = MINUTES_PER_WEEK
+        pieces.append((start, end))
+
+    merged: Intervals = []
+    for start, end in sorted(pieces):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def minute_of_week(moment) -> int:
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+class OpeningIndex:
+    """Answers "which listings are open at minute m of the week" with one bisect.
+
+    The week is cut at every opening and closing minute; each segment between
+    cuts keeps the bitmap of positions open throughout it.
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[int, Intervals]]):
+        toggles: Dict[int, int] = {}
+        for position, ranges in intervals:
+            bit = 1 << position
+            # Merged ranges never share an endpoint, so each bit flips on then off.
+            for start, end in ranges:
+                toggles[start] = toggles.get(start, 0) ^ bit
+                toggles[end] = toggles.get(end, 0) ^ bit
+        self.cuts = [0]
+        self.masks = [toggles.pop(0, 0)]
+        for cut in sorted(toggles):
+            self.cuts.append(cut)
+            self.masks.append(self.masks[-1] ^ toggles[cut])
+
+    def open_at(self, minute: int) -> int:
+        return self.masks[bisect_right(self.cuts, minute % MINUTES_PER_WEEK) - 1]
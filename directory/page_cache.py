@@ -0,0 +1,198 @@
+"""Full-page cache for anonymous HTML pages.
+
+Rendered pages are stored once with their gzip (and, when the ``brotli``
+package is installed, brotli) variants, so a hit skips the ORM, templates and
+compression. Each page is tagged (listing, county, blog, ...) and entries
+remember the tag versions they were rendered against; purging a tag bumps its
+version so only the pages that show the changed rows are re-rendered.
+"""
+import gzip
+import hashlib
+import re
+from functools import wraps
+from typing import Dict, Iterable, Iterator, Optional, Set
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import slugify
+
+from .generation import bump_counter, get_listing_generation
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip covers every client
+    brotli = None
+
+
+PAGE_CACHE_PREFIX = "directory:page"
+PAGE_TAG_PREFIX = "directory:page-tag"
+
+# Pages that show every listing (home, its filter combinations)
+ALL_LISTINGS_TAG = "listings"
+# Pages that show per-county totals, e.g. the county facet on landing pages
+COUNTY_COUNTS_TAG = "county-counts"
+BLOG_TAG = "blog"
+
+# Query parameters that make a page specific to one visitor
+LOCATION_PARAMS = ("lat", "lng")
+# ...or to the current time; neither kind is page-cached
+UNCACHEABLE_PARAMS = LOCATION_PARAMS + ("open_now",)
+
+_accepts_gzip = re.compile(r"\bgzip\b")
+_accepts_br = re.compile(r"\bbr\b")
+
+
+def listing_tag(listing_id) -> str:
+    return f"listing:{listing_id}"
+
+
+def county_tag(county: Optional[str]) -> Optional[str]:
+    return f"county:{slugify(county)}" if county else None
+
+
+def listing_page_tags(listing_id, county: Optional[str]) -> Set[str]:
+    # Everything that renders this listing: its own page (and the pages
+    # listing it as related), its county page and the home page
+    return {tag for tag in (ALL_LISTINGS_TAG, listing_tag(listing_id), county_tag(county)) if tag}
+
+
+def tag_response(response: HttpResponse, *tags: Optional[str]) -> HttpResponse:
+    """Mark ``response`` as cacheable under ``tags``; untagged pages are never cached."""
+    response.page_cache_tags = {tag for tag in tags if tag}
+    return response
+
+
+def purge_page_tags(tags: Iterable[Optional[str]]) -> None:
+    """Invalidate every cached page tagged with any of ``tags``."""
+    for tag in {tag for tag in tags if tag}:
+        bump_counter(f"{PAGE_TAG_PREFIX}:{tag}")
+
+
+def _tag_versions(tags: Iterable[str]) -> Dict[str, int]:
+    keys = {f"{PAGE_TAG_PREFIX}:{tag}": tag for tag in tags}
+    found = cache.get_many(list(keys))
+    return {tag: found.get(key, 0) for key, tag in keys.items()}
+
+
+def _page_key(request: HttpRequest) -> str:
+    # Parameter order doesn't matter; HTMX requests get the partial, not the page
+    query = sorted((key, value) for key, values in request.GET.lists() for value in values)
+    htmx = request.headers.get("HX-Request", "false").lower() == "true"
+    payload = repr((request.path, query, htmx))
+    return f"{PAGE_CACHE_PREFIX}:{hashlib.md5(payload.encode()).hexdigest()}"
+
+
+def _cacheable_request(request: HttpRequest) -> bool:
+    if not getattr(settings, "PAGE_CACHE_ENABLED", False) or request.method not in ("GET", "HEAD"):
+        return False
+    # Visitors with a session or pending flash messages see personalised pages
+    if settings.SESSION_COOKIE_NAME in request.COOKIES or "messages" in request.COOKIES:
+        return False
+    return not any(param in request.GET for param in UNCACHEABLE_PARAMS)
+
+
+def _cacheable_response(request: HttpRequest, response: HttpResponse) -> bool:
+    if response.status_code != 200 or not getattr(response, "page_cache_tags", None):
+        return False
+    # Streamed pages are collected as they are sent, which needs a sync iterator
+    if response.streaming and response.is_async:
+        return False
+    if response.has_header("Set-Cookie") or response.cookies or response.has_header("Content-Encoding"):
+        return False
+    if "private" in response.get("Cache-Control", "") or "no-store" in response.get("Cache-Control", ""):
+        return False
+    # A rendered CSRF token or a touched session makes the page per-visitor.
+    session = getattr(request, "session", None)
+    return not request.META.get("CSRF_COOKIE_NEEDS_UPDATE") and not (session is not None and session.accessed)
+
+
+def compress_variants(body: bytes) -> Dict[str, Optional[bytes]]:
+    """Return the deterministic gzip and (if available) brotli encodings of ``body``."""
+    return {
+        "gzip": gzip.compress(body, compresslevel=6, mtime=0),
+        "br": brotli.compress(body) if brotli is not None else None,
+    }
+
+
+def _build_entry(response: HttpResponse, body: bytes, versions: Dict[str, int]) -> Dict:
+    return {
+        "status": response.status_code,
+        "content_type": response["Content-Type"],
+        "body": body,
+        **compress_variants(body),
+        "tags": versions,
+    }
+
+
+def _cached_response(request: HttpRequest, entry: Dict) -> HttpResponse:
+    accept_encoding = request.headers.get("Accept-Encoding", "")
+    body, encoding = entry["body"], None
+    if entry["br"] is not None and _accepts_br.search(accept_encoding):
+        body, encoding = entry["br"], "br"
+    elif _accepts_gzip.search(accept_encoding):
+        body, encoding = entry["gzip"], "gzip"
+
+    response = HttpResponse(body, status=entry["status"], content_type=entry["content_type"])
+    if encoding:
+        # GZipMiddleware leaves responses that already have an encoding alone.
+        response["Content-Encoding"] = encoding
+    response["Content-Length"] = str(len(body))
+    response["X-Page-Cache"] = "hit"
+    patch_vary_headers(response, ("Accept-Encoding", "HX-Request"))
+    return response
+
+
+def _store(key: str, response: HttpResponse, body: bytes, versions: Dict[str, int]) -> None:
+    cache.set(key, _build_entry(response, body, versions), timeout=getattr(settings, "PAGE_CACHE_TIMEOUT", 600))
+
+
+def _store_when_streamed(
+    content: Iterator[bytes], key: str, response: HttpResponse, versions: Dict[str, int], generation: int
+) -> Iterator[bytes]:
+    # Streamed pages are stored once the last chunk has been sent, and only
+    # if no listing changed in the meantime; an aborted stream stores nothing.
+    chunks = []
+    for chunk in content:
+        chunks.append(chunk)
+        yield chunk
+    if get_listing_generation() == generation:
+        _store(key, response, b"".join(chunks), versions)
+
+
+def cache_anonymous_page(view):
+    """Serve ``view`` from the page cache for anonymous GET and HEAD requests.
+
+    The view opts in per response with :func:`tag_response`.
+    """
+
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if not _cacheable_request(request):
+            response = view(request, *args, **kwargs)
+            # Shared caches must tell HTMX partials from full pages too
+            patch_vary_headers(response, ("HX-Request",))
+            return response
+
+        key = _page_key(request)
+        entry = cache.get(key)
+        if entry is not None and _tag_versions(entry["tags"]) == entry["tags"]:
+            return _cached_response(request, entry)
+
+        generation = get_listing_generation()
+        response = view(request, *args, **kwargs)
+        patch_vary_headers(response, ("HX-Request",))
+        # Skip storing if listings changed while rendering; the tag versions
+        # read now could already include that purge.
+        if _cacheable_response(request, response) and get_listing_generation() == generation:
+            versions = _tag_versions(response.page_cache_tags)
+            if response.streaming:
+                response.streaming_content = _store_when_streamed(
+                    response.streaming_content, key, response, versions, generation
+                )
+            else:
+                _store(key, response, response.content, versions)
+        return response
+
+    return wrapper
@@ -0,0 +1,210 @@
+import base64
+import binascii
+import json
+from decimal import Decimal
+from typing import Any, Iterator, List, Optional, Sequence, Tuple, Union
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import OrderBy
+
+from .models import Listing
+
+
+# (attribute, descending, nulls_first) for one ORDER BY term.
+SortKey = Tuple[str, bool, bool]
+
+
+def _sort_keys(ordering: Sequence[Union[str, OrderBy]]) -> List[SortKey]:
+    keys: List[SortKey] = []
+    for term in ordering:
+        if isinstance(term, OrderBy):
+            name = term.expression.name
+            descending = term.descending
+            if term.nulls_last:
+                nulls_first = False
+            elif term.nulls_first:
+                nulls_first = True
+            else:
+                nulls_first = descending
+        else:
+            descending = term.startswith("-")
+            name = term.lstrip("-")
+            # Postgres default: NULLS FIRST for DESC, NULLS LAST for ASC.
+            nulls_first = descending
+        keys.append((name, descending, nulls_first))
+    return keys
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(listing: Listing, ordering: Sequence[Union[str, OrderBy]]) -> str:
+    """Return an opaque cursor pointing just after ``listing`` in ``ordering``."""
+    values = [_json_value(getattr(listing, name)) for name, _, _ in _sort_keys(ordering)]
+    payload = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], ordering: Sequence[Union[str, OrderBy]]) -> Optional[List[Any]]:
+    """Return the sort values stored in ``cursor``, or None if it is missing or invalid."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError):
+        return None
+
+    keys = _sort_keys(ordering)
+    if not isinstance(values, list) or len(values) != len(keys):
+        return None
+
+    decoded = []
+    for (name, _, _), value in zip(keys, values):
+        if value is not None:
+            try:
+                value = Listing._meta.get_field(name).to_python(value)
+            except FieldDoesNotExist:
+                pass  # annotations such as distance are plain floats
+            except ValidationError:
+                return None
+        decoded.append(value)
+    return decoded
+
+
+def _after_q(name: str, descending: bool, nulls_first: bool, value: Any) -> Optional[Q]:
+    if value is None:
+        # Only non-NULL values can follow a NULL that sorts first.
+        return Q(**{f"{name}__isnull": False}) if nulls_first else None
+    after = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+    if not nulls_first:
+        after |= Q(**{f"{name}__isnull": True})
+    return after
+
+
+def _keyset_q(keys: List[SortKey], values: List[Any]) -> Q:
+    # (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... with per-key direction and NULL placement.
+    clauses: List[Q] = []
+    equal = Q()
+    for (name, descending, nulls_first), value in zip(keys, values):
+        after = _after_q(name, descending, nulls_first, value)
+        if after is not None:
+            clauses.append(equal & after)
+        if value is None:
+            equal &= Q(**{f"{name}__isnull": True})
+        else:
+            equal &= Q(**{name: value})
+
+    condition = Q(pk__in=[])
+    for clause in clauses:
+        condition |= clause
+    return condition
+
+
+def _is_after(listing: Listing, keys: List[SortKey], values: List[Any]) -> bool:
+    for (name, descending, nulls_first), cursor_value in zip(keys, values):
+        value = getattr(listing, name)
+        if value == cursor_value:
+            continue
+        if value is None:
+            return not nulls_first
+        if cursor_value is None:
+            return nulls_first
+        return value < cursor_value if descending else value > cursor_value
+    return False
+
+
+def _start_after(listings: Sequence[Listing], keys: List[SortKey], values: List[Any]) -> int:
+    # The id tiebreaker is always the last key, so find the row directly;
+    # fall back to comparing sort values if it has since disappeared.
+    ids = getattr(listings, "ids", None)
+    if ids is None:
+        ids = [listing.id for listing in listings]
+    try:
+        return ids.index(values[-1]) + 1
+    except ValueError:
+        return next(
+            (index for index, listing in enumerate(listings) if _is_after(listing, keys, values)),
+            len(listings),
+        )
+
+
+def _page_rows(
+    listings: Union[QuerySet[Listing], Sequence[Listing]],
+    ordering: Sequence[Union[str, OrderBy]],
+    cursor: Optional[str],
+    limit: int,
+) -> Union[QuerySet[Listing], Sequence[Listing]]:
+    # Up to ``limit`` rows after ``cursor``; querysets stay unevaluated
+    keys = _sort_keys(ordering)
+    values = decode_cursor(cursor, ordering)
+
+    if isinstance(listings, QuerySet):
+        if values is not None:
+            listings = listings.filter(_keyset_q(keys, values))
+        return listings[:limit]
+    start = _start_after(listings, keys, values) if values is not None else 0
+    return listings[start:start + limit]
+
+
+def paginate_listings(
+    listings: Union[QuerySet[Listing], Sequence[Listing]],
+    ordering: Sequence[Union[str, OrderBy]],
+    cursor: Optional[str],
+    page_size: int,
+) -> Tuple[List[Listing], Optional[str]]:
+    """Return one page of ``listings`` after ``cursor`` and the cursor of the next page.
+
+    Querysets are paged with a keyset WHERE clause plus LIMIT, so every page
+    costs the same as the first one.
+    """
+    rows = list(_page_rows(listings, ordering, cursor, page_size + 1))
+    page = rows[:page_size]
+    next_cursor = encode_cursor(page[-1], ordering) if len(rows) > page_size else None
+    return page, next_cursor
+
+
+class PageStream:
+    """The page ``paginate_listings`` would return, read in chunks as it is consumed.
+
+    Querysets are read through a server-side cursor; ``next_cursor`` is set
+    once ``chunks()`` has been exhausted.
+    """
+
+    def __init__(
+        self,
+        listings: Union[QuerySet[Listing], Sequence[Listing]],
+        ordering: Sequence[Union[str, OrderBy]],
+        cursor: Optional[str],
+        page_size: int,
+        chunk_size: int,
+    ):
+        self.rows = _page_rows(listings, ordering, cursor, page_size + 1)
+        self.ordering = ordering
+        self.page_size = page_size
+        self.chunk_size = chunk_size
+        self.next_cursor: Optional[str] = None
+
+    def chunks(self) -> Iterator[List[Listing]]:
+        if isinstance(self.rows, QuerySet):
+            rows = self.rows.iterator(chunk_size=self.chunk_size)
+        else:
+            rows = iter(self.rows)
+        chunk: List[Listing] = []
+        last: Optional[Listing] = None
+        for count, listing in enumerate(rows):
+            if count == self.page_size:
+                # A row past the end of the page means there is a next page
+                self.next_cursor = encode_cursor(last, self.ordering)
+                break
+            chunk.append(listing)
+            last = listing
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
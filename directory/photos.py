@@ -0,0 +1,246 @@
+"""Listing photos served from our own domain.
+
+Each ``photo_ref`` is fetched from the upstream (the Places Photo API by
+default, see ``PHOTO_UPSTREAM``) once; the original and every resized variant
+are kept under ``PHOTO_CACHE_DIR``. Photo URLs carry a digest of the
+``photo_ref``, so a new photo gets new URLs and the files can be cached
+forever. Once the directory outgrows ``PHOTO_CACHE_MAX_BYTES`` the least
+recently served files are removed; they are rebuilt from the upstream on the
+next request.
+
+A cold miss fetches the original (up to ``GooglePlacePhotoUpstream.timeout``
+seconds) and encodes the variant in the request, which holds a sync worker
+for that long; AVIF is the slowest format. Run ``cache_photos`` after imports
+so visitors rarely hit one.
+"""
+import hashlib
+import os
+import tempfile
+import urllib.error
+import urllib.parse
+import urllib.request
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it the original JPEG is served at every size
+    Image = None
+
+# variant -> (widths offered in srcset, height / width)
+VARIANTS = {
+    "card": ((400, 800), 3 / 4),
+    "detail": ((800, 1200), 2 / 3),
+    # Open Graph and schema.org image: 1.91:1, as the social networks crop it
+    "og": ((1200,), 630 / 1200),
+}
+CONTENT_TYPES = {"avif": "image/avif", "webp": "image/webp", "jpg": "image/jpeg"}
+_SAVE_OPTIONS = {
+    "avif": {"format": "AVIF", "quality": 55},
+    "webp": {"format": "WEBP", "quality": 78},
+    "jpg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+}
+# Widest original we ask the upstream for
+SOURCE_WIDTH = 1600
+SOURCE_NAME = "source"
+# Seconds before a photo the upstream refused is tried again
+FAILURE_TIMEOUT = 3600
+FAILURE_CACHE_PREFIX = "directory:photo-unavailable"
+# Running total of the bytes under a cache directory, reset whenever it is scanned
+SIZE_CACHE_PREFIX = "directory:photo-cache-bytes"
+
+
+class PhotoUnavailable(Exception):
+    """The upstream has no usable image for a ``photo_ref``."""
+
+
+class GooglePlacePhotoUpstream:
+    """Fetch originals from the Places Photo API; the key never reaches the browser."""
+
+    url = "https://maps.googleapis.com/maps/api/place/photo"
+    timeout = 10
+
+    @staticmethod
+    def configured() -> bool:
+        return bool(settings.GOOGLE_MAPS_API_KEY)
+
+    def fetch(self, photo_ref: str, max_width: int) -> bytes:
+        if not settings.GOOGLE_MAPS_API_KEY:
+            raise PhotoUnavailable("GOOGLE_MAPS_API_KEY is not set")
+        query = urllib.parse.urlencode(
+            {"maxwidth": max_width, "photoreference": photo_ref, "key": settings.GOOGLE_MAPS_API_KEY}
+        )
+        try:
+            with urllib.request.urlopen(f"{self.url}?{query}", timeout=self.timeout) as response:
+                return response.read()
+        except (urllib.error.URLError, OSError) as exc:
+            raise PhotoUnavailable(str(exc)) from exc
+
+
+def photo_digest(photo_ref: str) -> str:
+    return hashlib.sha256(photo_ref.encode()).hexdigest()[:16]
+
+
+@lru_cache(maxsize=1)
+def available_formats() -> Tuple[str, ...]:
+    """Formats we can serve, best first; without Pillow only the original JPEG."""
+    if Image is None:
+        return ("jpg",)
+    extensions = Image.registered_extensions()
+    return tuple(fmt for fmt in ("avif", "webp") if f".{fmt}" in extensions) + ("jpg",)
+
+
+def photos_enabled() -> bool:
+    """Whether new photos can be fetched; upstreams without a ``configured`` check always can."""
+    upstream = import_string(settings.PHOTO_UPSTREAM)
+    return getattr(upstream, "configured", lambda: True)()
+
+
+def has_photo(listing) -> bool:
+    """Whether pages should link ``listing``'s photo rather than a URL that would 404."""
+    return bool(listing.photo_ref) and photos_enabled()
+
+
+def photo_url(listing, variant: str, width: Optional[int] = None, fmt: str = "jpg") -> str:
+    """Path of one size and format of ``listing``'s photo; the widest by default."""
+    widths, _ = VARIANTS[variant]
+    return reverse(
+        "listing_photo",
+        kwargs={
+            "slug": listing.slug,
+            "digest": photo_digest(listing.photo_ref),
+            "variant": variant,
+            "width": width or widths[-1],
+            "fmt": fmt,
+        },
+    )
+
+
+def photo_srcset(listing, variant: str, fmt: str = "jpg") -> str:
+    widths, _ = VARIANTS[variant]
+    return ", ".join(f"{photo_url(listing, variant, width, fmt)} {width}w" for width in widths)
+
+
+def render_variant(source: bytes, variant: str, width: int, fmt: str) -> bytes:
+    """Crop and scale ``source`` to the variant's shape at ``width`` and encode it as ``fmt``."""
+    if Image is None:
+        return source
+    _, ratio = VARIANTS[variant]
+    with Image.open(BytesIO(source)) as original:
+        image = ImageOps.exif_transpose(original).convert("RGB")
+    image = ImageOps.fit(image, (width, round(width * ratio)), Image.Resampling.LANCZOS)
+    output = BytesIO()
+    image.save(output, **_SAVE_OPTIONS[fmt])
+    return output.getvalue()
+
+
+class PhotoStore:
+    """The on-disk photo cache: ``<root>/<digest>/source`` plus one file per variant."""
+
+    def __init__(self, root=None, upstream=None, max_bytes: Optional[int] = None):
+        self.root = Path(root or settings.PHOTO_CACHE_DIR)
+        self.upstream = upstream or import_string(settings.PHOTO_UPSTREAM)()
+        self.max_bytes = settings.PHOTO_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    def get(self, photo_ref: str, variant: str, width: int, fmt: str) -> bytes:
+        """The encoded variant, fetching and rendering it on first use."""
+        directory = self.root / photo_digest(photo_ref)
+        target = directory / f"{variant}-{width}.{fmt}"
+        data = self._read(target)
+        if data is None:
+            source = self._source(photo_ref, directory)
+            try:
+                data = render_variant(source, variant, width, fmt)
+            except (OSError, ValueError) as exc:
+                # Not an image after all; forget it and let the upstream be asked again later
+                (directory / SOURCE_NAME).unlink(missing_ok=True)
+                self._mark_unavailable(photo_ref)
+                raise PhotoUnavailable(str(exc)) from exc
+            self._write(target, data)
+        return data
+
+    def _source(self, photo_ref: str, directory: Path) -> bytes:
+        path = directory / SOURCE_NAME
+        data = self._read(path)
+        if data is not None:
+            return data
+        if cache.get(f"{FAILURE_CACHE_PREFIX}:{photo_digest(photo_ref)}"):
+            raise PhotoUnavailable("the upstream recently refused this photo")
+        try:
+            data = self.upstream.fetch(photo_ref, SOURCE_WIDTH)
+        except PhotoUnavailable:
+            self._mark_unavailable(photo_ref)
+            raise
+        self._write(path, data)
+        return data
+
+    def _mark_unavailable(self, photo_ref: str) -> None:
+        cache.set(f"{FAILURE_CACHE_PREFIX}:{photo_digest(photo_ref)}", True, FAILURE_TIMEOUT)
+
+    @staticmethod
+    def _read(path: Path) -> Optional[bytes]:
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        # The modification time doubles as the last-used time for eviction
+        os.utime(path)
+        return data
+
+    def _write(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write then rename, so concurrent readers never see a partial file
+        fd, temporary = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".tmp")
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(temporary, path)
+        self._grow(len(data))
+
+    def _size_key(self) -> str:
+        return f"{SIZE_CACHE_PREFIX}:{hashlib.sha256(str(self.root).encode()).hexdigest()[:16]}"
+
+    def _grow(self, size: int) -> None:
+        # Scan the directory only when the running total passes the cap, or
+        # when this cache has no total yet
+        if not self.max_bytes:
+            return
+        try:
+            total = cache.incr(self._size_key(), size)
+        except ValueError:
+            total = None
+        if total is None or total > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used files until the cache fits ``max_bytes``."""
+        if not self.max_bytes:
+            return
+        files = []
+        for path in self.root.glob("*/*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            try:
+                path.parent.rmdir()
+            except OSError:
+                pass
+        cache.set(self._size_key(), total, None)
+
+
+def get_photo_store() -> PhotoStore:
+    return PhotoStore()
@@ -0,0 +1,173 @@
+"""Static pre-rendering of the public pages for nginx to serve directly.
+
+Each page is rendered through the normal request/response stack, so the files
+match what the live views return byte for byte. A manifest in the output
+directory records, per page, a fingerprint of its inputs (listing and post
+``updated_at`` values, group totals and the templates) and the hash of the
+written body; later builds only render pages whose fingerprint moved and only
+rewrite files whose content actually changed.
+"""
+import hashlib
+import json
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import django
+from django.db import connections
+from django.db.models import Count, Max
+from django.test import Client
+from django.urls import reverse
+from django.utils.text import slugify
+
+from blog.models import Post
+
+from .conditional import template_digest
+from .models import County, Listing, RelatedListing
+from .niche_config import DOMAIN
+from .page_cache import compress_variants
+
+MANIFEST_NAME = ".prerender-manifest.json"
+RENDER_CHUNK_SIZE = 50
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def _group_stats(rows: Iterable[Tuple], key_index: int) -> Dict:
+    # (count, latest updated_at) per group; adding, removing, moving or
+    # editing a listing always changes one of the two
+    stats: Dict = defaultdict(lambda: [0, None])
+    for row in rows:
+        entry = stats[row[key_index]]
+        entry[0] += 1
+        entry[1] = row[-1] if entry[1] is None else max(entry[1], row[-1])
+    return stats
+
+
+def page_fingerprints(min_listings: int = 1) -> Dict[str, str]:
+    """Map every pre-renderable path to a digest of the data it is rendered from."""
+    templates = template_digest()
+    rows = list(Listing.objects.filter(is_active=True).values_list("id", "slug", "county", "updated_at"))
+    by_county_slug = _group_stats([(slugify(county or ""), updated_at) for _, _, county, updated_at in rows], 0)
+    overall = _group_stats([(None, updated_at) for *_, updated_at in rows], 0)[None]
+    # Landing pages show every county's total in the county filter
+    county_counts = _digest(sorted((key, value[0]) for key, value in by_county_slug.items()))
+
+    pages = {reverse("home"): _digest(templates, overall)}
+    for county in County.objects.filter(listings_count__gte=min_listings).values_list("slug", flat=True):
+        path = reverse("pseo_landing", kwargs={"county": county})
+        pages[path] = _digest(templates, by_county_slug[county], county_counts)
+    related = defaultdict(list)
+    for listing_id, related_id, updated_at in RelatedListing.objects.values_list(
+        "listing_id", "related_id", "related__updated_at"
+    ):
+        related[listing_id].append((related_id, updated_at))
+    for listing_id, slug, _, updated_at in rows:
+        path = reverse("listing_detail", kwargs={"slug": slug})
+        pages[path] = _digest(templates, updated_at, related[listing_id])
+
+    posts = Post.objects.filter(is_published=True)
+    blog = posts.aggregate(count=Count("id"), latest=Max("updated_at"))
+    pages[reverse("post_list")] = _digest(templates, blog["count"], blog["latest"])
+    for slug, updated_at in posts.values_list("slug", "updated_at"):
+        pages[reverse("post_detail", kwargs={"slug": slug})] = _digest(templates, updated_at)
+    return pages
+
+
+def render_paths(paths: List[str]) -> List[Tuple[str, int, bytes]]:
+    """Render ``paths`` through the full middleware stack, as an anonymous visitor."""
+    client = Client(HTTP_HOST=DOMAIN, raise_request_exception=False)
+    results = []
+    for path in paths:
+        response = client.get(path)
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        results.append((path, response.status_code, body))
+    return results
+
+
+def output_file(output_dir: Path, path: str) -> Path:
+    # "/cork/" -> <output>/cork/index.html, for nginx's try_files $uri/index.html
+    return output_dir.joinpath(*[part for part in path.split("/") if part], "index.html")
+
+
+def _write_atomic(path: Path, content: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(content)
+    os.replace(tmp, path)
+
+
+def _remove_page(output_dir: Path, path: str) -> None:
+    html = output_file(output_dir, path)
+    for suffix in ("", ".gz", ".br"):
+        Path(f"{html}{suffix}").unlink(missing_ok=True)
+
+
+def _write_page(output_dir: Path, path: str, body: bytes) -> None:
+    html = output_file(output_dir, path)
+    _write_atomic(html, body)
+    variants = compress_variants(body)
+    _write_atomic(Path(f"{html}.gz"), variants["gzip"])
+    if variants["br"] is not None:
+        _write_atomic(Path(f"{html}.br"), variants["br"])
+
+
+def _render(paths: List[str], workers: int) -> Iterable[Tuple[str, int, bytes]]:
+    chunks = [paths[start:start + RENDER_CHUNK_SIZE] for start in range(0, len(paths), RENDER_CHUNK_SIZE)]
+    if workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield from render_paths(chunk)
+        return
+    # Forked workers must not share the parent's database connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        for results in pool.map(render_paths, chunks):
+            yield from results
+
+
+def prerender_site(
+    output_dir, workers: int = 1, force: bool = False, min_listings: int = 1
+) -> Dict[str, int]:
+    """Bring ``output_dir`` up to date and return counts of what was done."""
+    output_dir = Path(output_dir)
+    manifest_path = output_dir / MANIFEST_NAME
+    manifest: Dict[str, Dict[str, str]] = {}
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text())
+
+    pages = page_fingerprints(min_listings)
+    stale = sorted(
+        path
+        for path, inputs in pages.items()
+        if force
+        or manifest.get(path, {}).get("inputs") != inputs
+        or not output_file(output_dir, path).exists()
+    )
+
+    stats = {"pages": len(pages), "rendered": 0, "written": 0, "removed": 0, "failed": 0}
+    for path, status, body in _render(stale, workers):
+        stats["rendered"] += 1
+        if status != 200:
+            # Leave it to the live site, which will 404 or report the error
+            stats["failed"] += 1
+            _remove_page(output_dir, path)
+            manifest.pop(path, None)
+            continue
+        content_hash = hashlib.sha256(body).hexdigest()
+        if manifest.get(path, {}).get("sha256") != content_hash or not output_file(output_dir, path).exists():
+            _write_page(output_dir, path, body)
+            stats["written"] += 1
+        manifest[path] = {"inputs": pages[path], "sha256": content_hash}
+
+    for path in set(manifest) - set(pages):
+        _remove_page(output_dir, path)
+        del manifest[path]
+        stats["removed"] += 1
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    _write_atomic(manifest_path, json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return stats
@@ -0,0 +1,272 @@
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Max, Q
+from django.db.models.functions import Lower, Trim
+
+from .geo import GeoGridIndex, bounding_box, haversine_km
+from .geo_batch import nearest_neighbours
+from .models import ATTRIBUTE_FILTERS, Listing, RelatedListing
+from .page_cache import listing_tag, purge_page_tags
+
+
+RELATED_LISTINGS_COUNT = 4
+# Nearest neighbours considered per listing before re-ranking on shared amenities
+CANDIDATE_FACTOR = 3
+CANDIDATE_COUNT = RELATED_LISTINGS_COUNT * CANDIDATE_FACTOR
+# Each shared amenity ranks a neighbour as if it were 10% closer
+ATTRIBUTE_BOOST = 0.1
+# Furthest a boosted neighbour can be, relative to the plain k-th nearest
+BOOST_REACH = 1 + ATTRIBUTE_BOOST * len(ATTRIBUTE_FILTERS)
+# Listings loaded around a change, as a multiple of that reach
+LOAD_FACTOR = 3
+
+_NOT_SHARED = {"", "no", "false", "not listed"}
+_FIELDS = ("id", "name", "county", "city", "latitude", "longitude", "attributes", "is_featured", "rating")
+
+Pick = Tuple[int, Optional[float]]
+
+
+def _group_key(value: Optional[str]) -> str:
+    return (value or "").strip().lower()
+
+
+def _shared_attributes(first: Dict, second: Dict) -> int:
+    shared = 0
+    for definition in ATTRIBUTE_FILTERS:
+        value = str(first.get(definition["key"], "")).strip().lower()
+        if value not in _NOT_SHARED and value == str(second.get(definition["key"], "")).strip().lower():
+            shared += 1
+    return shared
+
+
+def _is_mapped(row: Dict) -> bool:
+    return row["latitude"] is not None and row["longitude"] is not None
+
+
+class _Neighbourhood:
+    """Active listings loaded once for a batch of related-listing computations."""
+
+    def __init__(self, rows: Optional[Iterable[Dict]] = None):
+        if rows is None:
+            rows = Listing.objects.filter(is_active=True).values(*_FIELDS)
+        self.listings = {row["id"]: row for row in rows}
+        self.points = [(row["id"], row["latitude"], row["longitude"]) for row in self.listings.values() if _is_mapped(row)]
+        self.index = GeoGridIndex(self.points)
+        # Best first, for listings that can't be placed on the map
+        self.by_county: Dict[str, List[int]] = defaultdict(list)
+        self.by_city: Dict[str, List[int]] = defaultdict(list)
+        ranked = sorted(
+            self.listings.values(),
+            key=lambda row: (not row["is_featured"], -(row["rating"] or 0), row["name"], row["id"]),
+        )
+        for row in ranked:
+            self.by_county[_group_key(row["county"])].append(row["id"])
+            self.by_city[_group_key(row["city"])].append(row["id"])
+
+    def related(self, listing_id: int, candidates: Optional[List[Tuple[float, int]]] = None) -> List[Pick]:
+        """Pick the related listings, optionally from precomputed nearest ``candidates``."""
+        row = self.listings[listing_id]
+        picks: List[Pick] = []
+        if _is_mapped(row):
+            if candidates is None:
+                candidates = self.index.nearest(row["latitude"], row["longitude"], CANDIDATE_COUNT + 1)
+            ranked = []
+            for distance, other in candidates:
+                if other != listing_id:
+                    shared = _shared_attributes(row["attributes"], self.listings[other]["attributes"])
+                    ranked.append((distance / (1 + ATTRIBUTE_BOOST * shared), distance, other))
+            ranked.sort()
+            picks = [(other, round(distance, 3)) for _, distance, other in ranked[:RELATED_LISTINGS_COUNT]]
+
+        # Too few mapped neighbours: fill up from the same county, then city
+        chosen = {other for other, _ in picks} | {listing_id}
+        for groups, place in ((self.by_county, row["county"]), (self.by_city, row["city"])):
+            for other in groups.get(_group_key(place), ()) if _group_key(place) else ():
+                if len(picks) >= RELATED_LISTINGS_COUNT:
+                    return picks
+                if other not in chosen:
+                    picks.append((other, None))
+                    chosen.add(other)
+        return picks
+
+
+def _links(listing_id: int, picks: List[Pick]) -> List[RelatedListing]:
+    return [
+        RelatedListing(listing_id=listing_id, related_id=other, position=position, distance_km=distance)
+        for position, (other, distance) in enumerate(picks)
+    ]
+
+
+def rebuild_related_listings() -> int:
+    """Recompute every active listing's related listings; returns the number of links."""
+    neighbourhood = _Neighbourhood()
+    # All mapped listings against each other in one batch
+    nearest = nearest_neighbours(neighbourhood.points, neighbourhood.points, CANDIDATE_COUNT, exclude_self=True)
+    links = []
+    for listing_id in neighbourhood.listings:
+        links.extend(_links(listing_id, neighbourhood.related(listing_id, nearest.get(listing_id))))
+    with transaction.atomic():
+        RelatedListing.objects.all().delete()
+        RelatedListing.objects.bulk_create(links, batch_size=1000)
+    return len(links)
+
+
+class ListingChange(NamedTuple):
+    """A listing that was added, moved, (de)activated or deleted."""
+
+    listing_id: int
+    # Where it is now and where it was, and its current and previous county and city
+    points: Tuple[Tuple[float, float], ...]
+    places: Tuple[Optional[str], ...]
+
+
+def _active_rows(condition: Q, fields: Iterable[str] = _FIELDS, **annotations) -> List[Dict]:
+    return list(
+        Listing.objects.annotate(county_key=Lower(Trim("county")), city_key=Lower(Trim("city")), **annotations)
+        .filter(condition, is_active=True)
+        .values(*fields)
+    )
+
+
+def _near(points: Iterable[Tuple[float, float]], radius_km: float) -> Q:
+    condition = Q(pk__in=[])
+    for lat, lng in points:
+        min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+        condition |= Q(latitude__range=(min_lat, max_lat), longitude__range=(min_lng, max_lng))
+    return condition
+
+
+def _in_groups(groups: Set[str]) -> Q:
+    return Q(county_key__in=groups) | Q(city_key__in=groups)
+
+
+def _area(points: Iterable[Tuple[float, float]], radius_km: float) -> Optional[Tuple[float, float, float, float]]:
+    boxes = [bounding_box(lat, lng, radius_km) for lat, lng in points]
+    if not boxes:
+        return None
+    return (
+        min(box[0] for box in boxes), max(box[1] for box in boxes),
+        min(box[2] for box in boxes), max(box[3] for box in boxes),
+    )
+
+
+def _covered(neighbourhood: _Neighbourhood, listing_id: int, area) -> bool:
+    # A mapped listing's nearest neighbours are exact when their whole circle lies in the loaded area
+    row = neighbourhood.listings.get(listing_id)
+    if row is None or not _is_mapped(row):
+        return True
+    nearest = neighbourhood.index.nearest(row["latitude"], row["longitude"], CANDIDATE_COUNT + 1)
+    if len(nearest) <= CANDIDATE_COUNT or area is None:
+        return False
+    min_lat, max_lat, min_lng, max_lng = bounding_box(row["latitude"], row["longitude"], nearest[-1][0])
+    return area[0] <= min_lat and max_lat <= area[1] and area[2] <= min_lng and max_lng <= area[3]
+
+
+def refresh_related_listings(changes: Sequence[ListingChange]) -> List[int]:
+    """Update related listings after ``changes``; returns the ids of listings whose list changed.
+
+    Only the listings around the changes are loaded; when they can't be shown
+    to give the same answer as a full rebuild every active listing is loaded.
+    """
+    changed_ids = {change.listing_id for change in changes}
+    points = {point for change in changes for point in change.points}
+    places = {_group_key(place) for change in changes for place in change.places} - {""}
+    farthest = RelatedListing.objects.aggregate(farthest=Max("distance_km"))["farthest"] or 0
+
+    # Listings whose related list the changes may have entered or left: those
+    # linking to them, those in their places or within their own reach of them,
+    # and short lists, which take whatever is nearest however far away
+    linked = set(RelatedListing.objects.filter(related_id__in=changed_ids).values_list("listing_id", flat=True))
+    full = RelatedListing.objects.filter(position=RELATED_LISTINGS_COUNT - 1).values("listing_id")
+    short = set(Listing.objects.filter(is_active=True).exclude(id__in=full).values_list("id", flat=True))
+    candidates = changed_ids | linked | short
+    groups = set(places)
+    mapped: List[Tuple[float, float]] = []
+    reach = 0.0
+    for row in _active_rows(
+        _near(points, farthest * BOOST_REACH) | _in_groups(places) | Q(id__in=candidates),
+        ("id", "latitude", "longitude", "county_key", "city_key", "reach"),
+        reach=Max("related_links__distance_km"),
+    ):
+        own_reach = (row["reach"] or 0) * BOOST_REACH
+        if (
+            row["id"] in candidates
+            or row["county_key"] in places
+            or row["city_key"] in places
+            or _is_mapped(row)
+            and any(haversine_km(row["latitude"], row["longitude"], lat, lng) <= own_reach for lat, lng in points)
+        ):
+            candidates.add(row["id"])
+            groups.update({row["county_key"], row["city_key"]} - {""})
+            if _is_mapped(row):
+                mapped.append((row["latitude"], row["longitude"]))
+                reach = max(reach, own_reach)
+
+    area = _area([*points, *mapped], reach * LOAD_FACTOR)
+    nearby = Q(latitude__range=area[:2], longitude__range=area[2:]) if area else Q(pk__in=[])
+    neighbourhood = _Neighbourhood(_active_rows(nearby | _in_groups(groups) | Q(id__in=candidates)))
+    if not all(_covered(neighbourhood, listing_id, area) for listing_id in candidates):
+        neighbourhood = _Neighbourhood()
+
+    current: Dict[int, List[Pick]] = defaultdict(list)
+    for listing_id, other, distance in RelatedListing.objects.filter(listing_id__in=candidates).values_list(
+        "listing_id", "related_id", "distance_km"
+    ):
+        current[listing_id].append((other, distance))
+
+    # Inactive and deleted listings keep no links
+    updated = {
+        listing_id: neighbourhood.related(listing_id) if listing_id in neighbourhood.listings else []
+        for listing_id in candidates
+    }
+    changed = sorted(listing_id for listing_id, picks in updated.items() if picks != current[listing_id])
+    if changed:
+        with transaction.atomic():
+            RelatedListing.objects.filter(listing_id__in=changed).delete()
+            RelatedListing.objects.bulk_create(
+                [link for listing_id in changed for link in _links(listing_id, updated[listing_id])]
+            )
+    return changed
+
+
+_pending = threading.local()
+
+
+def _refresh_pending() -> None:
+    changes, _pending.changes = getattr(_pending, "changes", []), []
+    if changes:
+        changed = refresh_related_listings(changes)
+        purge_page_tags(listing_tag(listing_id) for listing_id in changed)
+
+
+def schedule_related_refresh(change: ListingChange) -> None:
+    """Refresh related listings around ``change`` once the transaction commits.
+
+    Every change made in one transaction is refreshed in a single batch; inside
+    ``related_listings_rebuilt_afterwards`` nothing is refreshed until the end.
+    """
+    if getattr(_pending, "deferred", 0):
+        return
+    if not hasattr(_pending, "changes"):
+        _pending.changes = []
+    # Left-over changes of a rolled back transaction are harmless: the refresh
+    # reads the committed rows
+    _pending.changes.append(change)
+    transaction.on_commit(_refresh_pending)
+
+
+@contextmanager
+def related_listings_rebuilt_afterwards():
+    """Skip per-listing refreshes inside the block and rebuild every list once at the end; for imports."""
+    _pending.deferred = getattr(_pending, "deferred", 0) + 1
+    try:
+        yield
+    finally:
+        _pending.deferred -= 1
+        if not _pending.deferred:
+            rebuild_related_listings()
+            purge_page_tags(listing_tag(listing_id) for listing_id in Listing.objects.values_list("id", flat=True))
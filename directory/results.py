@@ -0,0 +1,62 @@
+from typing import Any, Dict, Iterator, List, Sequence, Union, overload
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import QuerySet
+
+from .generation import get_listing_generation
+from .models import LISTING_CARD_FIELDS, Listing
+from .utils import filter_state_key
+
+
+RESULT_CACHE_PREFIX = "directory:results"
+FETCH_CHUNK_SIZE = 500
+
+
+class CachedListingResults(Sequence):
+    """Ordered listing ids from the result cache, loaded as listings on access.
+
+    Slicing fetches only the requested rows, so a page costs one primary-key
+    lookup however long the full result is.
+    """
+
+    def __init__(self, ids: List[int]):
+        self.ids = ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _fetch(self, ids: List[int]) -> List[Listing]:
+        # Rows deleted since the ids were cached are skipped.
+        listings = Listing.objects.only(*LISTING_CARD_FIELDS).in_bulk(ids)
+        return [listings[listing_id] for listing_id in ids if listing_id in listings]
+
+    @overload
+    def __getitem__(self, index: int) -> Listing: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Listing]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Listing, List[Listing]]:
+        if isinstance(index, slice):
+            return self._fetch(self.ids[index])
+        return self._fetch([self.ids[index]])[0]
+
+    def __iter__(self) -> Iterator[Listing]:
+        for start in range(0, len(self.ids), FETCH_CHUNK_SIZE):
+            yield from self._fetch(self.ids[start:start + FETCH_CHUNK_SIZE])
+
+
+def cached_listing_results(queryset: QuerySet[Listing], cache_state: Dict[str, Any]) -> CachedListingResults:
+    """Return the ids of ``queryset`` from the result cache, running it on a miss.
+
+    ``cache_state`` must fully describe the query (normalised filters and
+    ordering). Entries are keyed on the listing generation, so any listing
+    save or delete invalidates them all at once.
+    """
+    cache_key = f"{RESULT_CACHE_PREFIX}:{get_listing_generation()}:{filter_state_key(cache_state)}"
+    ids = cache.get(cache_key)
+    if ids is None:
+        ids = list(queryset.values_list("id", flat=True))
+        cache.set(cache_key, ids, getattr(settings, "LISTING_RESULT_CACHE_TIMEOUT", 0))
+    return CachedListingResults(ids)
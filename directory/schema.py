@@ -1,39 +1,14 @@
-import re
+import json
 
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils.text import slugify
 
 from directory.niche_config import SITE_NAME, DOMAIN
+from directory.opening_hours import DAYS, format_minutes, parse_opening_hours
+from directory.photos import has_photo, photo_url
 
-
-def _normalize_time_token(token: str) -> str | None:
-    token = token.strip().lower()
-    match = re.match(r"^(\d{1,2})(?::(\d{2}))?\s*(am|pm)$", token)
-    if not match:
-        return None
-    hour = int(match.group(1))
-    minute = int(match.group(2) or "00")
-    meridiem = match.group(3)
-
-    if hour < 1 or hour > 12 or minute > 59:
-        return None
-
-    if meridiem == "am":
-        hour = 0 if hour == 12 else hour
-    else:
-        hour = 12 if hour == 12 else hour + 12
-
-    return f"{hour:02d}:{minute:02d}"
-
-
-def _normalize_time_range(range_text: str) -> tuple[str, str] | None:
-    if "-" not in range_text:
-        return None
-    start_raw, end_raw = [part.strip() for part in range_text.split("-", 1)]
-    start = _normalize_time_token(start_raw)
-    end = _normalize_time_token(end_raw)
-    if not start or not end:
-        return None
-    return start, end
+# Escapes that keep serialised JSON inert inside a <script> element
+_SCRIPT_ESCAPES = {ord("<"): "\\u003C", ord(">"): "\\u003E", ord("&"): "\\u0026"}
 
 
 def generate_listing_schema(listing):
@@ -42,8 +17,10 @@ def generate_listing_schema(listing):
         "@context": "https://schema.org",
         "@type": "LocalBusiness",
         "name": listing.name,
-        "description": listing.description,
+        "description": listing.description
+        or f"Visit {listing.name} for an authentic sauna experience in {listing.county or listing.city}",
         "url": f"https://{DOMAIN}/listing/{listing.slug}/",
+        "priceRange": "$$",
     }
 
     # Add address if we have city info
@@ -66,6 +43,9 @@ def generate_listing_schema(listing):
             "longitude": listing.longitude
         }
     
+    if has_photo(listing):
+        schema["image"] = f"https://{DOMAIN}{photo_url(listing, 'og')}"
+
     # Add contact information
     if listing.phone:
         schema["telephone"] = listing.phone
@@ -81,44 +61,28 @@ def generate_listing_schema(listing):
             "reviewCount": str(listing.reviews_count or 1)
         }
     
-    # Add opening hours if available
-    if opening_hours := listing.attributes.get("opening_hours"):
-        # Parse opening_hours format (e.g., "Monday: 9am-5pm|Tuesday: 9am-5pm")
-        hours_list = []
-        days_map = {
-            "monday": "Monday",
-            "tuesday": "Tuesday", 
-            "wednesday": "Wednesday",
-            "thursday": "Thursday",
-            "friday": "Friday",
-            "saturday": "Saturday",
-            "sunday": "Sunday"
+    # Add opening hours if available (e.g. "Monday: 10:00 AM – 4:00 PM|Tuesday: Closed")
+    hours_list = [
+        {
+            "@type": "OpeningHoursSpecification",
+            "dayOfWeek": DAYS[day].title(),
+            "opens": format_minutes(opens),
+            "closes": format_minutes(closes),
         }
-        
-        for day_hours in opening_hours.split("|"):
-            if ":" in day_hours:
-                day_part, hours_part = day_hours.split(":", 1)
-                day_clean = day_part.strip().lower()
-                hours_clean = hours_part.strip()
-                
-                if day_clean in days_map and hours_clean.lower() != "closed":
-                    normalized = _normalize_time_range(hours_clean)
-                    if not normalized:
-                        continue
-                    opens, closes = normalized
-                    hours_list.append({
-                        "@type": "OpeningHoursSpecification",
-                        "dayOfWeek": days_map[day_clean],
-                        "opens": opens,
-                        "closes": closes,
-                    })
-        
-        if hours_list:
-            schema["openingHoursSpecification"] = hours_list
+        for day, opens, closes in parse_opening_hours(listing.attributes.get("opening_hours"))
+    ]
+    if hours_list:
+        schema["openingHoursSpecification"] = hours_list
 
     return schema
 
 
+def listing_schema_json(listing) -> str:
+    """Serialise the listing's JSON-LD once, ready to drop into a <script> element."""
+    payload = json.dumps(generate_listing_schema(listing), cls=DjangoJSONEncoder, ensure_ascii=False)
+    return payload.translate(_SCRIPT_ESCAPES)
+
+
 def generate_breadcrumb_schema(county, site_name, county_slug=None):
     """Generate Schema.org BreadcrumbList for county pSEO pages."""
     slug = county_slug or slugify(county)
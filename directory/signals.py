@@ -0,0 +1,88 @@
+import copy
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .counties import refresh_county_summaries
+from .generation import bump_listing_generation
+from .models import Listing
+from .page_cache import COUNTY_COUNTS_TAG, listing_page_tags, purge_page_tags
+from .related import ListingChange, schedule_related_refresh
+
+
+@receiver(post_save, sender=Listing)
+@receiver(post_delete, sender=Listing)
+def listing_changed(sender, instance, **kwargs):
+    # Bump now so nothing cached from this connection's uncommitted view is
+    # reused, and again once other connections can see the change so anything
+    # cached from the pre-commit rows in between is dropped too.
+    bump_listing_generation()
+    transaction.on_commit(bump_listing_generation)
+
+
+# Fields whose changes move a listing in or out of other listings' pages
+_PLACEMENT_FIELDS = ("county", "city", "latitude", "longitude", "is_active")
+# And those related listings are ranked by
+_RANKING_FIELDS = ("attributes", "is_featured", "rating", "name")
+
+
+def _remember_loaded_values(instance):
+    # Needed to refresh or purge the old county's pages when a listing moves;
+    # read from __dict__ so deferred loads don't trigger a query. attributes is
+    # copied since it can be edited in place.
+    instance._loaded = {
+        field: copy.deepcopy(instance.__dict__.get(field)) for field in _PLACEMENT_FIELDS + _RANKING_FIELDS
+    }
+
+
+def _loaded(instance, field):
+    return getattr(instance, "_loaded", {}).get(field)
+
+
+@receiver(post_init, sender=Listing)
+def remember_county(sender, instance, **kwargs):
+    _remember_loaded_values(instance)
+
+
+@receiver(post_save, sender=Listing)
+@receiver(post_delete, sender=Listing)
+def purge_listing_pages(sender, instance, created=False, **kwargs):
+    old_county = _loaded(instance, "county")
+    tags = listing_page_tags(instance.pk, old_county) | listing_page_tags(instance.pk, instance.county)
+    # Per-county totals only move when a listing appears, disappears or moves
+    if (
+        created
+        or kwargs.get("signal") is post_delete
+        or old_county != instance.county
+        or _loaded(instance, "is_active") != instance.is_active
+    ):
+        tags.add(COUNTY_COUNTS_TAG)
+    purge_page_tags(tags)
+    transaction.on_commit(lambda: purge_page_tags(tags))
+
+
+@receiver(post_save, sender=Listing)
+@receiver(post_delete, sender=Listing)
+def update_related_listings(sender, instance, created=False, **kwargs):
+    moved = any(
+        _loaded(instance, field) != getattr(instance, field) for field in _PLACEMENT_FIELDS + _RANKING_FIELDS
+    )
+    if created or moved or kwargs.get("signal") is post_delete:
+        points = {
+            (latitude, longitude)
+            for latitude, longitude in (
+                (instance.latitude, instance.longitude),
+                (_loaded(instance, "latitude"), _loaded(instance, "longitude")),
+            )
+            if latitude is not None and longitude is not None
+        }
+        places = (instance.county, instance.city, _loaded(instance, "county"), _loaded(instance, "city"))
+        schedule_related_refresh(ListingChange(instance.pk, tuple(points), places))
+
+
+@receiver(post_save, sender=Listing)
+@receiver(post_delete, sender=Listing)
+def update_county_summary(sender, instance, **kwargs):
+    refresh_county_summaries([_loaded(instance, "county"), instance.county])
+    _remember_loaded_values(instance)
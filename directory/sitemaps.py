@@ -1,8 +1,6 @@
 from django.contrib.sitemaps import Sitemap
 from django.urls import reverse
-from django.db.models import Count
-from django.utils.text import slugify
-from .models import Listing
+from .models import County, Listing
 
 
 class LandingPageSitemap(Sitemap):
@@ -10,28 +8,13 @@ class LandingPageSitemap(Sitemap):
     priority = 0.8
 
     def items(self):
-        # Get all counties that have at least 2 listings
-        pages = (
-            Listing.objects.filter(is_active=True)
-            .exclude(county="")
-            .values("county")
-            .annotate(count=Count("id"))
-            .filter(count__gte=2)
-            .order_by("county")
-        )
-        
-        # Add homepage
-        return [{"county": None}] + list(pages)
+        # Homepage plus every county with at least 2 listings
+        return [None] + list(County.objects.filter(listings_count__gte=2).order_by("name"))
 
     def location(self, item):
-        if item["county"] is None:
+        if item is None:
             return reverse("home")
-        return reverse(
-            "pseo_landing",
-            kwargs={
-                "county": slugify(item["county"]),
-            },
-        )
+        return reverse("pseo_landing", kwargs={"county": item.slug})
 
 
 class ListingSitemap(Sitemap):
@@ -39,7 +22,7 @@ class ListingSitemap(Sitemap):
     priority = 0.7
 
     def items(self):
-        return Listing.objects.filter(is_active=True).order_by("-updated_at")
+        return Listing.objects.filter(is_active=True).only("slug", "updated_at").order_by("-updated_at")
 
     def lastmod(self, obj):
         return obj.updated_at
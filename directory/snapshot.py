@@ -0,0 +1,291 @@
+import copy
+import json
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .geo import GeoGridIndex
+from .generation import get_listing_generation
+from .models import LISTING_CARD_FIELDS, Listing
+from .niche_config import FILTERS
+from .opening_hours import OpeningIndex
+from .utils import SORT_ORDERINGS
+
+
+# Set bit offsets for every byte value, used to decode result bitmaps quickly.
+_BYTE_BITS = tuple(tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256))
+
+
+def _mask(positions: Iterable[int]) -> int:
+    mask = 0
+    for position in positions:
+        mask |= 1 << position
+    return mask
+
+
+def _bit_positions(mask: int) -> List[int]:
+    positions: List[int] = []
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    for byte_index, byte in enumerate(data):
+        if byte:
+            base = byte_index * 8
+            positions.extend(base + bit for bit in _BYTE_BITS[byte])
+    return positions
+
+
+def _fold(value: Any) -> Optional[str]:
+    # Mirror Postgres `UPPER(attributes ->> key)` used by the iexact lookups.
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value.upper()
+    return json.dumps(value).upper()
+
+
+def _ordering_expressions(ordering: Tuple[str, ...]) -> List[Any]:
+    return [F(field[1:]).desc() if field.startswith("-") else F(field).asc() for field in ordering]
+
+
+class ListingSnapshot:
+    """Immutable in-memory copy of the active listings with bitmap filter indexes.
+
+    Listing ``i`` of ``listings`` is the ``i``-th row of the default ordering and
+    owns bit ``i`` of every bitmap. The instances are shared between requests and
+    must be treated as read-only.
+    """
+
+    def __init__(self, generation: int = 0):
+        self.generation = generation
+        self.built_at = time.monotonic()
+
+        # Alternative sort orders are ranked by Postgres in the same query so
+        # collation and NULL ordering match the queryset path exactly.
+        rank_orders = {
+            sort_by: ordering
+            for sort_by, ordering in SORT_ORDERINGS.items()
+            if ordering != SORT_ORDERINGS["featured"]
+        }
+        queryset = (
+            Listing.objects.filter(is_active=True)
+            .only(*LISTING_CARD_FIELDS, "opening_intervals")
+            .annotate(**{
+                f"snapshot_rank_{sort_by}": Window(
+                    expression=RowNumber(),
+                    order_by=_ordering_expressions(ordering),
+                )
+                for sort_by, ordering in rank_orders.items()
+            })
+            .order_by(*SORT_ORDERINGS["featured"])
+        )
+        self.listings: Tuple[Listing, ...] = tuple(queryset)
+        self.ids = array("q", (listing.id for listing in self.listings))
+        self.all_mask = (1 << len(self.listings)) - 1
+
+        self.ranks: Dict[str, array] = {}
+        for sort_by in rank_orders:
+            attr = f"snapshot_rank_{sort_by}"
+            self.ranks[sort_by] = array("l", (getattr(listing, attr) for listing in self.listings))
+
+        self.geo = GeoGridIndex(
+            (index, listing.latitude, listing.longitude)
+            for index, listing in enumerate(self.listings)
+            if listing.latitude is not None and listing.longitude is not None
+        )
+
+        self.opening = OpeningIndex(
+            (index, listing.opening_intervals)
+            for index, listing in enumerate(self.listings)
+            if listing.opening_intervals
+        )
+
+        self.bitmaps: Dict[Tuple[str, Any], int] = {}
+        self.rating_values: List[Decimal] = []
+        self.rating_masks: List[int] = []
+        self._build_indexes()
+
+    def __len__(self) -> int:
+        return len(self.listings)
+
+    def _build_indexes(self) -> None:
+        buckets: Dict[Tuple[str, Any], List[int]] = {}
+
+        for definition in FILTERS:
+            key = definition.get("key")
+            if not key:
+                continue
+            filter_type = definition.get("type", "choice")
+            field_type = definition.get("field_type", "attribute")
+
+            for index, listing in enumerate(self.listings):
+                if field_type == "model":
+                    if key == "county":
+                        bucket = (key, _fold(listing.county))
+                    elif key == "has_website":
+                        bucket = (key, bool(listing.website))
+                    elif key == "has_phone":
+                        bucket = (key, bool(listing.phone))
+                    else:
+                        continue
+                else:
+                    value = (listing.attributes or {}).get(key)
+                    if filter_type == "boolean":
+                        if not isinstance(value, bool):
+                            continue
+                        bucket = (key, value)
+                    else:
+                        bucket = (key, _fold(value))
+                buckets.setdefault(bucket, []).append(index)
+
+        self.bitmaps = {bucket: _mask(positions) for bucket, positions in buckets.items()}
+
+        # Cumulative "rating >= value" masks over the distinct ratings, lowest first.
+        rated: Dict[Decimal, List[int]] = {}
+        for index, listing in enumerate(self.listings):
+            if listing.rating is not None:
+                rated.setdefault(Decimal(listing.rating), []).append(index)
+        self.rating_values = sorted(rated)
+        masks: List[int] = []
+        running = 0
+        for value in reversed(self.rating_values):
+            running |= _mask(rated[value])
+            masks.append(running)
+        self.rating_masks = masks[::-1]
+
+    def _rating_mask(self, min_rating: Decimal) -> int:
+        index = bisect_left(self.rating_values, min_rating)
+        if index >= len(self.rating_masks):
+            return 0
+        return self.rating_masks[index]
+
+    def _filter_masks(self, filter_state: Dict[str, Any]) -> Dict[str, int]:
+        # One bitmap per active filter; a listing matches when it is in all of them.
+        masks: Dict[str, int] = {}
+        for key, value in filter_state.items():
+            if key == "rating":
+                masks[key] = self._rating_mask(Listing._meta.get_field("rating").to_python(value))
+            elif key == "open_at":
+                masks[key] = self.opening.open_at(value)
+            elif isinstance(value, (bool, str)):
+                # county, has_website/has_phone and boolean attributes
+                masks[key] = self.bitmaps.get((key, value), 0)
+            else:
+                choice_mask = 0
+                for choice in value:
+                    choice_mask |= self.bitmaps.get((key, choice), 0)
+                masks[key] = choice_mask
+        return masks
+
+    def filter(
+        self,
+        filter_state: Dict[str, Any],
+        sort_by: str = "featured",
+        near: Optional[Tuple[float, float, float]] = None,
+    ) -> List[Listing]:
+        """Return listings matching ``filter_state`` in the same order as the queryset path.
+
+        ``filter_state`` comes from ``normalize_filter_params``. ``near`` is an
+        optional ``(lat, lng, distance_km)`` radius; matches are returned as
+        copies carrying a ``distance_km`` attribute.
+        """
+        mask = self.all_mask
+        for filter_mask in self._filter_masks(filter_state).values():
+            mask &= filter_mask
+
+        if near is not None:
+            return self._near(mask, sort_by, *near)
+
+        positions = _bit_positions(mask)
+        rank = self.ranks.get(sort_by)
+        if rank is not None:
+            positions.sort(key=rank.__getitem__)
+        return [self.listings[position] for position in positions]
+
+    def facet_counts(
+        self,
+        filter_state: Dict[str, Any],
+        facets: Dict[str, List[str]],
+        near: Optional[Tuple[float, float, float]] = None,
+    ) -> Dict[str, Dict[str, int]]:
+        """Count matches per choice of each facet, ignoring that facet's own selection."""
+        masks = self._filter_masks(filter_state)
+        within = self.all_mask
+        if near is not None:
+            within = 0
+            for _, position in self.geo.within(*near):
+                within |= 1 << position
+        counts: Dict[str, Dict[str, int]] = {}
+        for key, choices in facets.items():
+            base = within
+            for other_key, filter_mask in masks.items():
+                if other_key != key:
+                    base &= filter_mask
+            counts[key] = {
+                choice: (base & self.bitmaps.get((key, _fold(choice)), 0)).bit_count()
+                for choice in choices
+            }
+        return counts
+
+    def _near(self, mask: int, sort_by: str, lat: float, lng: float, distance_km: float) -> List[Listing]:
+        results: List[Listing] = []
+        for distance, position in self.geo.within(lat, lng, distance_km):
+            if not mask >> position & 1:
+                continue
+            listing = copy.copy(self.listings[position])
+            listing.distance = distance
+            listing.distance_km = round(distance, 1)
+            results.append(listing)
+
+        # Mirror NEAR_ME_ORDERINGS, including NULLS LAST for rating and reviews.
+        if sort_by == "rating":
+            results.sort(key=lambda item: (
+                not item.is_featured,
+                item.rating is None,
+                -(item.rating or 0),
+                item.reviews_count is None,
+                -(item.reviews_count or 0),
+                item.distance,
+                item.id,
+            ))
+        else:
+            results.sort(key=lambda item: (not item.is_featured, item.distance, item.id))
+        return results
+
+
+_snapshot: Optional[ListingSnapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+def _is_current(snapshot: Optional[ListingSnapshot], generation: int) -> bool:
+    if snapshot is None or snapshot.generation != generation:
+        return False
+    ttl = getattr(settings, "LISTING_SNAPSHOT_TTL", 300)
+    return time.monotonic() - snapshot.built_at < ttl
+
+
+def get_listing_snapshot() -> ListingSnapshot:
+    """Return this worker's snapshot, rebuilding it if the listings changed."""
+    global _snapshot
+    generation = get_listing_generation()
+    snapshot = _snapshot
+    if _is_current(snapshot, generation):
+        return snapshot
+
+    with _snapshot_lock:
+        snapshot = _snapshot
+        if not _is_current(snapshot, generation):
+            # Build fully before publishing so readers never see a partial snapshot.
+            snapshot = ListingSnapshot(generation)
+            _snapshot = snapshot
+    return snapshot
+
+
+def clear_listing_snapshot() -> None:
+    global _snapshot
+    _snapshot = None
@@ -0,0 +1,48 @@
+"""Streamed rendering of the listing pages.
+
+The page is rendered around a placeholder for the listing grid and everything
+before it (head, header and filter sidebar) is sent straight away, so the
+browser fetches CSS and scripts while the cards are read from the database
+and rendered a chunk at a time. The rest of the page follows the last card.
+"""
+from typing import Callable, Dict, Iterator, Optional
+
+from django.conf import settings
+from django.http import HttpRequest, StreamingHttpResponse
+from django.template.loader import render_to_string
+
+from .cards import CARDS_SLOT, render_listing_cards
+from .pagination import PageStream
+
+# Cards rendered (and rows fetched from the server-side cursor) per chunk
+STREAM_CHUNK_SIZE = 8
+
+
+def streaming_enabled(request: HttpRequest) -> bool:
+    # HTMX swaps are small partials; only full pages are streamed
+    is_htmx = request.headers.get("HX-Request", "false").lower() == "true"
+    return getattr(settings, "STREAMING_PAGES_ENABLED", False) and not is_htmx
+
+
+def stream_listing_page(
+    request: HttpRequest,
+    template_name: str,
+    context: Dict,
+    page: PageStream,
+    next_page_url: Callable[[Optional[str]], Optional[str]],
+) -> StreamingHttpResponse:
+    """Render ``template_name`` and stream the cards of ``page`` into its listing grid."""
+    html = render_to_string(template_name, {**context, "stream_cards": True}, request)
+    before, _, after = html.partition(CARDS_SLOT)
+
+    def content() -> Iterator[str]:
+        yield before
+        for chunk in page.chunks():
+            yield render_listing_cards(chunk)
+        yield render_to_string("partials/next_page.html", {"next_page_url": next_page_url(page.next_cursor)})
+        yield after
+
+    response = StreamingHttpResponse(content(), content_type="text/html; charset=utf-8")
+    # Ask nginx to pass chunks on as they come rather than buffer the response
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -0,0 +1,154 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.utils.text import slugify
+
+from .generation import get_listing_generation
+from .models import Listing
+from .niche_config import FILTERS
+
+
+SUGGEST_LIMIT = 8
+# Sorts after every character a label can continue a prefix with
+_PREFIX_END = chr(0x10FFFF)
+
+# Counties first, then towns, then individual saunas.
+KIND_ORDER = {"county": 0, "city": 1, "listing": 2}
+
+# (label, kind, url)
+Suggestion = Tuple[str, str, str]
+
+
+def normalize_prefix(value: Optional[str]) -> str:
+    return " ".join((value or "").split()).casefold()
+
+
+class SuggestIndex:
+    """Sorted array of every word-start suffix of the suggestion labels.
+
+    A prefix lookup binary-searches the range of matching suffixes, then
+    pulls the best-ranked ones out of it with a range-minimum table, so even
+    one-letter prefixes rank every match without scanning them all and no
+    database query is needed per keystroke.
+    """
+
+    def __init__(self, generation: int = 0):
+        self.generation = generation
+        self.built_at = time.monotonic()
+
+        suggestions: Dict[Suggestion, None] = {}
+        for definition in FILTERS:
+            if definition.get("key") == "county":
+                for county in definition.get("choices", []):
+                    suggestions[(county, "county", f"/{slugify(county)}/")] = None
+
+        rows = Listing.objects.filter(is_active=True).values_list("name", "slug", "city").order_by("name", "id")
+        for name, slug, city in rows:
+            if city:
+                suggestions[(city, "city", f"/?{urlencode({'q': city})}")] = None
+            suggestions[(name, "listing", f"/listing/{slug}/")] = None
+
+        self.suggestions: List[Suggestion] = list(suggestions)
+        entries: List[Tuple[str, int, int]] = []
+        for position, (label, _, _) in enumerate(self.suggestions):
+            folded = normalize_prefix(label)
+            offset = 0
+            for word in folded.split(" "):
+                # offset 0 marks a match at the start of the whole label
+                entries.append((folded[offset:], offset, position))
+                offset += len(word) + 1
+        entries.sort()
+        self.keys = [key for key, _, _ in entries]
+        positions = [position for _, _, position in entries]
+
+        # Whole-label matches first, then counties, towns and saunas, then by label
+        order = sorted(
+            range(len(entries)),
+            key=lambda index: (
+                entries[index][1] != 0,
+                KIND_ORDER[self.suggestions[entries[index][2]][1]],
+                self.suggestions[entries[index][2]][0].casefold(),
+                entries[index][2],
+            ),
+        )
+        self._by_rank = [positions[index] for index in order]
+        self._entry_at = order
+        ranks = [0] * len(entries)
+        for rank, index in enumerate(order):
+            ranks[index] = rank
+        # _best[level][i]: the best rank among entries[i:i + 2 ** level]
+        self._best = [ranks]
+        width = 1
+        while width * 2 <= len(entries):
+            previous = self._best[-1]
+            self._best.append(list(map(min, previous[:-width], previous[width:])))
+            width *= 2
+
+    def __len__(self) -> int:
+        return len(self.suggestions)
+
+    def _best_in(self, start: int, end: int) -> int:
+        level = (end - start).bit_length() - 1
+        return min(self._best[level][start], self._best[level][end - 2 ** level])
+
+    def lookup(self, prefix: str, limit: int = SUGGEST_LIMIT) -> List[Suggestion]:
+        prefix = normalize_prefix(prefix)
+        if not prefix:
+            return []
+
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + _PREFIX_END, start)
+        # Split the range around its best entry until enough labels are found;
+        # a label's first appearance is its best-ranked suffix
+        heap: List[Tuple[int, int, int]] = []
+
+        def push(start: int, end: int) -> None:
+            if start < end:
+                heapq.heappush(heap, (self._best_in(start, end), start, end))
+
+        push(start, end)
+        found: Dict[int, None] = {}
+        while heap and len(found) < limit:
+            rank, start, end = heapq.heappop(heap)
+            found.setdefault(self._by_rank[rank])
+            index = self._entry_at[rank]
+            push(start, index)
+            push(index + 1, end)
+        return [self.suggestions[position] for position in found]
+
+
+_index: Optional[SuggestIndex] = None
+_index_lock = threading.Lock()
+
+
+def _is_current(index: Optional[SuggestIndex], generation: int) -> bool:
+    if index is None or index.generation != generation:
+        return False
+    ttl = getattr(settings, "LISTING_SNAPSHOT_TTL", 300)
+    return time.monotonic() - index.built_at < ttl
+
+
+def get_suggest_index() -> SuggestIndex:
+    """Return this worker's suggestion index, rebuilding it if the listings changed."""
+    global _index
+    generation = get_listing_generation()
+    index = _index
+    if _is_current(index, generation):
+        return index
+
+    with _index_lock:
+        index = _index
+        if not _is_current(index, generation):
+            index = SuggestIndex(generation)
+            _index = index
+    return index
+
+
+def clear_suggest_index() -> None:
+    global _index
+    _index = None
@@ -0,0 +1,15 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from directory.cards import CARDS_SLOT, render_listing_cards
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def listing_cards(context, listings):
+    """Render the cards for ``listings`` from the card fragment cache"""
+    if context.get("stream_cards"):
+        # Streamed pages send their cards after the rest of the page is rendered
+        return mark_safe(CARDS_SLOT)
+    return render_listing_cards(listings)
@@ -0,0 +1,45 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from directory import photos
+from directory.photos import CONTENT_TYPES, available_formats
+
+register = template.Library()
+
+
+@register.filter
+def has_photo(listing):
+    """Whether ``listing``'s photo can be served"""
+    return photos.has_photo(listing)
+
+
+@register.simple_tag
+def photo_url(listing, variant, width=None, fmt="jpg"):
+    """URL of a cached size of ``listing``'s photo"""
+    return photos.photo_url(listing, variant, width, fmt)
+
+
+@register.simple_tag
+def photo_srcset(listing, variant, fmt="jpg"):
+    """srcset listing every width of ``variant``"""
+    return photos.photo_srcset(listing, variant, fmt)
+
+
+@register.simple_tag
+def photo_sources(listing, variant, sizes):
+    """<source> elements for the formats smaller than JPEG, best first"""
+    return format_html_join(
+        "",
+        '<source type="{}" srcset="{}" sizes="{}" />',
+        (
+            (CONTENT_TYPES[fmt], photos.photo_srcset(listing, variant, fmt), sizes)
+            for fmt in available_formats()
+            if fmt != "jpg"
+        ),
+    )
+
+
+@register.simple_tag
+def photo_absolute_url(listing, variant, domain):
+    """Absolute URL of the widest JPEG, for crawlers and link previews"""
+    return format_html("https://{}{}", domain, photos.photo_url(listing, variant))
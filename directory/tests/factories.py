@@ -0,0 +1,17 @@
+from directory.models import Listing
+
+
+def create_listing(**kwargs) -> Listing:
+    defaults = {
+        "name": "Test Sauna",
+        "slug": "test-sauna",
+        "city": "Dublin",
+        "county": "Dublin",
+        "description": "",
+        "address": "",
+        "website": "",
+        "phone": "",
+        "attributes": {},
+    }
+    defaults.update(kwargs)
+    return Listing.objects.create(**defaults)
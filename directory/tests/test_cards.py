@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from directory.cards import display_attributes, render_listing_cards
+from directory.tests.factories import create_listing
+
+
+class ListingCardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.listing = create_listing(
+            name="Harbour Sauna",
+            slug="harbour",
+            attributes={"heat_source": "wood", "cold_plunge": "yes", "opening_hours": "Monday: 9am-5pm"},
+        )
+
+    def test_display_attributes_follow_filters(self):
+        labels = [attribute["label"] for attribute in display_attributes(self.listing)]
+        self.assertEqual(labels, ["Heat Source", "Cold Plunge"])
+
+    def test_cards_are_cached_until_the_listing_changes(self):
+        first = render_listing_cards([self.listing])
+        self.assertIn("Harbour Sauna", first)
+        self.assertIn("wood", first)
+
+        with self.assertTemplateNotUsed("partials/listing_card.html"):
+            self.assertEqual(render_listing_cards([self.listing]), first)
+
+        self.listing.name = "Quay Sauna"
+        self.listing.save()
+        self.assertIn("Quay Sauna", render_listing_cards([self.listing]))
+
+    def test_distance_badge_is_per_request(self):
+        render_listing_cards([self.listing])
+        self.listing.distance_km = 4.2
+        with self.assertTemplateNotUsed("partials/listing_card.html"):
+            card = render_listing_cards([self.listing])
+        self.assertIn("· 4.2 km away", card)
+        del self.listing.distance_km
+        self.assertNotIn("km away", render_listing_cards([self.listing]))
+
+    @override_settings(LISTING_CARD_CACHE_TIMEOUT=0)
+    def test_cache_can_be_disabled(self):
+        render_listing_cards([self.listing])
+        with self.assertTemplateUsed("partials/listing_card.html"):
+            render_listing_cards([self.listing])
+
+    def test_home_page_renders_cards(self):
+        response = self.client.get(reverse("home"))
+        self.assertContains(response, "Harbour Sauna")
+        self.assertContains(response, "Cold Plunge")
@@ -0,0 +1,89 @@
+import random
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from directory.clusters import ClusterIndex, clear_cluster_indexes
+from directory.tests.factories import create_listing
+
+
+def _points(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        (index, f"Sauna {index}", f"sauna-{index}", "Cork", rng.uniform(51.4, 55.3), rng.uniform(-10.4, -5.5))
+        for index in range(count)
+    ]
+
+
+def _summary(index, zoom, bbox=None):
+    clusters, points = index.query(zoom, bbox)
+    return sorted((round(lat, 9), round(lng, 9), count) for lat, lng, count in clusters), points
+
+
+class ClusterIndexTests(SimpleTestCase):
+    def test_every_point_is_counted_once_per_zoom(self):
+        index = ClusterIndex(_points(300))
+        for zoom in range(0, 18):
+            with self.subTest(zoom=zoom):
+                clusters, points = index.query(zoom)
+                self.assertEqual(sum(count for _, _, count in clusters) + len(points), 300)
+
+        clusters, points = index.query(2)
+        self.assertLessEqual(len(clusters) + len(points), 4)
+        clusters, points = index.query(17)
+        self.assertEqual((len(clusters), len(points)), (0, 300))
+
+    def test_bbox_limits_results_to_the_viewport(self):
+        index = ClusterIndex(_points(300))
+        bbox = (-8.6, 51.8, -8.2, 52.0)
+        _, points = index.query(17, bbox)
+        expected = [point for point in _points(300) if 51.8 <= point[4] <= 52.0 and -8.6 <= point[5] <= -8.2]
+        self.assertTrue(expected)
+        self.assertTrue(set(expected) <= set(points))
+        self.assertLess(len(points), 300)
+
+    def test_incremental_sync_matches_full_build(self):
+        points = _points(200)
+        index = ClusterIndex(points)
+        # Drop 20 points, move one and add one.
+        changed = [point for point in points[20:] if point[0] != 25] + [
+            (25, "Moved", "moved", "Cork", 53.0, -6.5),
+            (5000, "New", "new", "Kerry", 52.1, -9.5),
+        ]
+        index.sync(changed)
+
+        rebuilt = ClusterIndex(changed)
+        for zoom in (0, 5, 9, 13, 16):
+            with self.subTest(zoom=zoom):
+                self.assertEqual(_summary(index, zoom), _summary(rebuilt, zoom))
+
+
+class ClusterEndpointTests(TestCase):
+    def setUp(self):
+        clear_cluster_indexes()
+        create_listing(name="Bay A", slug="bay-a", county="Cork", latitude=51.85, longitude=-8.29)
+        create_listing(name="Bay B", slug="bay-b", county="Cork", latitude=51.851, longitude=-8.291)
+        self.city = create_listing(name="City", slug="city", latitude=53.35, longitude=-6.26)
+
+    def test_clusters_for_zoom_and_bbox(self):
+        url = reverse("map_clusters")
+        data = self.client.get(url, {"zoom": "7"}).json()
+        self.assertEqual(data["clusters"]["count"], [2])
+        self.assertEqual(data["points"]["id"], [self.city.id])
+        self.assertEqual(data["bounds"], [51.85, -8.291, 53.35, -6.26])
+
+        data = self.client.get(url, {"zoom": "19", "bbox": "-8.3,51.8,-8.2,51.9"}).json()
+        self.assertEqual(data["clusters"]["count"], [])
+        self.assertEqual(data["points"]["name"], ["Bay A", "Bay B"])
+
+        data = self.client.get(url, {"zoom": "7", "county": "Dublin"}).json()
+        self.assertEqual(data["points"]["id"], [self.city.id])
+
+    def test_index_follows_listing_changes(self):
+        url = reverse("map_clusters")
+        self.assertEqual(self.client.get(url, {"zoom": "7"}).json()["clusters"]["count"], [2])
+        self.city.latitude, self.city.longitude = 51.852, -8.292
+        self.city.save()
+        data = self.client.get(url, {"zoom": "7"}).json()
+        self.assertEqual(data["clusters"]["count"], [3])
+        self.assertEqual(data["points"]["id"], [])
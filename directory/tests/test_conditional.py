@@ -0,0 +1,118 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from blog.models import Post
+from directory.models import Listing, RelatedListing
+from directory.related import rebuild_related_listings
+from directory.tests.factories import create_listing
+
+
+@override_settings(SHARED_CACHE=True, LISTING_RESULT_CACHE_TIMEOUT=300, FACET_CACHE_TIMEOUT=300)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.harbour = create_listing(name="Harbour Sauna", slug="harbour", latitude=53.34, longitude=-6.2)
+        self.pier = create_listing(name="Pier Sauna", slug="pier", latitude=53.29, longitude=-6.13)
+        rebuild_related_listings()
+
+    def _revalidate(self, url, response, **extra):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"], **extra)
+
+    def test_listing_page_revalidates_without_rendering(self):
+        url = reverse("listing_detail", kwargs={"slug": "harbour"})
+        response = self.client.get(url)
+        self.assertTrue(response["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", response)
+
+        with self.assertNumQueries(1), self.assertTemplateNotUsed("listing_detail.html"):
+            self.assertEqual(self._revalidate(url, response).status_code, 304)
+
+        # Editing a related listing changes the page that shows it
+        self.pier.rating = 4.5
+        self.pier.save()
+        self.assertEqual(self._revalidate(url, response).status_code, 200)
+
+    def test_listing_page_follows_changes_that_bypass_save(self):
+        url = reverse("listing_detail", kwargs={"slug": "harbour"})
+        response = self.client.get(url)
+
+        call_command("refresh_listing_fields", stdout=StringIO())
+        self.assertEqual(self._revalidate(url, response).status_code, 200)
+
+        # Same related listing at a different distance, with no generation to go on
+        cache.clear()
+        response = self.client.get(url)
+        RelatedListing.objects.filter(listing=self.harbour).update(distance_km=99)
+        self.assertEqual(self._revalidate(url, response).status_code, 200)
+
+    def test_listing_pages_have_their_own_versions(self):
+        first = self.client.get(reverse("listing_detail", kwargs={"slug": "harbour"}))
+        second = self.client.get(reverse("listing_detail", kwargs={"slug": "pier"}))
+        self.assertNotEqual(first["ETag"], second["ETag"])
+        self.assertEqual(self.client.get("/listing/missing/", HTTP_IF_NONE_MATCH="*").status_code, 404)
+
+    def test_home_revalidates_per_query(self):
+        url = reverse("home")
+        response = self.client.get(url, {"county": "Dublin"})
+        with self.assertNumQueries(0):
+            self.assertEqual(self._revalidate(url, response, data={"county": "Dublin"}).status_code, 304)
+        self.assertEqual(self._revalidate(url, response, data={"county": "Cork"}).status_code, 200)
+        self.assertEqual(self._revalidate(url, response, data={"county": "Dublin"}, HTTP_HX_REQUEST="true").status_code, 200)
+
+        create_listing(name="New Sauna", slug="new")
+        self.assertEqual(self._revalidate(url, response, data={"county": "Dublin"}).status_code, 200)
+
+    @mock.patch("directory.conditional._current_templates", return_value=("templates", None))
+    def test_deletion_moves_last_modified(self, templates):
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Listing.objects.update(updated_at=an_hour_ago)
+        cache.clear()
+        url = reverse("pseo_landing", kwargs={"county": "dublin"})
+        response = self.client.get(url)
+        self.assertEqual(response["Last-Modified"], http_date(an_hour_ago.timestamp()))
+        since = response["Last-Modified"]
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=since).status_code, 304)
+
+        # No remaining row records the deletion
+        Listing.objects.filter(pk=self.pier.pk).delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=since).status_code, 200)
+
+    def test_template_deploys_move_last_modified(self):
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Listing.objects.update(updated_at=an_hour_ago)
+        cache.clear()
+        url = reverse("pseo_landing", kwargs={"county": "dublin"})
+        deployed = timezone.now().replace(microsecond=0)
+        with mock.patch("directory.conditional._current_templates", return_value=("new", deployed)):
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(an_hour_ago.timestamp()))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Last-Modified"], http_date(deployed.timestamp()))
+
+    def test_open_now_pages_have_no_last_modified(self):
+        url = reverse("home")
+        response = self.client.get(url, {"open_now": "true"})
+        self.assertNotIn("Last-Modified", response)
+        since = http_date((timezone.now() + timedelta(days=1)).timestamp())
+        self.assertEqual(self.client.get(url, {"open_now": "true"}, HTTP_IF_MODIFIED_SINCE=since).status_code, 200)
+
+    def test_blog_pages(self):
+        post = Post.objects.create(title="Cold Plunges", content="Brr")
+        list_url = reverse("post_list")
+        detail_url = reverse("post_detail", kwargs={"slug": post.slug})
+        listing = self.client.get(list_url)
+        detail = self.client.get(detail_url)
+        self.assertEqual(self._revalidate(list_url, listing).status_code, 304)
+        self.assertEqual(self._revalidate(detail_url, detail).status_code, 304)
+
+        post.content = "Brrr"
+        post.save()
+        self.assertEqual(self._revalidate(list_url, listing).status_code, 200)
+        self.assertEqual(self._revalidate(detail_url, detail).status_code, 200)
@@ -0,0 +1,75 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from directory.counties import rebuild_county_summaries
+from directory.models import County
+from directory.tests.factories import create_listing
+
+
+class CountySummaryTests(TestCase):
+    def setUp(self):
+        self.bay = create_listing(
+            name="Bay", slug="bay", county="Cork", rating=Decimal("4.5"), latitude=51.8, longitude=-8.3
+        )
+        self.city = create_listing(
+            name="City", slug="city", county="cork", rating=Decimal("4.0"), latitude=51.9, longitude=-8.5
+        )
+        create_listing(name="Forest", slug="forest", county="Cork")
+
+    def test_summary_is_maintained_on_save_and_delete(self):
+        cork = County.objects.get(slug="cork")
+        self.assertEqual((cork.name, cork.listings_count, cork.average_rating), ("Cork", 3, Decimal("4.25")))
+        self.assertEqual((cork.min_latitude, cork.max_latitude), (51.8, 51.9))
+        self.assertEqual((cork.min_longitude, cork.max_longitude), (-8.5, -8.3))
+        self.assertAlmostEqual(cork.center_latitude, 51.85)
+
+        self.city.county = "Kerry"
+        self.city.save()
+        self.assertEqual(County.objects.get(slug="cork").listings_count, 2)
+        self.assertEqual(County.objects.get(slug="kerry").listings_count, 1)
+
+        self.city.is_active = False
+        self.city.save()
+        self.assertFalse(County.objects.filter(slug="kerry").exists())
+
+        self.bay.delete()
+        self.assertEqual(County.objects.get(slug="cork").average_rating, None)
+
+    def test_spellings_are_grouped_by_slug(self):
+        create_listing(name="Lough", slug="lough", county="Cork ")
+        create_listing(name="Ridge", slug="ridge", county="West-Cork")
+        create_listing(name="Glen", slug="glen", county="West Cork")
+        self.assertEqual(County.objects.get(slug="cork").listings_count, 4)
+        west = County.objects.get(slug="west-cork")
+        self.assertEqual(west.listings_count, 2)
+        self.assertEqual(west.name, "West Cork")
+
+    def test_rebuild_matches_incremental_summaries(self):
+        expected = list(County.objects.values_list("slug", "name", "listings_count", "average_rating"))
+        County.objects.all().delete()
+        County.objects.create(name="Stale", slug="stale", listings_count=9)
+        self.assertEqual(rebuild_county_summaries(), 1)
+        self.assertEqual(
+            list(County.objects.values_list("slug", "name", "listings_count", "average_rating")), expected
+        )
+
+    @override_settings(SHARED_CACHE=True, LISTING_RESULT_CACHE_TIMEOUT=300, FACET_CACHE_TIMEOUT=300)
+    def test_landing_page_needs_summary_and_listing_queries_only(self):
+        url = reverse("pseo_landing", kwargs={"county": "cork"})
+        self.client.get(url)  # warm the facet and result caches
+        # County summary, the page of card columns and the top listings' JSON-LD
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.context["county"], "Cork")
+        self.assertEqual(response.context["listings_count"], 3)
+
+    def test_sitemap_and_generate_pages_use_summaries(self):
+        sitemap = self.client.get(reverse("django.contrib.sitemaps.views.sitemap"))
+        self.assertContains(sitemap, "/cork/")
+        output = StringIO()
+        call_command("generate_pages", "--rebuild", stdout=output)
+        self.assertIn("/cork/ - 3 listings", output.getvalue())
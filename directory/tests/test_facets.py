@@ -0,0 +1,71 @@
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+
+from directory.facets import get_facet_counts
+from directory.models import Listing
+from directory.snapshot import clear_listing_snapshot
+from directory.tests.factories import create_listing
+from directory.utils import normalize_filter_params
+
+
+@override_settings(FACET_CACHE_TIMEOUT=300)
+class FacetCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_listing_snapshot()
+        create_listing(slug="a", county="Cork", attributes={"heat_source": "wood", "cold_plunge": "yes"})
+        create_listing(slug="b", county="cork", attributes={"heat_source": "Electric", "cold_plunge": "no"})
+        create_listing(slug="c", county="Dublin", attributes={"heat_source": "wood", "cold_plunge": "yes"})
+        create_listing(slug="d", county="Cork", is_active=False, attributes={"heat_source": "wood"})
+
+    def _counts(self, query, snapshot, near=None):
+        cache.clear()
+        with override_settings(LISTING_SNAPSHOT_ENABLED=snapshot):
+            return get_facet_counts(normalize_filter_params(QueryDict(query)), near)
+
+    def test_counts_ignore_own_filter_and_apply_others(self):
+        for snapshot in (False, True):
+            with self.subTest(snapshot=snapshot):
+                counts = self._counts("county=Cork&heat_source=wood", snapshot)
+                self.assertEqual(counts["county"]["Cork"], 1)
+                self.assertEqual(counts["county"]["Dublin"], 1)
+                self.assertEqual(counts["county"]["Kerry"], 0)
+                self.assertEqual(counts["heat_source"]["wood"], 1)
+                self.assertEqual(counts["heat_source"]["electric"], 1)
+                self.assertEqual(counts["cold_plunge"], {"yes": 1, "no": 0, "not listed": 0})
+
+    def test_snapshot_matches_database(self):
+        for query in ["", "cold_plunge=yes", "heat_source=wood&heat_source=electric", "county=Galway"]:
+            with self.subTest(query=query):
+                self.assertEqual(self._counts(query, True), self._counts(query, False))
+
+    def test_near_me_counts_stay_within_the_radius(self):
+        Listing.objects.filter(slug="a").update(latitude=51.9, longitude=-8.47)
+        Listing.objects.filter(slug="c").update(latitude=53.35, longitude=-6.26)
+        for snapshot in (False, True):
+            with self.subTest(snapshot=snapshot):
+                clear_listing_snapshot()
+                counts = self._counts("", snapshot, near=(51.9, -8.47, 50.0))
+                self.assertEqual(counts["county"]["Cork"], 1)
+                self.assertEqual(counts["county"]["Dublin"], 0)
+                self.assertEqual(counts["heat_source"]["wood"], 1)
+
+        response = self.client.get("/", {"near_me": "true", "lat": "51.9", "lng": "-8.47"})
+        self.assertContains(response, 'disabled>Dublin (0)</option>')
+
+    def test_single_query_then_cached(self):
+        state = normalize_filter_params(QueryDict("cold_plunge=yes"))
+        with self.assertNumQueries(1):
+            counts = get_facet_counts(state)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_facet_counts(state), counts)
+
+    def test_home_renders_counts_and_disables_empty_choices(self):
+        response = self.client.get("/", {"county": "Cork"})
+        self.assertContains(response, "Cork (2)")
+        self.assertContains(response, 'disabled>Kerry (0)</option>')
+        self.assertNotContains(response, 'hx-swap-oob')
+
+        response = self.client.get("/", {"county": "Cork"}, HTTP_HX_REQUEST="true")
+        self.assertContains(response, 'id="filter-heat_source" hx-swap-oob="innerHTML"')
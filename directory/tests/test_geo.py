@@ -0,0 +1,47 @@
+import random
+
+from django.test import SimpleTestCase
+
+from directory.geo import GeoGridIndex, bounding_box, haversine_km
+
+
+class GeoGridIndexTests(SimpleTestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        self.points = [
+            (index, rng.uniform(51.4, 55.4), rng.uniform(-10.5, -5.4))
+            for index in range(500)
+        ]
+        self.index = GeoGridIndex(self.points)
+
+    def _brute_force(self, lat, lng):
+        return sorted(
+            (haversine_km(lat, lng, point_lat, point_lng), key)
+            for key, point_lat, point_lng in self.points
+        )
+
+    def test_within_matches_brute_force(self):
+        for lat, lng, radius in [(53.35, -6.26, 25), (51.9, -8.47, 80), (60.0, 0.0, 10)]:
+            with self.subTest(lat=lat, lng=lng, radius=radius):
+                expected = {key for distance, key in self._brute_force(lat, lng) if distance <= radius}
+                found = self.index.within(lat, lng, radius)
+                self.assertEqual({key for _, key in found}, expected)
+                self.assertEqual([hit[0] for hit in found], sorted(hit[0] for hit in found))
+
+    def test_nearest_matches_brute_force(self):
+        for lat, lng, k in [(53.35, -6.26, 5), (54.6, -5.9, 12), (40.0, -3.7, 3)]:
+            with self.subTest(lat=lat, lng=lng, k=k):
+                expected = self._brute_force(lat, lng)[:k]
+                found = self.index.nearest(lat, lng, k)
+                self.assertEqual([key for _, key in found], [key for _, key in expected])
+
+    def test_nearest_respects_max_distance(self):
+        found = self.index.nearest(53.35, -6.26, 50, max_km=10)
+        self.assertTrue(all(distance <= 10 for distance, _ in found))
+
+    def test_bounding_box_contains_radius(self):
+        min_lat, max_lat, min_lng, max_lng = bounding_box(53.35, -6.26, 50)
+        self.assertAlmostEqual(haversine_km(53.35, -6.26, max_lat, -6.26), 50, places=1)
+        self.assertAlmostEqual(haversine_km(53.35, -6.26, min_lat, -6.26), 50, places=1)
+        self.assertGreaterEqual(haversine_km(53.35, -6.26, 53.35, max_lng), 50)
+        self.assertGreaterEqual(haversine_km(53.35, -6.26, 53.35, min_lng), 50)
@@ -0,0 +1,63 @@
+import random
+from unittest import mock, skipIf
+
+from django.test import SimpleTestCase
+
+from directory import geo_batch
+from directory.geo import haversine_km
+from directory.geo_batch import nearest_neighbours
+
+
+def _points(count, seed):
+    rng = random.Random(seed)
+    return [(f"p{i}", rng.uniform(51.4, 55.4), rng.uniform(-10.5, -5.5)) for i in range(count)]
+
+
+class NearestNeighbourTests(SimpleTestCase):
+    def setUp(self):
+        self.listings = _points(300, seed=1)
+        self.towns = _points(40, seed=2)
+
+    def _brute_force(self, sources, targets, k, max_km=None, exclude_self=False):
+        expected = {}
+        for key, lat, lng in sources:
+            hits = sorted(
+                (haversine_km(lat, lng, target_lat, target_lng), target)
+                for target, target_lat, target_lng in targets
+                if not (exclude_self and target == key)
+            )
+            expected[key] = [hit for hit in hits if max_km is None or hit[0] <= max_km][:k]
+        return expected
+
+    def _assert_matches(self, actual, expected):
+        self.assertEqual(actual.keys(), expected.keys())
+        for key, hits in expected.items():
+            self.assertEqual([target for _, target in actual[key]], [target for _, target in hits], key)
+            for (distance, _), (expected_distance, _) in zip(actual[key], hits):
+                self.assertAlmostEqual(distance, expected_distance, places=6)
+
+    @skipIf(geo_batch.np is None, "NumPy is not installed")
+    def test_numpy_blocks_match_brute_force(self):
+        with mock.patch.object(geo_batch, "BLOCK_CELLS", 1000):
+            self._assert_matches(
+                nearest_neighbours(self.listings, self.listings, 5, exclude_self=True),
+                self._brute_force(self.listings, self.listings, 5, exclude_self=True),
+            )
+        self._assert_matches(
+            nearest_neighbours(self.towns, self.listings, 8, max_km=20),
+            self._brute_force(self.towns, self.listings, 8, max_km=20),
+        )
+        matrix = geo_batch.haversine_matrix([53.0], [-6.0], [54.0, 53.0], [-6.0, -6.0])
+        self.assertAlmostEqual(matrix[0, 0], 111.195, places=2)
+        self.assertEqual(matrix[0, 1], 0)
+
+    def test_grid_fallback_without_numpy(self):
+        with mock.patch.object(geo_batch, "np", None):
+            self._assert_matches(
+                nearest_neighbours(self.towns, self.listings, 8, max_km=20),
+                self._brute_force(self.towns, self.listings, 8, max_km=20),
+            )
+            self._assert_matches(
+                nearest_neighbours(self.listings, self.listings, 3, exclude_self=True),
+                self._brute_force(self.listings, self.listings, 3, exclude_self=True),
+            )
@@ -19,24 +19,25 @@ def _create_listing(*, name, slug, city, county=""):
 
 class ListingDetailRelatedListingsTests(TestCase):
     def test_listing_detail_uses_county_then_city_fallback(self):
-        primary = _create_listing(
-            name="Sauna One",
-            slug="sauna-one",
-            city="Dublin",
-            county="Dublin",
-        )
-        county_match = _create_listing(
-            name="Sauna Two",
-            slug="sauna-two",
-            city="Dublin",
-            county="Dublin",
-        )
-        city_fallback = _create_listing(
-            name="Sauna Three",
-            slug="sauna-three",
-            city="Dublin",
-            county="",
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            primary = _create_listing(
+                name="Sauna One",
+                slug="sauna-one",
+                city="Dublin",
+                county="Dublin",
+            )
+            county_match = _create_listing(
+                name="Sauna Two",
+                slug="sauna-two",
+                city="Dublin",
+                county="Dublin",
+            )
+            city_fallback = _create_listing(
+                name="Sauna Three",
+                slug="sauna-three",
+                city="Dublin",
+                county="",
+            )
 
         response = self.client.get(
             reverse("listing_detail", kwargs={"slug": primary.slug})
@@ -49,18 +50,19 @@ class ListingDetailRelatedListingsTests(TestCase):
         self.assertIn(city_fallback.slug, related_slugs)
 
     def test_listing_detail_without_county_uses_city(self):
-        primary = _create_listing(
-            name="Sauna A",
-            slug="sauna-a",
-            city="Galway",
-            county="",
-        )
-        city_match = _create_listing(
-            name="Sauna B",
-            slug="sauna-b",
-            city="Galway",
-            county="",
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            primary = _create_listing(
+                name="Sauna A",
+                slug="sauna-a",
+                city="Galway",
+                county="",
+            )
+            city_match = _create_listing(
+                name="Sauna B",
+                slug="sauna-b",
+                city="Galway",
+                county="",
+            )
 
         response = self.client.get(
             reverse("listing_detail", kwargs={"slug": primary.slug})
@@ -0,0 +1,87 @@
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from directory.clusters import clear_cluster_indexes
+from directory.snapshot import clear_listing_snapshot
+from directory.tests.factories import create_listing
+
+
+class MapDataTests(TestCase):
+    def setUp(self):
+        clear_listing_snapshot()
+        self.bay = create_listing(
+            name="Bay Sauna", slug="bay", county="Cork", latitude=51.851234, longitude=-8.294321,
+            attributes={"cold_plunge": "yes"},
+        )
+        self.city = create_listing(name="City Sauna", slug="city", latitude=53.35, longitude=-6.26)
+        create_listing(name="No Coordinates", slug="nowhere", county="Cork")
+
+    def test_columnar_payload_for_current_filters(self):
+        for snapshot in (False, True):
+            with self.subTest(snapshot=snapshot), override_settings(LISTING_SNAPSHOT_ENABLED=snapshot):
+                response = self.client.get(reverse("map_data"), {"county": "Cork"})
+                self.assertEqual(
+                    response.json(),
+                    {
+                        "precision": 5,
+                        "id": [self.bay.id],
+                        "lat": [5185123],
+                        "lng": [-829432],
+                        "name": ["Bay Sauna"],
+                        "slug": ["bay"],
+                        "location": ["Cork"],
+                    },
+                )
+
+    def test_near_me_includes_distances(self):
+        response = self.client.get(
+            reverse("map_data"), {"near_me": "1", "lat": "53.35", "lng": "-6.26", "distance_km": "300"}
+        )
+        data = response.json()
+        self.assertEqual(data["id"], [self.bay.id, self.city.id])
+        self.assertEqual(data["distance_km"][1], 0)
+
+    def test_repeat_requests_get_not_modified_until_listings_change(self):
+        url = reverse("map_data")
+        response = self.client.get(url)
+        etag = response["ETag"]
+        self.assertIn("no-cache", response["Cache-Control"])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.assertNotEqual(self.client.get(url, {"county": "Cork"})["ETag"], etag)
+
+        self.city.name = "City Centre Sauna"
+        self.city.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("City Centre Sauna", response.json()["name"])
+
+    @override_settings(OPENING_HOURS_TIME_ZONE="Europe/Dublin")
+    def test_open_now_markers_follow_the_clock(self):
+        clear_cluster_indexes()
+        self.city.attributes = {"opening_hours": "Monday: 9am-5pm"}
+        self.city.save()
+        # Monday 16:59, then 17:01, in Dublin (winter time)
+        before_close = datetime(2026, 1, 5, 16, 59, tzinfo=dt_timezone.utc)
+        after_close = datetime(2026, 1, 5, 17, 1, tzinfo=dt_timezone.utc)
+        with mock.patch("django.utils.timezone.now", return_value=before_close):
+            response = self.client.get(reverse("map_data"), {"open_now": "1"})
+            self.assertEqual(response.json()["id"], [self.city.id])
+            clusters = self.client.get(reverse("map_clusters"), {"open_now": "1", "zoom": "7"}).json()
+            self.assertEqual(clusters["points"]["id"], [self.city.id])
+        with mock.patch("django.utils.timezone.now", return_value=after_close):
+            response = self.client.get(reverse("map_data"), {"open_now": "1"}, HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["id"], [])
+            clusters = self.client.get(reverse("map_clusters"), {"open_now": "1", "zoom": "7"}).json()
+            self.assertEqual(clusters["points"]["id"], [])
+
+    def test_home_links_map_data_instead_of_inlining_markers(self):
+        response = self.client.get(reverse("home"), {"county": "Cork", "cursor": "abc"})
+        self.assertContains(response, 'data-map-data-url="/map-data/?county=Cork"')
+        self.assertNotContains(response, 'id="map-data"')
@@ -0,0 +1,81 @@
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
+
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from directory.models import Listing
+from directory.opening_hours import MINUTES_PER_WEEK, OpeningIndex, weekly_intervals
+from directory.snapshot import clear_listing_snapshot
+from directory.tests.factories import create_listing
+from directory.utils import get_filtered_listings
+
+
+class WeeklyIntervalTests(SimpleTestCase):
+    def test_ranges_become_minutes_of_the_week(self):
+        self.assertEqual(
+            weekly_intervals("Monday: 9am-5pm|Wednesday: 10:00 AM – 12:00 PM, 2:00 – 4:00 PM|Tuesday: Closed"),
+            [(540, 1020), (3480, 3600), (3720, 3840)],
+        )
+
+    def test_late_and_all_day_ranges_merge_and_wrap(self):
+        self.assertEqual(
+            weekly_intervals(
+                "Saturday: 9:00 PM – 2:00 AM|Sunday: 1:00 – 2:00 AM, 10:00 PM – 2:00 AM|Monday: 1am-3am"
+            ),
+            [(0, 180), (8460, 8760), (9960, MINUTES_PER_WEEK)],
+        )
+
+    def test_unknown_hours(self):
+        self.assertIsNone(weekly_intervals(""))
+        self.assertIsNone(weekly_intervals("Monday: Closed"))
+        self.assertEqual(weekly_intervals("Sunday: Open 24 hours"), [(8640, MINUTES_PER_WEEK)])
+
+    def test_index_answers_by_minute(self):
+        index = OpeningIndex([(0, [(0, 180), (540, 1020)]), (2, [(600, 700)])])
+        self.assertEqual(index.open_at(0), 0b001)
+        self.assertEqual(index.open_at(180), 0)
+        self.assertEqual(index.open_at(650), 0b101)
+        self.assertEqual(index.open_at(700), 0b001)
+        self.assertEqual(index.open_at(MINUTES_PER_WEEK + 100), 0b001)
+
+
+class OpenAtFilterTests(TestCase):
+    def setUp(self):
+        clear_listing_snapshot()
+        self.factory = RequestFactory()
+        create_listing(name="Day Sauna", slug="day", attributes={"opening_hours": "Monday: 9am-5pm|Friday: 9am-5pm"})
+        create_listing(name="Late Sauna", slug="late", attributes={"opening_hours": "Friday: 6:00 PM – 1:00 AM"})
+        create_listing(name="Unknown Sauna", slug="unknown")
+
+    def _names(self, query):
+        listings, _ = get_filtered_listings(self.factory.get("/", query))
+        return [listing.name for listing in listings]
+
+    def test_saved_intervals(self):
+        late = Listing.objects.get(slug="late")
+        self.assertEqual(late.opening_intervals, [(6840, 7260)])
+        late.attributes = {}
+        late.save(update_fields=["attributes"])
+        late.refresh_from_db()
+        self.assertIsNone(late.opening_intervals)
+
+    def test_open_at_day_and_time(self):
+        cases = [
+            ({"open_day": "monday", "open_time": "10:30"}, ["Day Sauna"]),
+            ({"open_day": "friday", "open_time": "12:00"}, ["Day Sauna"]),
+            ({"open_day": "saturday", "open_time": "00:30"}, ["Late Sauna"]),
+            ({"open_day": "monday", "open_time": "17:00"}, []),
+            ({"open_day": "monday", "open_time": "late"}, ["Day Sauna", "Late Sauna", "Unknown Sauna"]),
+        ]
+        for snapshot_enabled in (False, True):
+            with override_settings(LISTING_SNAPSHOT_ENABLED=snapshot_enabled):
+                for query, expected in cases:
+                    with self.subTest(snapshot=snapshot_enabled, query=query):
+                        self.assertEqual(self._names(query), expected)
+
+    @override_settings(OPENING_HOURS_TIME_ZONE="Europe/Dublin")
+    def test_open_now_uses_local_time(self):
+        # Friday 23:30 in Dublin (summer time)
+        now = datetime(2026, 7, 3, 22, 30, tzinfo=dt_timezone.utc)
+        with mock.patch("django.utils.timezone.now", return_value=now):
+            self.assertEqual(self._names({"open_now": "true"}), ["Late Sauna"])
@@ -0,0 +1,91 @@
+import gzip
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from directory.tests.factories import create_listing
+
+
+@override_settings(PAGE_CACHE_ENABLED=True, SHARED_CACHE=True, LISTING_RESULT_CACHE_TIMEOUT=300, FACET_CACHE_TIMEOUT=300)
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cork = create_listing(name="Cork Sauna", slug="cork-sauna", city="Cork", county="Cork")
+        self.dublin = create_listing(name="Dublin Sauna", slug="dublin-sauna")
+
+    def test_hit_serves_stored_page_and_compressed_variant(self):
+        url = reverse("home")
+        first = self.client.get(url, {"sort": "name", "county": "Cork"})
+        self.assertNotIn("X-Page-Cache", first)
+
+        with self.assertNumQueries(0):
+            hit = self.client.get(url, {"county": "Cork", "sort": "name"}, HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(hit["X-Page-Cache"], "hit")
+        self.assertEqual(hit["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", hit["Vary"])
+        self.assertEqual(gzip.decompress(hit.content), first.content)
+
+        # HTMX partials are cached separately from the full page.
+        partial = self.client.get(url, {"county": "Cork", "sort": "name"}, HTTP_HX_REQUEST="true")
+        self.assertNotIn("X-Page-Cache", partial)
+
+    def test_compressed_hits_carry_a_weak_etag(self):
+        url = reverse("home")
+        rendered = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        hit = self.client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(hit["X-Page-Cache"], "hit")
+        self.assertTrue(rendered["ETag"].startswith('W/"'))
+        self.assertEqual(hit["ETag"], rendered["ETag"])
+        self.assertEqual(self.client.get(url)["ETag"], rendered["ETag"][2:])
+
+    def test_listing_change_purges_only_affected_pages(self):
+        cork_url = reverse("listing_detail", kwargs={"slug": self.cork.slug})
+        dublin_url = reverse("listing_detail", kwargs={"slug": self.dublin.slug})
+        self.client.get(cork_url)
+        self.client.get(dublin_url)
+        self.client.get(reverse("pseo_landing", kwargs={"county": "dublin"}))
+
+        self.cork.description = "Now with a cold plunge"
+        self.cork.save()
+
+        response = self.client.get(cork_url)
+        self.assertNotIn("X-Page-Cache", response)
+        self.assertContains(response, "Now with a cold plunge")
+        self.assertEqual(self.client.get(dublin_url)["X-Page-Cache"], "hit")
+        self.assertEqual(self.client.get(reverse("pseo_landing", kwargs={"county": "dublin"}))["X-Page-Cache"], "hit")
+
+        # A listing joining Dublin changes its page and every county total.
+        with self.captureOnCommitCallbacks(execute=True):
+            create_listing(name="Harbour", slug="harbour")
+        self.assertNotIn("X-Page-Cache", self.client.get(dublin_url))
+        self.assertNotIn("X-Page-Cache", self.client.get(reverse("pseo_landing", kwargs={"county": "dublin"})))
+
+    def test_filtered_county_pages_follow_every_listing(self):
+        url = reverse("pseo_landing", kwargs={"county": "dublin"})
+        self.client.get(url, {"sea_view": "yes"})
+        self.client.get(url)
+
+        # Cork's total under the filter changes, though no listing moved
+        self.cork.attributes = {"sea_view": "yes"}
+        self.cork.save()
+        self.assertNotIn("X-Page-Cache", self.client.get(url, {"sea_view": "yes"}))
+        self.assertEqual(self.client.get(url)["X-Page-Cache"], "hit")
+
+    def test_visitors_with_a_session_or_location_bypass_the_cache(self):
+        url = reverse("home")
+        self.client.get(url)
+        self.assertEqual(self.client.get(url)["X-Page-Cache"], "hit")
+
+        near_me = {"near_me": "1", "lat": "53.3", "lng": "-6.2"}
+        self.client.get(url, near_me)
+        self.assertNotIn("X-Page-Cache", self.client.get(url, near_me))
+
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = "session"
+        self.assertNotIn("X-Page-Cache", self.client.get(url))
+
+    @override_settings(PAGE_CACHE_ENABLED=False)
+    def test_disabled_setting_skips_the_cache(self):
+        self.client.get(reverse("home"))
+        self.assertNotIn("X-Page-Cache", self.client.get(reverse("home")))
@@ -1,45 +1,30 @@
 from decimal import Decimal
 
-from django.test import TestCase
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from directory.models import Listing, SaunaSubmission
-
-
-def _create_listing(**kwargs):
-    defaults = {
-        "name": "Test Sauna",
-        "slug": "test-sauna",
-        "city": "Dublin",
-        "county": "Dublin",
-        "description": "",
-        "address": "",
-        "website": "",
-        "phone": "",
-        "rating": None,
-        "reviews_count": None,
-        "latitude": None,
-        "longitude": None,
-        "is_featured": False,
-    }
-    defaults.update(kwargs)
-    return Listing.objects.create(**defaults)
+from directory.tests.factories import create_listing
+from directory.utils import get_filtered_listings
 
 
 class HomePageTests(TestCase):
     def test_home_page_returns_200(self):
-        _create_listing(slug="home-listing")
+        create_listing(slug="home-listing")
         response = self.client.get(reverse("home"))
         self.assertEqual(response.status_code, 200)
 
     def test_home_sort_by_rating_orders_desc(self):
-        low = _create_listing(
+        low = create_listing(
             name="Low Rated",
             slug="low-rated",
             rating=Decimal("3.2"),
             reviews_count=10,
         )
-        high = _create_listing(
+        high = create_listing(
             name="High Rated",
             slug="high-rated",
             rating=Decimal("4.8"),
@@ -53,8 +38,8 @@ class HomePageTests(TestCase):
         self.assertEqual(listings[1].id, low.id)
 
     def test_home_sort_by_name_orders_asc(self):
-        first = _create_listing(name="A Sauna", slug="a-sauna")
-        second = _create_listing(name="B Sauna", slug="b-sauna")
+        first = create_listing(name="A Sauna", slug="a-sauna")
+        second = create_listing(name="B Sauna", slug="b-sauna")
 
         response = self.client.get(reverse("home"), {"sort": "name"})
         self.assertEqual(response.status_code, 200)
@@ -63,13 +48,13 @@ class HomePageTests(TestCase):
         self.assertEqual(listings[1].id, second.id)
 
     def test_home_sort_by_distance_orders_nearest(self):
-        nearest = _create_listing(
+        nearest = create_listing(
             name="Nearest",
             slug="nearest",
             latitude=53.0,
             longitude=-6.0,
         )
-        farther = _create_listing(
+        farther = create_listing(
             name="Farther",
             slug="farther",
             latitude=54.0,
@@ -87,10 +72,72 @@ class HomePageTests(TestCase):
             },
         )
         self.assertEqual(response.status_code, 200)
-        listings = response.context["listings"]
-        self.assertIsInstance(listings, list)
+        listings = list(response.context["listings"])
         self.assertEqual(listings[0].id, nearest.id)
         self.assertEqual(listings[1].id, farther.id)
+        self.assertEqual(listings[0].distance_km, 0)
+        self.assertEqual(listings[1].distance_km, 111.2)
+
+    def test_home_near_me_is_lazy_queryset_within_radius(self):
+        inside = create_listing(name="Inside", slug="inside", latitude=53.1, longitude=-6.0)
+        create_listing(name="Outside", slug="outside", latitude=54.0, longitude=-6.0)
+        create_listing(name="No Coordinates", slug="no-coordinates")
+
+        query = {"near_me": "1", "lat": "53.0", "lng": "-6.0", "distance_km": "20"}
+        listings, _ = get_filtered_listings(RequestFactory().get(reverse("home"), query))
+        self.assertIsInstance(listings, QuerySet)
+
+        response = self.client.get(reverse("home"), query)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([listing.id for listing in response.context["listings"]], [inside.id])
+        self.assertEqual(response.context["listings_count"], 1)
+
+    def test_home_bbox_limits_results_to_map_area(self):
+        cork = create_listing(name="Cork", slug="cork", county="Cork", latitude=51.9, longitude=-8.47,
+                               attributes={"sea_view": "yes"})
+        create_listing(name="Cobh", slug="cobh", county="Cork", latitude=51.85, longitude=-8.29)
+        create_listing(name="Dublin", slug="dublin", latitude=53.35, longitude=-6.26, attributes={"sea_view": "yes"})
+        create_listing(name="No Coordinates", slug="no-coordinates", attributes={"sea_view": "yes"})
+
+        query = {"bbox": "-8.6,51.8,-8.2,52.0", "sea_view": "yes", "sort": "name"}
+        with self.settings(LISTING_SNAPSHOT_ENABLED=True), CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("home"), query, HTTP_HX_REQUEST="true")
+        self.assertEqual([listing.id for listing in response.context["listings"]], [cork.id])
+        self.assertEqual(response.context["listings_count"], 1)
+        self.assertContains(response, 'id="listing-count" hx-swap-oob="true"')
+        page_sql = next(query["sql"] for query in queries if "LIMIT" in query["sql"])
+        self.assertIn('"directory_listing"."latitude" BETWEEN', page_sql)
+
+        listings, _ = get_filtered_listings(RequestFactory().get(reverse("home"), {"bbox": "-8.6,51.8,-8.2,52.0"}))
+        self.assertIsInstance(listings, QuerySet)
+        self.assertEqual(len(listings), 2)
+
+    def test_map_area_can_be_cleared(self):
+        create_listing(name="Cork", slug="cork", county="Cork", latitude=51.9, longitude=-8.47)
+        response = self.client.get(reverse("home"), {"bbox": "-8.6,51.8,-8.2,52.0", "sea_view": "yes"})
+        self.assertEqual(response.context["clear_map_area_url"], reverse("home") + "?sea_view=yes")
+        self.assertContains(response, 'id="clear-map-area"')
+        # Filter changes drop the viewport before the form is sent
+        self.assertContains(response, 'getElementById("mobile-filters")?.addEventListener("change", clearMapArea)')
+
+        response = self.client.get(reverse("home"), {"sea_view": "yes"})
+        self.assertEqual(response.context["clear_map_area_url"], "")
+        self.assertNotContains(response, 'id="clear-map-area"')
+
+    def test_attribute_filters_use_generated_columns(self):
+        listing = create_listing(name="Wood", slug="wood", attributes={"heat_source": "Wood"})
+        create_listing(name="Electric", slug="electric", attributes={"heat_source": "electric"})
+
+        with CaptureQueriesContext(connection) as queries:
+            listings = list(get_filtered_listings(RequestFactory().get(reverse("home"), {"heat_source": "wood"}))[0])
+        self.assertIn("attr_heat_source", queries[-1]["sql"])
+        self.assertEqual([item.id for item in listings], [listing.id])
+
+        # The column follows edits to ``attributes``.
+        listing.attributes = {"heat_source": "infrared"}
+        listing.save()
+        self.assertFalse(Listing.objects.filter(attr_heat_source="WOOD").exists())
+        self.assertTrue(Listing.objects.filter(attr_heat_source="INFRARED").exists())
 
 
 class SubmissionTests(TestCase):
@@ -121,7 +168,7 @@ class SubmissionTests(TestCase):
 
 class ListingDetailTests(TestCase):
     def test_listing_detail_handles_empty_google_reviews(self):
-        listing = _create_listing(slug="no-reviews")
+        listing = create_listing(slug="no-reviews")
 
         response = self.client.get(
             reverse("listing_detail", kwargs={"slug": listing.slug})
@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from directory.models import Listing
+from directory.pagination import decode_cursor, paginate_listings
+from directory.snapshot import clear_listing_snapshot
+from directory.utils import SORT_ORDERINGS, get_filtered_listings
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        clear_listing_snapshot()
+        self.factory = RequestFactory()
+        for index in range(23):
+            Listing.objects.create(
+                name=f"Sauna {index % 7}",
+                slug=f"sauna-{index}",
+                city="Cork",
+                county="Cork",
+                rating=None if index % 5 == 0 else Decimal(f"{3 + index % 3}.{index % 10}"),
+                reviews_count=None if index % 4 == 0 else index,
+                latitude=51.9 + index * 0.01,
+                longitude=-8.47,
+                is_featured=index % 6 == 0,
+            )
+
+    def _walk(self, query, page_size=5):
+        request = self.factory.get("/", query)
+        listings, context = get_filtered_listings(request)
+        expected = [listing.id for listing in listings]
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = paginate_listings(listings, context["ordering"], cursor, page_size)
+            self.assertLessEqual(len(page), page_size)
+            seen.extend(listing.id for listing in page)
+            if cursor is None:
+                break
+        return seen, expected
+
+    def test_pages_cover_every_sort_order_exactly_once(self):
+        near = {"near_me": "1", "lat": "51.9", "lng": "-8.47", "distance_km": "100"}
+        queries = [
+            {},
+            {"sort": "name"},
+            {"sort": "rating"},
+            dict(near),
+            dict(near, sort="rating"),
+        ]
+        for snapshot in (False, True):
+            for query in queries:
+                with self.subTest(query=query, snapshot=snapshot):
+                    with override_settings(LISTING_SNAPSHOT_ENABLED=snapshot):
+                        seen, expected = self._walk(query)
+                    self.assertEqual(seen, expected)
+                    self.assertEqual(len(seen), 23)
+
+    def test_invalid_cursor_starts_from_first_page(self):
+        self.assertIsNone(decode_cursor("not-a-cursor", SORT_ORDERINGS["featured"]))
+        listings = Listing.objects.order_by(*SORT_ORDERINGS["featured"])
+        page, _ = paginate_listings(listings, SORT_ORDERINGS["featured"], "%%%", 3)
+        self.assertEqual([listing.id for listing in page], [listing.id for listing in listings[:3]])
+
+    @override_settings(LISTINGS_PAGE_SIZE=10)
+    def test_home_renders_first_page_and_htmx_loads_the_next(self):
+        response = self.client.get(reverse("home"))
+        self.assertEqual(len(response.context["listings"]), 10)
+        self.assertEqual(response.context["listings_count"], 23)
+        next_page_url = response.context["next_page_url"]
+        self.assertIn("cursor=", next_page_url)
+
+        response = self.client.get(next_page_url, HTTP_HX_REQUEST="true")
+        self.assertTemplateUsed(response, "partials/listing_page.html")
+        self.assertTemplateNotUsed(response, "home.html")
+        self.assertEqual(len(response.context["listings"]), 10)
+
+        response = self.client.get(response.context["next_page_url"], HTTP_HX_REQUEST="true")
+        self.assertEqual(len(response.context["listings"]), 3)
+        self.assertIsNone(response.context["next_page_url"])
+        self.assertNotContains(response, "Load more saunas")
+
+    @override_settings(LISTINGS_PAGE_SIZE=10)
+    def test_county_page_is_paginated(self):
+        response = self.client.get(reverse("pseo_landing", kwargs={"county": "cork"}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["listings"]), 10)
+        self.assertEqual(response.context["listings_count"], 23)
+        self.assertContains(response, "Load more saunas")
@@ -0,0 +1,134 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from io import BytesIO
+from unittest import mock, skipUnless
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from directory.cards import render_listing_cards
+from directory.models import Listing
+from directory.niche_config import DOMAIN
+from directory.photos import Image, PhotoStore, PhotoUnavailable, VARIANTS, available_formats, photo_digest, photo_url
+from directory.tests.factories import create_listing
+
+
+def _jpeg(width=1600, height=1067):
+    output = BytesIO()
+    Image.new("RGB", (width, height), (200, 120, 40)).save(output, format="JPEG")
+    return output.getvalue()
+
+
+class StubUpstream:
+    """Serves a generated JPEG for every photo_ref except "gone"."""
+
+    fetched = []
+
+    def fetch(self, photo_ref, max_width):
+        self.fetched.append(photo_ref)
+        if photo_ref == "gone":
+            raise PhotoUnavailable("expired")
+        return _jpeg()
+
+
+@skipUnless(Image, "Pillow is not installed")
+class PhotoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        StubUpstream.fetched = []
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        settings = override_settings(
+            PHOTO_CACHE_DIR=self.cache_dir,
+            PHOTO_UPSTREAM="directory.tests.test_photos.StubUpstream",
+            GOOGLE_MAPS_API_KEY="secret-key",
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.listing = create_listing(name="Harbour Sauna", slug="harbour", photo_ref="ref-harbour")
+
+    def test_each_photo_is_fetched_once(self):
+        for variant, width, fmt in (("card", 400, "jpg"), ("card", 800, "webp"), ("detail", 1200, "jpg")):
+            response = self.client.get(photo_url(self.listing, variant, width, fmt))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Type"], f"image/{'jpeg' if fmt == 'jpg' else fmt}")
+            self.assertIn("immutable", response["Cache-Control"])
+            self.assertFalse(response.cookies)
+            with Image.open(BytesIO(response.content)) as image:
+                self.assertEqual(image.width, width)
+        self.assertEqual(StubUpstream.fetched, ["ref-harbour"])
+
+        og = self.client.get(photo_url(self.listing, "og"))
+        with Image.open(BytesIO(og.content)) as image:
+            self.assertEqual(image.size, (1200, 630))
+
+    def test_only_the_listings_own_photo_is_served(self):
+        other = create_listing(name="Pier Sauna", slug="pier", photo_ref="ref-pier")
+        url = photo_url(other, "card", 400).replace("/pier/", "/harbour/")
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(photo_url(self.listing, "card", 300)).status_code, 404)
+        self.assertEqual(self.client.get(photo_url(self.listing, "card", 400, "gif")).status_code, 404)
+        self.assertEqual(StubUpstream.fetched, [])
+
+    def test_failed_photos_are_not_retried_at_once(self):
+        Listing.objects.filter(pk=self.listing.pk).update(photo_ref="gone")
+        self.listing.refresh_from_db()
+        self.assertEqual(self.client.get(photo_url(self.listing, "card", 400)).status_code, 404)
+        self.assertEqual(self.client.get(photo_url(self.listing, "card", 800)).status_code, 404)
+        self.assertEqual(StubUpstream.fetched, ["gone"])
+
+    def test_least_recently_used_files_are_evicted(self):
+        store = PhotoStore()
+        store.get("ref-old", "card", 400, "jpg")
+        store.get("ref-new", "card", 400, "jpg")
+        old_dir = store.root / photo_digest("ref-old")
+        new_dir = store.root / photo_digest("ref-new")
+        an_hour_ago = time.time() - 3600
+        for path in old_dir.iterdir():
+            os.utime(path, (an_hour_ago, an_hour_ago))
+
+        store.max_bytes = sum(path.stat().st_size for path in new_dir.iterdir())
+        store.evict()
+        self.assertFalse(old_dir.exists())
+        self.assertEqual(len(list(new_dir.iterdir())), 2)
+
+    def test_directory_is_scanned_only_past_the_cap(self):
+        store = PhotoStore()
+        with mock.patch.object(store, "evict", wraps=store.evict) as evict:
+            # The first write counts what is already there
+            store.get("ref-a", "card", 400, "jpg")
+            store.get("ref-a", "card", 800, "jpg")
+            store.get("ref-a", "detail", 800, "jpg")
+            self.assertEqual(evict.call_count, 1)
+            store.max_bytes = sum(path.stat().st_size for path in store.root.glob("*/*"))
+            store.get("ref-a", "og", 1200, "jpg")
+            self.assertEqual(evict.call_count, 2)
+        self.assertFalse((store.root / photo_digest("ref-a") / "card-400.jpg").exists())
+
+    def test_pages_link_our_copies(self):
+        cards = render_listing_cards([self.listing])
+        detail = self.client.get(reverse("listing_detail", kwargs={"slug": "harbour"})).content.decode()
+        for html, variant in ((cards, "card"), (detail, "detail")):
+            self.assertIn(photo_url(self.listing, variant, VARIANTS[variant][0][0]), html)
+            self.assertNotIn("secret-key", html)
+            self.assertNotIn("ref-harbour", html)
+        if "webp" in available_formats():
+            self.assertIn(f'type="image/webp" srcset="{photo_url(self.listing, "card", 400, "webp")} 400w', cards)
+
+        og_url = f"https://{DOMAIN}{photo_url(self.listing, 'og')}"
+        self.assertIn(f'<meta property="og:image" content="{og_url}"', detail)
+        self.assertEqual(json.loads(self.listing.schema_json)["image"], og_url)
+
+    @override_settings(PHOTO_UPSTREAM="directory.photos.GooglePlacePhotoUpstream", GOOGLE_MAPS_API_KEY="")
+    def test_pages_skip_photos_without_a_maps_key(self):
+        self.listing.save()
+        cards = render_listing_cards([self.listing])
+        detail = self.client.get(reverse("listing_detail", kwargs={"slug": "harbour"})).content.decode()
+        for html in (cards, detail):
+            self.assertNotIn("/photos/", html)
+        self.assertNotIn("og:image", detail)
+        self.assertNotIn("image", json.loads(self.listing.schema_json))
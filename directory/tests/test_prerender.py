@@ -0,0 +1,49 @@
+import gzip
+import json
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase
+from django.urls import reverse
+
+from blog.models import Post
+from directory.niche_config import DOMAIN
+from directory.prerender import MANIFEST_NAME, output_file, prerender_site
+from directory.tests.factories import create_listing
+
+
+class PrerenderTests(TestCase):
+    def setUp(self):
+        self.output = Path(tempfile.mkdtemp())
+        self.cork = create_listing(name="Cork Sauna", slug="cork-sauna", city="Cork", county="Cork")
+        self.dublin = create_listing(name="Dublin Sauna", slug="dublin-sauna")
+        Post.objects.create(title="Sauna Etiquette", slug="sauna-etiquette", content="Towels.")
+
+    def test_pages_match_live_views_and_have_compressed_siblings(self):
+        stats = prerender_site(self.output)
+        self.assertEqual(stats["pages"], 7)
+        self.assertEqual(stats["written"], 7)
+
+        for path in ["/", "/cork/", reverse("listing_detail", kwargs={"slug": "dublin-sauna"}), "/blog/sauna-etiquette/"]:
+            html = output_file(self.output, path)
+            live = self.client.get(path, HTTP_HOST=DOMAIN)
+            self.assertEqual(html.read_bytes(), live.content, path)
+            self.assertEqual(gzip.decompress(Path(f"{html}.gz").read_bytes()), live.content)
+        self.assertIn("/cork/", json.loads((self.output / MANIFEST_NAME).read_text()))
+
+    def test_rebuild_only_renders_changed_pages(self):
+        prerender_site(self.output)
+        self.assertEqual(prerender_site(self.output)["rendered"], 0)
+
+        self.cork.description = "Now with a cold plunge"
+        self.cork.save()
+        stats = prerender_site(self.output)
+        # Its own page, its county page and the home page
+        self.assertEqual(stats["rendered"], 3)
+        self.assertIn(b"Now with a cold plunge", output_file(self.output, "/listing/cork-sauna/").read_bytes())
+
+        self.dublin.delete()
+        stats = prerender_site(self.output)
+        self.assertEqual(stats["removed"], 2)
+        self.assertFalse(output_file(self.output, "/dublin/").exists())
+        self.assertFalse(output_file(self.output, "/listing/dublin-sauna/").exists())
@@ -0,0 +1,104 @@
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from directory.related import rebuild_related_listings
+from directory.snapshot import clear_listing_snapshot
+from directory.tests.factories import create_listing
+
+# A heavy column in the select list (the search rank may still read search_vector)
+HEAVY_COLUMN = re.compile(r'(?:SELECT|,) "directory_listing"\."(structured_data|schema_json|search_vector)"(?: AS "\w+")?(?:,|$)')
+# County pages read the JSON-LD of their top listings, and nothing else
+TOP_SCHEMAS = 'SELECT "directory_listing"."id" AS "id", "directory_listing"."schema_json" AS "schema_json"'
+
+
+def _reviews(count=40):
+    return {
+        "google_reviews": [
+            {"author_name": f"Reviewer {index}", "text": "Lovely sauna, great plunge. " * 40, "author_url": "https://example.com/" * 5}
+            for index in range(count)
+        ]
+    }
+
+
+def _selected_bytes(queries):
+    """Bytes of the rows Postgres returned for the captured SELECTs."""
+    total = 0
+    with connection.cursor() as cursor:
+        for query in queries:
+            if query["sql"].startswith("SELECT"):
+                cursor.execute(f"SELECT coalesce(sum(pg_column_size(result.*)), 0) FROM ({query['sql']}) result")
+                total += cursor.fetchone()[0]
+    return total
+
+
+def _selected_columns(sql):
+    return sql.split(" FROM ", 1)[0]
+
+
+class ListProjectionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_listing_snapshot()
+        for index in range(6):
+            create_listing(
+                name=f"Sauna {index}",
+                slug=f"sauna-{index}",
+                county="Cork",
+                latitude=51.9 + index / 100,
+                longitude=-8.47,
+                structured_data=_reviews(),
+            )
+        rebuild_related_listings()
+        self.review_bytes = len(str(_reviews()))
+
+    def _capture(self, url, **params):
+        self.client.get(url, params)  # warm the result and facet caches
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return captured.captured_queries
+
+    def assertSlim(self, queries):
+        for query in queries:
+            columns = _selected_columns(query["sql"])
+            if columns != TOP_SCHEMAS:
+                self.assertIsNone(HEAVY_COLUMN.search(columns), columns)
+        # Less than one listing's reviews for the whole page
+        self.assertLess(_selected_bytes(queries), self.review_bytes)
+
+    def test_list_pages_load_card_columns_only(self):
+        for url, params in (
+            (reverse("home"), {}),
+            (reverse("home"), {"q": "sauna"}),
+            (reverse("home"), {"near_me": "true", "lat": "51.9", "lng": "-8.47"}),
+            (reverse("pseo_landing", kwargs={"county": "cork"}), {}),
+            (reverse("map_data"), {}),
+            ("/sitemap.xml", {}),
+        ):
+            with self.subTest(url=url, params=params):
+                self.assertSlim(self._capture(url, **params))
+
+    @override_settings(LISTING_SNAPSHOT_ENABLED=True)
+    def test_snapshot_keeps_card_columns_only(self):
+        self._capture(reverse("home"))
+        queries = self._capture(reverse("home"), near_me="true", lat="51.9", lng="-8.47")
+        self.assertSlim(queries)
+
+    @override_settings(SHARED_CACHE=True, LISTING_RESULT_CACHE_TIMEOUT=300, FACET_CACHE_TIMEOUT=300)
+    def test_home_page_query_count(self):
+        url = reverse("home")
+        self.client.get(url)
+        # A deferred column read per card would add a query per listing
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+    def test_related_listings_skip_reviews(self):
+        queries = self._capture(reverse("listing_detail", kwargs={"slug": "sauna-0"}))
+        related = [query for query in queries if ' FROM "directory_relatedlisting"' in query["sql"]]
+        self.assertEqual(len(related), 1)
+        self.assertSlim(related)
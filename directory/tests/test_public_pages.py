@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from directory.models import Listing
+
+
+@override_settings(PUBLIC_PAGE_S_MAXAGE=300, PUBLIC_PAGE_STALE_WHILE_REVALIDATE=3600)
+class PublicPageTests(TestCase):
+    def setUp(self):
+        Listing.objects.create(name="Harbour Sauna", slug="harbour", city="Cork", county="Cork")
+
+    def assertShareable(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.cookies)
+        self.assertNotIn("Cookie", response.get("Vary", ""))
+        self.assertFalse(hasattr(response.wsgi_request, "session"))
+
+    def test_public_pages_skip_the_cookie_middleware(self):
+        for url in (
+            reverse("home"),
+            reverse("pseo_landing", kwargs={"county": "cork"}),
+            reverse("listing_detail", kwargs={"slug": "harbour"}),
+            reverse("post_list"),
+            "/sitemap.xml",
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertShareable(response)
+                self.assertEqual(
+                    response["Cache-Control"], "public, max-age=0, s-maxage=300, stale-while-revalidate=3600"
+                )
+
+    def test_views_keep_their_own_cache_control(self):
+        response = self.client.get(reverse("suggest"), {"q": "har"})
+        self.assertShareable(response)
+        self.assertNotIn("s-maxage", response["Cache-Control"])
+
+    def test_open_now_pages_expire_sooner(self):
+        response = self.client.get(reverse("home"), {"open_now": "true"})
+        self.assertIn("s-maxage=60", response["Cache-Control"])
+
+    def test_near_me_pages_stay_private(self):
+        response = self.client.get(reverse("home"), {"near_me": "true", "lat": "53.3", "lng": "-6.2", "open_now": "true"})
+        self.assertEqual(response["Cache-Control"], "private, max-age=0")
+
+    def test_htmx_partials_vary(self):
+        response = self.client.get(reverse("home"))
+        self.assertIn("HX-Request", response["Vary"])
+
+    def test_full_stack_for_forms_admin_and_sessions(self):
+        response = self.client.get(reverse("submit_sauna"))
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+        self.assertNotIn("public", response.get("Cache-Control", ""))
+
+        self.assertEqual(self.client.get("/admin/login/").status_code, 200)
+
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = "someone"
+        response = self.client.get(reverse("home"))
+        self.assertTrue(hasattr(response.wsgi_request, "session"))
+        self.assertNotIn("public", response.get("Cache-Control", ""))
@@ -0,0 +1,134 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from directory import related
+from directory.models import RelatedListing
+from directory.related import rebuild_related_listings, related_listings_rebuilt_afterwards
+from directory.tests.factories import create_listing
+
+
+def _related_ids(listing):
+    return list(RelatedListing.objects.filter(listing=listing).values_list("related_id", flat=True))
+
+
+class RelatedListingTests(TestCase):
+    def setUp(self):
+        # West to east along one parallel, ~6.7 km apart
+        with self.captureOnCommitCallbacks(execute=True):
+            self.listings = [
+                create_listing(name=f"Sauna {i}", slug=f"sauna-{i}", latitude=53.0, longitude=-7.0 + i * 0.1)
+                for i in range(6)
+            ]
+
+    def test_nearest_active_listings_by_distance(self):
+        first, second, third, fourth, fifth, sixth = self.listings
+        self.assertEqual(_related_ids(first), [second.id, third.id, fourth.id, fifth.id])
+        self.assertEqual(_related_ids(fourth)[:2], [third.id, fifth.id])
+        link = RelatedListing.objects.get(listing=first, position=0)
+        self.assertAlmostEqual(link.distance_km, 6.69, places=2)
+
+        # A shared amenity outranks a slightly closer neighbour.
+        first.attributes = {"sea_view": "yes"}
+        with self.captureOnCommitCallbacks(execute=True):
+            first.save()
+            twin = create_listing(name="Twin", slug="twin", latitude=53.0, longitude=-6.892, attributes={"sea_view": "yes"})
+        self.assertEqual(_related_ids(first)[:2], [twin.id, second.id])
+        self.assertEqual(rebuild_related_listings(), 28)
+        self.assertEqual(_related_ids(first)[:2], [twin.id, second.id])
+
+    def test_moves_and_deactivation_update_neighbours(self):
+        first, second, third, fourth, fifth, sixth = self.listings
+        sixth.longitude = -7.01
+        with self.captureOnCommitCallbacks(execute=True):
+            sixth.save()
+        self.assertEqual(_related_ids(first)[0], sixth.id)
+        self.assertNotIn(sixth.id, _related_ids(fifth))
+
+        sixth.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            sixth.save()
+        self.assertNotIn(sixth.id, _related_ids(first))
+        self.assertEqual(_related_ids(sixth), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertEqual(_related_ids(first), [third.id, fourth.id, fifth.id])
+
+    def test_amenity_edits_rerank_neighbours(self):
+        first = self.listings[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            twin = create_listing(name="Twin", slug="twin", latitude=53.0, longitude=-6.892, attributes={"sea_view": "yes"})
+        self.assertEqual(_related_ids(first)[0], self.listings[1].id)
+
+        first.attributes["sea_view"] = "yes"
+        with self.captureOnCommitCallbacks(execute=True):
+            first.save()
+        self.assertEqual(_related_ids(first)[:2], [twin.id, self.listings[1].id])
+        # Loading everything finds nothing left to change
+        change = related.ListingChange(first.id, ((53.0, -7.0),), ("Dublin", "Dublin"))
+        with mock.patch.object(related, "_covered", return_value=False):
+            self.assertEqual(related.refresh_related_listings([change]), [])
+
+    def test_listing_without_coordinates_uses_county(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            unmapped = create_listing(name="Unmapped", slug="unmapped", city="Cork", county="Cork")
+            cork = create_listing(name="Cork", slug="cork", county="Cork", latitude=51.9, longitude=-8.47)
+        self.assertEqual(_related_ids(unmapped), [cork.id])
+        self.assertEqual(RelatedListing.objects.get(listing=unmapped).distance_km, None)
+
+    def test_one_refresh_per_transaction(self):
+        with mock.patch.object(related, "refresh_related_listings", wraps=related.refresh_related_listings) as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                extra = [
+                    create_listing(name=f"Extra {i}", slug=f"extra-{i}", latitude=53.01, longitude=-7.0 + i * 0.1)
+                    for i in range(3)
+                ]
+        refresh.assert_called_once()
+        self.assertEqual(_related_ids(extra[0])[0], self.listings[0].id)
+
+    def test_imports_rebuild_once_at_the_end(self):
+        with mock.patch.object(related, "refresh_related_listings") as refresh:
+            with self.captureOnCommitCallbacks(execute=True), related_listings_rebuilt_afterwards():
+                extra = create_listing(name="Extra", slug="extra", latitude=53.0, longitude=-7.01)
+                self.assertEqual(_related_ids(extra), [])
+        refresh.assert_not_called()
+        self.assertEqual(_related_ids(self.listings[0])[0], extra.id)
+
+    def test_refresh_loads_only_the_listings_around_a_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            # A second row, so every listing here has its nearest neighbours close by
+            nearby = [
+                create_listing(name=f"North {i}", slug=f"north-{i}", latitude=53.05, longitude=-7.0 + i * 0.1)
+                for i in range(10)
+            ]
+            # And a cluster far enough away that no list there could reach here
+            for i in range(14):
+                create_listing(name=f"Far {i}", slug=f"far-{i}", city="Cork", county="Cork", latitude=51.5, longitude=-9.5 + i * 0.01)
+        loaded = []
+        neighbourhood = related._Neighbourhood
+
+        def record(*args, **kwargs):
+            result = neighbourhood(*args, **kwargs)
+            loaded.append(set(result.listings))
+            return result
+
+        first = self.listings[0]
+        first.longitude = -7.05
+        with mock.patch.object(related, "_Neighbourhood", side_effect=record):
+            with self.captureOnCommitCallbacks(execute=True):
+                first.save()
+        self.assertEqual(loaded, [{listing.id for listing in self.listings + nearby}])
+        # Loading everything finds nothing left to change
+        change = related.ListingChange(first.id, ((53.0, -7.05), (53.0, -7.0)), ("Dublin", "Dublin"))
+        with mock.patch.object(related, "_covered", return_value=False):
+            self.assertEqual(related.refresh_related_listings([change]), [])
+
+    def test_detail_page_prefetches_related(self):
+        first = self.listings[0]
+        # ETag validators, then the listing with its prefetched related listings
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("listing_detail", kwargs={"slug": first.slug}))
+        self.assertEqual([listing.id for listing in response.context["related_listings"]], _related_ids(first))
+        self.assertContains(response, "6.7 km away")
@@ -0,0 +1,51 @@
+from django.test import RequestFactory, TestCase, override_settings
+
+from directory.results import CachedListingResults
+from directory.tests.factories import create_listing
+from directory.utils import get_filtered_listings
+
+
+@override_settings(LISTING_RESULT_CACHE_TIMEOUT=300)
+class ResultCacheTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.beach = create_listing(name="Beach", slug="beach", county="Cork", attributes={"cold_plunge": "yes"})
+        self.alpha = create_listing(name="Alpha", slug="alpha", county="Cork", attributes={"cold_plunge": "YES"})
+        create_listing(name="Inland", slug="inland", county="Cork", attributes={"cold_plunge": "no"})
+
+    def _results(self, query_string):
+        listings, _ = get_filtered_listings(self.factory.get(f"/?{query_string}"))
+        return listings
+
+    def test_equivalent_filter_queries_share_one_entry(self):
+        with self.assertNumQueries(1):
+            listings = self._results("county=Cork&cold_plunge=yes")
+        self.assertIsInstance(listings, CachedListingResults)
+        self.assertEqual(listings.ids, [self.alpha.id, self.beach.id])
+
+        for query_string in [
+            "cold_plunge=yes&county=Cork",
+            "county=cork&cold_plunge=YES&heat_source=&sea_view=",
+            "county=CORK&cold_plunge=yes&cold_plunge=Yes",
+        ]:
+            with self.subTest(query_string=query_string), self.assertNumQueries(0):
+                self.assertEqual(self._results(query_string).ids, [self.alpha.id, self.beach.id])
+
+    def test_sort_order_is_part_of_the_key(self):
+        self.assertEqual(self._results("county=Cork&sort=name").ids[:2], [self.alpha.id, self.beach.id])
+        self.assertEqual(self._results("county=Cork&sort=rating").ids[:2], [self.beach.id, self.alpha.id])
+
+    def test_save_and_delete_invalidate(self):
+        self.assertEqual(len(self._results("county=Cork&cold_plunge=yes")), 2)
+
+        self.alpha.attributes = {"cold_plunge": "no"}
+        self.alpha.save()
+        self.assertEqual(self._results("county=Cork&cold_plunge=yes").ids, [self.beach.id])
+
+        self.beach.delete()
+        self.assertEqual(len(self._results("county=Cork&cold_plunge=yes")), 0)
+
+    def test_slices_load_only_the_requested_listings(self):
+        listings = self._results("county=Cork")
+        with self.assertNumQueries(1):
+            self.assertEqual([listing.name for listing in listings[1:3]], ["Beach", "Inland"])
@@ -0,0 +1,78 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from directory.models import Listing
+from directory.opening_hours import parse_opening_hours
+from directory.tests.factories import create_listing
+
+
+GOOGLE_HOURS = (
+    "Monday: 10:00 AM – 4:00 PM|Tuesday: Closed|"
+    "Friday: 5:00 – 8:00 PM, 9:00 – 11:00 PM|"
+    "Saturday: 9:00 PM – 2:00 AM|Sunday: Open 24 hours"
+)
+
+
+class OpeningHoursTests(SimpleTestCase):
+    def test_google_weekday_text(self):
+        self.assertEqual(
+            parse_opening_hours(GOOGLE_HOURS),
+            [(0, 600, 960), (4, 1020, 1200), (4, 1260, 1380), (5, 1260, 120), (6, 0, 1440)],
+        )
+
+    def test_short_form_and_unreadable_days(self):
+        self.assertEqual(
+            parse_opening_hours("Monday: 9am-5pm|Tuesday: 12pm - 12am|Wednesday: by appointment|Holiday: 9am-1pm"),
+            [(0, 540, 1020), (1, 720, 1440)],
+        )
+
+
+class ListingSchemaTests(TestCase):
+    def test_json_ld_is_stored_on_save_and_rendered_verbatim(self):
+        listing = create_listing(
+            description="Wood-fired </script> sauna & plunge",
+            attributes={"opening_hours": GOOGLE_HOURS},
+        )
+        schema = json.loads(listing.schema_json)
+        self.assertEqual(schema["description"], "Wood-fired </script> sauna & plunge")
+        self.assertNotIn("</script>", listing.schema_json)
+        self.assertEqual(
+            schema["openingHoursSpecification"][0],
+            {"@type": "OpeningHoursSpecification", "dayOfWeek": "Monday", "opens": "10:00", "closes": "16:00"},
+        )
+        self.assertEqual(schema["openingHoursSpecification"][-1]["closes"], "23:59")
+
+        listing.rating = 4.5
+        listing.save(update_fields=["rating"])
+        listing.refresh_from_db()
+        self.assertEqual(json.loads(listing.schema_json)["aggregateRating"]["ratingValue"], "4.5")
+
+        response = self.client.get(reverse("listing_detail", kwargs={"slug": listing.slug}))
+        self.assertContains(response, listing.schema_json)
+
+        response = self.client.get(reverse("pseo_landing", kwargs={"county": "dublin"}))
+        self.assertContains(response, f"[{listing.schema_json}]")
+
+    def test_pages_serialise_listings_without_a_stored_copy(self):
+        listing = create_listing(description="Wood-fired sauna")
+        schema_json = listing.schema_json
+        Listing.objects.update(schema_json="")
+
+        response = self.client.get(reverse("listing_detail", kwargs={"slug": listing.slug}))
+        self.assertContains(response, schema_json)
+        response = self.client.get(reverse("pseo_landing", kwargs={"county": "dublin"}))
+        self.assertContains(response, f"[{schema_json}]")
+
+    def test_refresh_command_fills_columns_added_by_migrations(self):
+        listing = create_listing(attributes={"opening_hours": GOOGLE_HOURS})
+        schema_json, intervals = listing.schema_json, listing.opening_intervals
+        Listing.objects.update(schema_json="", opening_intervals=None)
+
+        call_command("refresh_listing_fields", stdout=StringIO())
+        listing.refresh_from_db()
+        self.assertEqual(listing.schema_json, schema_json)
+        self.assertEqual(listing.opening_intervals, intervals)
@@ -0,0 +1,78 @@
+from django.test import RequestFactory, TestCase, override_settings
+
+from directory.pagination import paginate_listings
+from directory.snapshot import clear_listing_snapshot
+from directory.tests.factories import create_listing
+from directory.utils import get_filtered_listings
+
+
+class ListingSearchTests(TestCase):
+    def setUp(self):
+        clear_listing_snapshot()
+        self.factory = RequestFactory()
+        self.harbour = create_listing(
+            name="Harbour Sauna",
+            slug="harbour",
+            city="Salthill",
+            county="Galway",
+            description="Wood-fired sauna by the sea",
+            attributes={"heat_source": "wood"},
+        )
+        self.forest = create_listing(
+            name="Forest Retreat",
+            slug="forest",
+            city="Oughterard",
+            county="Galway",
+            description="Electric sauna near a harbour walk",
+            attributes={"heat_source": "electric"},
+        )
+        self.city = create_listing(name="City Sauna", slug="city", city="Dublin", county="Dublin")
+
+    def _search(self, **query):
+        listings, _ = get_filtered_listings(self.factory.get("/", query))
+        return [listing.id for listing in listings]
+
+    def test_results_are_ranked_by_relevance(self):
+        # Name matches outweigh description matches.
+        self.assertEqual(self._search(q="harbour"), [self.harbour.id, self.forest.id])
+
+    def test_misspelt_place_names_match(self):
+        self.assertCountEqual(self._search(q="Galwya"), [self.harbour.id, self.forest.id])
+        self.assertEqual(self._search(q="Dubln"), [self.city.id])
+
+    def test_search_combines_with_filters_and_sort(self):
+        self.assertEqual(self._search(q="galway", heat_source="electric"), [self.forest.id])
+        self.assertEqual(self._search(q="galway", sort="name"), [self.forest.id, self.harbour.id])
+
+    def test_search_bypasses_snapshot(self):
+        with override_settings(LISTING_SNAPSHOT_ENABLED=True):
+            self.assertEqual(self._search(q="harbour"), [self.harbour.id, self.forest.id])
+
+    def test_search_results_paginate_by_rank(self):
+        listings, context = get_filtered_listings(self.factory.get("/", {"q": "sauna galway"}))
+        expected = [listing.id for listing in listings]
+        page, cursor = paginate_listings(listings, context["ordering"], None, 1)
+        seen = [listing.id for listing in page]
+        while cursor:
+            page, cursor = paginate_listings(listings, context["ordering"], cursor, 1)
+            seen.extend(listing.id for listing in page)
+        self.assertEqual(seen, expected)
+        self.assertTrue(expected)
+
+    def test_cursor_survives_ranks_that_are_not_exact_floats(self):
+        # Trigram and text ranks like these aren't exact in float4
+        for index, (name, city) in enumerate(
+            [("Galway Bay Sauna", "Galway"), ("Salthill Harbour Sauna", "Salthill"), ("Harbour House", "Galway"),
+             ("Spiddal Sea Sauna", "Spiddal"), ("Old Harbour Baths", "Kinvara"), ("The Galway Sweat", "Barna")]
+        ):
+            create_listing(name=name, slug=f"extra-{index}", city=city, county="Galway", description="Harbour sauna")
+        for q in ("sauna galway", "galway", "harbour"):
+            with self.subTest(q=q):
+                listings, context = get_filtered_listings(self.factory.get("/", {"q": q}))
+                expected = [listing.id for listing in listings]
+                page, cursor = paginate_listings(listings, context["ordering"], None, 1)
+                seen = [listing.id for listing in page]
+                while cursor and len(seen) <= len(expected):
+                    page, cursor = paginate_listings(listings, context["ordering"], cursor, 1)
+                    seen.extend(listing.id for listing in page)
+                self.assertEqual(seen, expected)
@@ -0,0 +1,113 @@
+from decimal import Decimal
+
+from django.test import RequestFactory, TestCase, override_settings
+
+from directory.snapshot import clear_listing_snapshot, get_listing_snapshot
+from directory.tests.factories import create_listing
+from directory.utils import get_filtered_listings
+
+
+class ListingSnapshotTests(TestCase):
+    def setUp(self):
+        clear_listing_snapshot()
+        self.factory = RequestFactory()
+        create_listing(
+            name="Beach Sauna",
+            slug="beach",
+            county="Cork",
+            rating=Decimal("4.8"),
+            reviews_count=20,
+            latitude=51.85,
+            longitude=-8.3,
+            attributes={"heat_source": "Wood", "cold_plunge": "yes", "sea_view": "yes"},
+        )
+        create_listing(
+            name="alpha sauna",
+            slug="alpha",
+            county="cork",
+            rating=Decimal("4.8"),
+            reviews_count=50,
+            latitude=51.9,
+            longitude=-8.47,
+            attributes={"heat_source": "electric", "cold_plunge": "no"},
+        )
+        create_listing(
+            name="City Sauna",
+            slug="city",
+            county="Dublin",
+            is_featured=True,
+            latitude=53.35,
+            longitude=-6.26,
+            attributes={"heat_source": "wood", "cold_plunge": "not listed"},
+        )
+        create_listing(
+            name="Hidden Sauna",
+            slug="hidden",
+            county="Cork",
+            is_active=False,
+            attributes={"heat_source": "wood"},
+        )
+        create_listing(
+            name="Zen Sauna",
+            slug="zen",
+            county="Galway",
+            rating=Decimal("3.9"),
+            reviews_count=5,
+            attributes={"heat_source": "infrared", "cold_plunge": "yes"},
+        )
+
+    def _ids(self, query, snapshot):
+        request = self.factory.get("/", query)
+        with override_settings(LISTING_SNAPSHOT_ENABLED=snapshot):
+            listings, _ = get_filtered_listings(request)
+        return [listing.id for listing in listings]
+
+    def test_snapshot_matches_queryset_results_and_order(self):
+        queries = [
+            {},
+            {"sort": "rating"},
+            {"sort": "name"},
+            {"county": "CORK"},
+            {"county": "Cork", "sort": "rating"},
+            {"heat_source": "wood"},
+            {"heat_source": ["wood", "infrared"], "sort": "rating"},
+            {"heat_source": ["", "electric"]},
+            {"cold_plunge": "yes", "heat_source": "WOOD"},
+            {"county": "Kerry"},
+            {"sea_view": "no"},
+        ]
+        for query in queries:
+            with self.subTest(query=query):
+                self.assertEqual(self._ids(query, True), self._ids(query, False))
+
+    def test_snapshot_matches_queryset_near_me(self):
+        near = {"near_me": "1", "lat": "51.89", "lng": "-8.4"}
+        queries = [
+            dict(near),
+            dict(near, distance_km="300"),
+            dict(near, distance_km="300", sort="rating"),
+            dict(near, distance_km="300", sort="distance", heat_source="wood"),
+            dict(near, distance_km="1"),
+        ]
+        for query in queries:
+            with self.subTest(query=query):
+                self.assertEqual(self._ids(query, True), self._ids(query, False))
+
+        request = self.factory.get("/", queries[1])
+        with override_settings(LISTING_SNAPSHOT_ENABLED=True):
+            listings, context = get_filtered_listings(request)
+        self.assertTrue(context["near_me"])
+        self.assertEqual([listing.distance_km for listing in listings], [217.3, 4.9, 8.2])
+        self.assertFalse(hasattr(get_listing_snapshot().listings[0], "distance_km"))
+
+    def test_snapshot_excludes_inactive_listings(self):
+        slugs = {listing.slug for listing in get_listing_snapshot().listings}
+        self.assertNotIn("hidden", slugs)
+
+    def test_snapshot_rebuilds_after_listing_change(self):
+        self.assertEqual(self._ids({"county": "Galway"}, True), self._ids({"county": "Galway"}, False))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            added = create_listing(name="New Sauna", slug="new", county="Galway")
+
+        self.assertIn(added.id, self._ids({"county": "Galway"}, True))
@@ -0,0 +1,90 @@
+import gzip
+import zlib
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils.text import compress_sequence
+
+from directory.middleware import compress_sequence_flushing
+from directory.models import Listing
+from directory.snapshot import clear_listing_snapshot
+
+
+@override_settings(STREAMING_PAGES_ENABLED=True, LISTINGS_PAGE_SIZE=10)
+class StreamingPageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_listing_snapshot()
+        for index in range(12):
+            Listing.objects.create(name=f"Sauna {index:02d}", slug=f"sauna-{index}", city="Cork", county="Cork")
+
+    def test_head_is_sent_before_the_cards(self):
+        response = self.client.get(reverse("home"))
+        self.assertTrue(response.streaming)
+        chunks = [chunk.decode() for chunk in response.streaming_content]
+        self.assertIn("<head", chunks[0])
+        self.assertIn('name="open_now"', chunks[0])
+        self.assertNotIn("View Details", chunks[0])
+        self.assertIn("View Details", chunks[1])
+
+        body = "".join(chunks)
+        self.assertEqual(body.count("View Details"), 10)
+        self.assertIn("Load more saunas", body)
+        self.assertTrue(body.rstrip().endswith("</html>"))
+
+    def test_streamed_page_matches_the_rendered_page(self):
+        streamed = b"".join(self.client.get(reverse("pseo_landing", args=["cork"])).streaming_content)
+        with override_settings(STREAMING_PAGES_ENABLED=False):
+            rendered = self.client.get(reverse("pseo_landing", args=["cork"])).content
+
+        def normalise(html):
+            return [line.strip() for line in html.decode().splitlines() if line.strip() and "csrf" not in line]
+
+        self.assertEqual(normalise(streamed), normalise(rendered))
+
+    def test_no_results(self):
+        response = self.client.get(reverse("home"), {"q": "nothing-matches-this"})
+        self.assertIn("No results found", b"".join(response.streaming_content).decode())
+
+    def test_htmx_swaps_are_not_streamed(self):
+        response = self.client.get(reverse("home"), {"sort": "name"}, HTTP_HX_REQUEST="true")
+        self.assertFalse(response.streaming)
+
+    def test_gzip_chunks_are_flushed(self):
+        response = self.client.get(reverse("home"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        chunks = iter(response.streaming_content)
+        received = b""
+        # The head decodes on its own, before the rest of the page has been read
+        while b"<head" not in received:
+            received += decompressor.decompress(next(chunks))
+        self.assertNotIn(b"View Details", received)
+        for chunk in chunks:
+            received += decompressor.decompress(chunk)
+        self.assertIn(b"Sauna 09", received + decompressor.flush())
+
+    @override_settings(PAGE_CACHE_ENABLED=True)
+    def test_streamed_page_is_cached_once_sent(self):
+        first = self.client.get(reverse("home"))
+        body = b"".join(first.streaming_content)
+        second = self.client.get(reverse("home"))
+        self.assertEqual(second["X-Page-Cache"], "hit")
+        self.assertEqual(second.content, body)
+
+
+class CompressSequenceTests(SimpleTestCase):
+    chunks = [b"<head>", b"<main>" * 50, b"</html>"]
+
+    @mock.patch("secrets.randbelow", return_value=17)
+    def test_output_matches_django(self, randbelow):
+        for max_random_bytes in (None, 100):
+            with self.subTest(max_random_bytes=max_random_bytes):
+                ours = b"".join(compress_sequence_flushing(self.chunks, max_random_bytes=max_random_bytes))
+                django = b"".join(compress_sequence(self.chunks, max_random_bytes=max_random_bytes))
+                self.assertEqual(gzip.decompress(ours), gzip.decompress(django))
+                # The same header, random-length filename included
+                header = 10 + (18 if max_random_bytes else 0)
+                self.assertEqual(ours[:header], django[:header])
@@ -0,0 +1,53 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from directory.suggest import clear_suggest_index, get_suggest_index
+from directory.tests.factories import create_listing
+
+
+class SuggestTests(TestCase):
+    def setUp(self):
+        clear_suggest_index()
+        create_listing(name="Corkscrew Sauna", slug="corkscrew", city="Kinsale", county="Cork")
+        create_listing(name="The Cove", slug="cove", city="Cobh", county="Cork")
+        create_listing(name="Hidden Sauna", slug="hidden", city="Corofin", county="Clare", is_active=False)
+
+    def _labels(self, prefix):
+        return [label for label, _, _ in get_suggest_index().lookup(prefix)]
+
+    def test_prefix_matches_rank_counties_then_towns_then_listings(self):
+        self.assertEqual(self._labels("cor"), ["Cork", "Corkscrew Sauna"])
+        self.assertEqual(self._labels("CO"), ["Cork", "Cobh", "Corkscrew Sauna", "The Cove"])
+
+    def test_word_prefixes_match_after_whole_label_matches(self):
+        self.assertEqual(self._labels("cove"), ["The Cove"])
+        self.assertEqual(self._labels("sauna"), ["Corkscrew Sauna"])
+        self.assertEqual(self._labels("  "), [])
+
+    def test_short_prefixes_rank_every_match(self):
+        # Their word-start suffixes sort ahead of the one whole-label match
+        for index in range(250):
+            create_listing(name=f"Old Sauna {index:03}", slug=f"old-{index}")
+        create_listing(name="Sauna Zebra", slug="zebra")
+        self.assertEqual(
+            self._labels("sa"),
+            ["Sauna Zebra", "Corkscrew Sauna", *(f"Old Sauna {index:03}" for index in range(6))],
+        )
+
+    def test_endpoint_answers_without_queries_and_is_cacheable(self):
+        get_suggest_index()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("suggest"), {"q": "Kins"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["results"],
+            [{"label": "Kinsale", "kind": "city", "url": "/?q=Kinsale"}],
+        )
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("max-age=300", response["Cache-Control"])
+
+    def test_index_rebuilds_after_listing_change(self):
+        self.assertEqual(self._labels("ember"), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            create_listing(name="Ember Sauna", slug="ember", city="Kinsale", county="Cork")
+        self.assertEqual(self._labels("ember"), ["Ember Sauna"])
@@ -6,6 +6,14 @@ urlpatterns = [
     path("", views.home, name="home"),
     path("submit/", views.submit_sauna, name="submit_sauna"),
     path("submit/success/", views.submit_success, name="submit_success"),
+    path("suggest/", views.suggest, name="suggest"),
+    path("map-data/", views.map_data, name="map_data"),
+    path("map-clusters/", views.map_clusters, name="map_clusters"),
     path("listing/<slug:slug>/", views.listing_detail, name="listing_detail"),
+    path(
+        "photos/<slug:slug>/<str:digest>/<str:variant>-<int:width>.<str:fmt>",
+        views.listing_photo,
+        name="listing_photo",
+    ),
     path("<slug:county>/", views.pseo_landing, name="pseo_landing"),
 ]
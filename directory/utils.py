@@ -1,10 +1,51 @@
-from typing import Optional, Tuple, Dict, Any, List, Union
-from math import radians, cos, sin, asin, sqrt
-from django.db.models import Q, QuerySet
-from .models import Listing
+import hashlib
+import json
+from datetime import datetime
+from math import cos, radians
+from zoneinfo import ZoneInfo
+from typing import Optional, Tuple, Dict, Any, Sequence, Union
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity, TrigramWordSimilarity
+from django.db.models import F, FloatField, Q, QuerySet, Value
+from django.db.models.lookups import LessThanOrEqual
+from django.db.models.functions import ASin, Cast, Cos, Greatest, Least, Power, Radians, Round, Sin, Sqrt
+from django.utils import timezone
+from .geo import EARTH_RADIUS_KM, bounding_box
+from .models import LISTING_CARD_FIELDS, Listing, attribute_column
+from .opening_hours import DAYS, MINUTES_PER_DAY, minute_of_week
 from .niche_config import FILTERS
 
 
+# Orderings shared by the queryset path and the in-memory snapshot. The id
+# tiebreaker keeps results stable between the two.
+SORT_ORDERINGS = {
+    "featured": ("-is_featured", "name", "id"),
+    "name": ("-is_featured", "name", "id"),
+    "rating": ("-is_featured", "-rating", "-reviews_count", "id"),
+}
+
+# Near-me orderings over the annotated great-circle ``distance``.
+NEAR_ME_ORDERINGS = {
+    "rating": (
+        "-is_featured",
+        F("rating").desc(nulls_last=True),
+        F("reviews_count").desc(nulls_last=True),
+        "distance",
+        "id",
+    ),
+    "distance": ("-is_featured", "distance", "id"),
+}
+
+# Default ordering for a ``q`` search over the annotated ``search_rank``.
+SEARCH_ORDERING = ("-search_rank", "-is_featured", "id")
+
+SEARCH_CONFIG = "english"
+SEARCH_MAX_LENGTH = 100
+
+# Map-area coordinates are rounded to ~1 m so nearby pans share cache keys.
+BBOX_PRECISION = 5
+
+
 def _normalize_bool(value: Optional[str]) -> Optional[bool]:
     if value is None:
         return None
@@ -28,130 +69,266 @@ def _parse_float(value: Optional[str]) -> Optional[float]:
         return None
 
 
-def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    # Haversine formula to compute great-circle distance in km.
-    radius_km = 6371.0
-    dlat = radians(lat2 - lat1)
-    dlon = radians(lon2 - lon1)
-    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon / 2) ** 2
-    c = 2 * asin(sqrt(a))
-    return radius_km * c
+def parse_bbox(value: Optional[str]) -> Optional[Tuple[float, float, float, float]]:
+    # "minLng,minLat,maxLng,maxLat" as sent by Leaflet's getBounds().toBBoxString()
+    parts = [_parse_float(part) for part in (value or "").split(",")]
+    if len(parts) != 4 or any(part is None for part in parts):
+        return None
+    west, south, east, north = parts
+    if south > north:
+        return None
+    return west, south, east, north
+
+
+def parse_open_at(params) -> Optional[int]:
+    """Minute of the week asked for by ``open_now`` or ``open_day`` + ``open_time`` ("HH:MM")."""
+    if _normalize_bool(params.get("open_now")) is True:
+        return minute_of_week(timezone.localtime(timezone=ZoneInfo(settings.OPENING_HOURS_TIME_ZONE)))
+    day = (params.get("open_day") or "").strip().lower()
+    if day not in DAYS:
+        return None
+    try:
+        moment = datetime.strptime((params.get("open_time") or "").strip(), "%H:%M")
+    except ValueError:
+        return None
+    return DAYS.index(day) * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
 
+def normalize_filter_params(params) -> Dict[str, Any]:
+    """Return the canonical filter state for the FILTERS keys present in ``params``.
 
-def get_filtered_listings(request) -> Tuple[Union[QuerySet[Listing], List[Listing]], Dict[str, Any]]:
-    queryset = Listing.objects.filter(is_active=True)
+    Empty values are dropped and choice values are upper-cased, de-duplicated and
+    sorted, matching the case-insensitive ``iexact`` lookups.
+    """
+    state: Dict[str, Any] = {}
 
     for definition in FILTERS:
         key = definition.get("key")
         filter_type = definition.get("type", "choice")
         field_type = definition.get("field_type", "attribute")  # Default to attribute filtering
-        
+
         if not key:
             continue
 
-        # Handle model field filters (not in attributes JSON)
+        # Model field filters (not in attributes JSON)
         if field_type == "model":
+            raw_value = params.get(key)
             if key == "county":
-                raw_value = request.GET.get(key)
                 if raw_value:
-                    queryset = queryset.filter(county__iexact=raw_value)
+                    state[key] = raw_value.upper()
             elif key == "rating":
-                raw_value = request.GET.get(key)
                 if raw_value and raw_value != "Any":
                     # Extract minimum rating (e.g., "4.5+" -> 4.5)
                     try:
-                        min_rating = float(raw_value.rstrip("+"))
-                        queryset = queryset.filter(rating__gte=min_rating)
+                        state[key] = float(raw_value.rstrip("+"))
                     except (ValueError, AttributeError):
                         pass
-            elif key == "has_website":
-                raw_value = request.GET.get(key)
-                bool_value = _normalize_bool(raw_value)
-                if bool_value is True:
-                    queryset = queryset.exclude(website="")
-            elif key == "has_phone":
-                raw_value = request.GET.get(key)
-                bool_value = _normalize_bool(raw_value)
-                if bool_value is True:
-                    queryset = queryset.exclude(phone="")
+            elif key in {"has_website", "has_phone"}:
+                if _normalize_bool(raw_value) is True:
+                    state[key] = True
             continue
 
-        # Handle attribute field filters (JSON field)
+        # Attribute field filters (JSON field)
         if filter_type == "boolean":
-            raw_value = request.GET.get(key)
-            bool_value = _normalize_bool(raw_value)
-            if bool_value is None:
-                continue
-            queryset = queryset.filter(**{f"attributes__{key}": bool_value})
+            bool_value = _normalize_bool(params.get(key))
+            if bool_value is not None:
+                state[key] = bool_value
             continue
 
-        values = [value for value in request.GET.getlist(key) if value]
+        values = [value for value in params.getlist(key) if value]
         if not values:
-            single_value = request.GET.get(key)
+            single_value = params.get(key)
             if single_value:
                 values = [single_value]
 
-        if not values:
-            continue
+        if values:
+            state[key] = tuple(sorted({value.upper() for value in values}))
+
+    search = " ".join(params.get("q", "").split())[:SEARCH_MAX_LENGTH]
+    if search:
+        state["q"] = search.lower()
+
+    bbox = parse_bbox(params.get("bbox"))
+    if bbox is not None:
+        state["bbox"] = tuple(round(value, BBOX_PRECISION) for value in bbox)
+
+    open_at = parse_open_at(params)
+    if open_at is not None:
+        state["open_at"] = open_at
+
+    return state
+
+
+def snapshot_supports(filter_state: Dict[str, Any]) -> bool:
+    # Text search and map-area queries always run against the Postgres indexes
+    return "q" not in filter_state and "bbox" not in filter_state
+
+
+def filter_state_key(filter_state: Dict[str, Any]) -> str:
+    # Stable digest of a normalised filter state, for cache keys
+    payload = json.dumps(sorted(filter_state.items()), separators=(",", ":"))
+    return hashlib.md5(payload.encode()).hexdigest()
+
+
+def choice_condition(key: str, value: str) -> Q:
+    # Case-insensitive match of one filter choice; attributes use their
+    # upper-cased generated column so the index applies.
+    if key == "county":
+        return Q(county__iexact=value)
+    return Q(**{attribute_column(key): value.upper()})
+
 
-        if len(values) == 1:
-            queryset = queryset.filter(**{f"attributes__{key}__iexact": values[0]})
+def _search_query(search: str) -> SearchQuery:
+    return SearchQuery(search, config=SEARCH_CONFIG, search_type="websearch")
+
+
+def _search_condition(search: str) -> Q:
+    # Full-text match, or a close trigram match for misspelt names and places
+    return (
+        Q(search_vector=_search_query(search))
+        | Q(name__trigram_word_similar=search)
+        | Q(city__trigram_similar=search)
+        | Q(county__trigram_similar=search)
+    )
+
+
+def _search_rank(search: str):
+    # Postgres ranks are float4; keep them float8 throughout so a rank stored
+    # in a cursor compares equal to the row it came from
+    return Cast(
+        SearchRank(F("search_vector"), _search_query(search))
+        + Greatest(
+            TrigramWordSimilarity(search, "name"),
+            TrigramSimilarity("city", search),
+            TrigramSimilarity("county", search),
+        ),
+        FloatField(),
+    )
+
+
+def _bbox_condition(west: float, south: float, east: float, north: float) -> Q:
+    # Range scan on the (latitude, longitude) index
+    condition = Q(latitude__range=(south, north))
+    if west <= east:
+        return condition & Q(longitude__range=(west, east))
+    # The area crosses the antimeridian.
+    return condition & (Q(longitude__gte=west) | Q(longitude__lte=east))
+
+
+def filter_conditions(filter_state: Dict[str, Any]) -> Dict[str, Q]:
+    """One condition per active filter in ``filter_state``, keyed like it."""
+    conditions: Dict[str, Q] = {}
+    for key, value in filter_state.items():
+        if key == "q":
+            conditions[key] = _search_condition(value)
+        elif key == "bbox":
+            conditions[key] = _bbox_condition(*value)
+        elif key == "county":
+            conditions[key] = choice_condition(key, value)
+        elif key == "rating":
+            conditions[key] = Q(rating__gte=value)
+        elif key == "open_at":
+            conditions[key] = Q(opening_intervals__contains=value)
+        elif key == "has_website":
+            conditions[key] = ~Q(website="")
+        elif key == "has_phone":
+            conditions[key] = ~Q(phone="")
+        elif isinstance(value, bool):
+            conditions[key] = Q(**{attribute_column(key): value})
         else:
-            query = Q()
-            for value in values:
-                query |= Q(**{f"attributes__{key}__iexact": value})
-            queryset = queryset.filter(query)
+            conditions[key] = Q(**{f"{attribute_column(key)}__in": value})
+    return conditions
+
+
+def _distance_expression(lat: float, lng: float):
+    # Haversine formula evaluated by Postgres, in km.
+    half_dlat = (Radians(F("latitude")) - Value(radians(lat))) / 2
+    half_dlng = (Radians(F("longitude")) - Value(radians(lng))) / 2
+    a = Power(Sin(half_dlat), 2) + (
+        Value(cos(radians(lat))) * Cos(Radians(F("latitude"))) * Power(Sin(half_dlng), 2)
+    )
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Least(Sqrt(a), Value(1.0)), output_field=FloatField())
+
+
+def near_condition(lat: float, lng: float, distance_km: float) -> Q:
+    """Listings within ``distance_km`` of the point, for counts and filters without the distance column."""
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, distance_km)
+    return Q(
+        LessThanOrEqual(_distance_expression(lat, lng), distance_km),
+        latitude__range=(min_lat, max_lat),
+        longitude__range=(min_lng, max_lng),
+    )
 
-    # Sorting
-    sort_by = request.GET.get("sort", "featured")
-    
-    if sort_by == "rating":
-        # Featured first, then highest rating, then most reviews
-        queryset = queryset.order_by('-is_featured', '-rating', '-reviews_count')
-    elif sort_by == "name":
-        queryset = queryset.order_by('-is_featured', 'name')
-    else:
-        # Default: Featured first, then name
-        queryset = queryset.order_by('-is_featured', 'name')
 
+def count_listings(listings: Union[QuerySet[Listing], Sequence[Listing]]) -> int:
+    # Snapshot and cached results are sequences; querysets count in the database.
+    if isinstance(listings, QuerySet):
+        return listings.count()
+    return len(listings)
+
+
+def get_filtered_listings(request) -> Tuple[Union[QuerySet[Listing], Sequence[Listing]], Dict[str, Any]]:
+    sort_by = request.GET.get("sort", "featured")
     near_me = _normalize_bool(request.GET.get("near_me")) is True
     user_lat = _parse_float(request.GET.get("lat"))
     user_lng = _parse_float(request.GET.get("lng"))
     distance_km = _parse_float(request.GET.get("distance_km")) or 50.0
-
-    if near_me and user_lat is not None and user_lng is not None:
-        candidates = queryset.exclude(latitude__isnull=True).exclude(longitude__isnull=True)
-        results: List[Listing] = []
-        for listing in candidates:
-            if listing.latitude is None or listing.longitude is None:
-                continue
-            distance = _haversine_km(user_lat, user_lng, listing.latitude, listing.longitude)
-            if distance <= distance_km:
-                listing.distance_km = round(distance, 1)
-                results.append(listing)
-        
-        # Sort the in-memory list
-        if sort_by == "distance":
-             # Sort by distance (ASC)
-             results.sort(key=lambda item: (not item.is_featured, getattr(item, "distance_km", 9999)))
-        elif sort_by == "rating":
-             # Sort by rating (DESC)
-             results.sort(key=lambda item: (not item.is_featured, -(float(item.rating or 0))))
-        else:
-             # Default sort (Featured first, then distance or name)
-             # If strictly featured, maybe distance secondary?
-             results.sort(key=lambda item: (not item.is_featured, getattr(item, "distance_km", 9999)))
-
-        return results, {
-            "near_me": True,
-            "user_lat": user_lat,
-            "user_lng": user_lng,
-            "distance_km": distance_km,
-        }
-
-    return queryset, {
-        "near_me": False,
+    near_me_active = near_me and user_lat is not None and user_lng is not None
+    near = (user_lat, user_lng, distance_km) if near_me_active else None
+    filter_state = normalize_filter_params(request.GET)
+    search = filter_state.get("q")
+    if near_me_active:
+        ordering = NEAR_ME_ORDERINGS.get(sort_by, NEAR_ME_ORDERINGS["distance"])
+    elif search and sort_by in {"featured", "relevance"}:
+        ordering = SEARCH_ORDERING
+    else:
+        ordering = SORT_ORDERINGS.get(sort_by, SORT_ORDERINGS["featured"])
+    context = {
+        "near_me": near_me_active,
         "user_lat": user_lat,
         "user_lng": user_lng,
         "distance_km": distance_km,
+        "near": near,
+        "ordering": ordering,
+        "filter_state": filter_state,
     }
+
+    if getattr(settings, "LISTING_SNAPSHOT_ENABLED", False) and snapshot_supports(filter_state):
+        from .snapshot import get_listing_snapshot
+
+        return get_listing_snapshot().filter(filter_state, sort_by, near=near), context
+
+    # Card columns only; reviews and the other heavy columns stay in Postgres
+    queryset = Listing.objects.only(*LISTING_CARD_FIELDS).filter(
+        *filter_conditions(filter_state).values(), is_active=True
+    )
+    if search:
+        queryset = queryset.annotate(search_rank=_search_rank(search))
+
+    if near_me_active:
+        # Indexed bounding-box prefilter, then the exact distance, all in Postgres
+        min_lat, max_lat, min_lng, max_lng = bounding_box(user_lat, user_lng, distance_km)
+        queryset = (
+            queryset.filter(
+                latitude__range=(min_lat, max_lat),
+                longitude__range=(min_lng, max_lng),
+            )
+            .annotate(distance=_distance_expression(user_lat, user_lng))
+            .filter(distance__lte=distance_km)
+            .annotate(distance_km=Round("distance", 1))
+        )
+
+    # Featured first, then name (default), rating and reviews, or distance;
+    # searches default to relevance
+    queryset = queryset.order_by(*ordering)
+
+    # Plain filter combinations repeat a lot, so serve their ordered ids from
+    # the result cache; near-me, search and map-area results are per-user and
+    # stay lazy so pages are fetched with LIMIT.
+    per_user = near_me_active or search or "bbox" in filter_state
+    if not per_user and getattr(settings, "LISTING_RESULT_CACHE_TIMEOUT", 0):
+        from .results import cached_listing_results
+
+        return cached_listing_results(queryset, dict(filter_state, _ordering=list(ordering))), context
+
+    return queryset, context
@@ -1,22 +1,101 @@
 import json
+from functools import partial
 from urllib.parse import urlencode
 from django.utils.text import slugify
 from django.conf import settings
 from django.shortcuts import get_object_or_404, render, redirect
-from django.http import HttpRequest, HttpResponse
+from django.urls import reverse
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
 from django.utils.safestring import mark_safe
 from django.contrib import messages
-from .models import Listing
+from django.db.models import Prefetch
+from .models import LISTING_CARD_FIELDS, County, Listing, RelatedListing
 from .forms import SaunaSubmissionForm
 from .niche_config import SITE_NAME, DOMAIN, FILTERS
-from .utils import get_filtered_listings
-from .schema import generate_breadcrumb_schema, generate_listing_schema
+from .conditional import conditional_page, listing_detail_validators, listing_index_validators
+from .facets import get_facet_counts
+from .map_data import get_cluster_data, get_map_data, map_data_etag
+from .middleware import public_page
+from .page_cache import (
+    ALL_LISTINGS_TAG,
+    COUNTY_COUNTS_TAG,
+    cache_anonymous_page,
+    county_tag,
+    listing_tag,
+    tag_response,
+)
+from .pagination import PageStream, paginate_listings
+from .photos import CONTENT_TYPES, VARIANTS, PhotoUnavailable, available_formats, get_photo_store, photo_digest
+from .streaming import STREAM_CHUNK_SIZE, stream_listing_page, streaming_enabled
+from .utils import count_listings, get_filtered_listings
+from .suggest import get_suggest_index, normalize_prefix
+from .schema import generate_breadcrumb_schema, listing_schema_json
 
 
 def _is_htmx(request: HttpRequest) -> bool:
     return request.headers.get("HX-Request", "false").lower() == "true"
 
 
+def _next_page_url(request: HttpRequest, next_cursor):
+    if not next_cursor:
+        return None
+    params = request.GET.copy()
+    params["cursor"] = next_cursor
+    return f"{request.path}?{params.urlencode()}"
+
+
+def _paginate(request: HttpRequest, listings, ordering):
+    page, next_cursor = paginate_listings(
+        listings,
+        ordering,
+        request.GET.get("cursor"),
+        getattr(settings, "LISTINGS_PAGE_SIZE", 24),
+    )
+    return page, _next_page_url(request, next_cursor)
+
+
+def _page_or_stream(request: HttpRequest, listings, ordering):
+    # Streamed pages read and render their cards while the response is sent
+    if not streaming_enabled(request):
+        return (*_paginate(request, listings, ordering), None)
+    stream = PageStream(
+        listings,
+        ordering,
+        request.GET.get("cursor"),
+        getattr(settings, "LISTINGS_PAGE_SIZE", 24),
+        STREAM_CHUNK_SIZE,
+    )
+    return [], None, stream
+
+
+def _schema_items(request: HttpRequest, listings, ordering, page, stream):
+    # The first listings, named in the JSON-LD ItemList; a streamed page
+    # hasn't read its rows yet when the head is rendered
+    if stream is None:
+        return page[:10]
+    return paginate_listings(listings, ordering, request.GET.get("cursor"), 10)[0]
+
+
+def _render_listing_page(request: HttpRequest, template_name, context, stream) -> HttpResponse:
+    if stream is None:
+        return render(request, template_name, context)
+    return stream_listing_page(request, template_name, context, stream, partial(_next_page_url, request))
+
+
+def _render_next_page(request: HttpRequest, page, next_page_url) -> HttpResponse:
+    # HTMX "load more": only the next cards and the following sentinel
+    context = {
+        "filters": FILTERS,
+        "listings": page,
+        "next_page_url": next_page_url,
+        "google_maps_api_key": settings.GOOGLE_MAPS_API_KEY,
+    }
+    return render(request, "partials/listing_page.html", context)
+
+
+@public_page
 def robots_txt(request: HttpRequest) -> HttpResponse:
     lines = [
         "User-agent: *",
@@ -26,9 +105,66 @@ def robots_txt(request: HttpRequest) -> HttpResponse:
     return HttpResponse("\n".join(lines), content_type="text/plain")
 
 
+@public_page
+def suggest(request: HttpRequest) -> JsonResponse:
+    # Typeahead for the search box, answered from the in-process prefix index
+    prefix = normalize_prefix(request.GET.get("q"))
+    results = [
+        {"label": label, "kind": kind, "url": url}
+        for label, kind, url in get_suggest_index().lookup(prefix)
+    ]
+    response = JsonResponse({"q": prefix, "results": results})
+    patch_cache_control(response, public=True, max_age=getattr(settings, "SUGGEST_CACHE_MAX_AGE", 300))
+    return response
+
+
+@public_page
+@condition(etag_func=map_data_etag)
+def map_data(request: HttpRequest) -> JsonResponse:
+    # Columnar marker data for the current filters; revalidated with the ETag
+    response = JsonResponse(get_map_data(request), json_dumps_params={"separators": (",", ":")})
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+@public_page
+@condition(etag_func=map_data_etag)
+def map_clusters(request: HttpRequest) -> JsonResponse:
+    # Marker clusters for one viewport (bbox) and zoom level
+    response = JsonResponse(get_cluster_data(request), json_dumps_params={"separators": (",", ":")})
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+@public_page
+def listing_photo(request: HttpRequest, slug: str, digest: str, variant: str, width: int, fmt: str) -> HttpResponse:
+    # A resized copy of a listing's photo from the local photo cache
+    if variant not in VARIANTS or width not in VARIANTS[variant][0] or fmt not in available_formats():
+        raise Http404
+    photo_ref = Listing.objects.filter(slug=slug, is_active=True).values_list("photo_ref", flat=True).first()
+    # Only the listing's current photo may be fetched with our key
+    if not photo_ref or photo_digest(photo_ref) != digest:
+        raise Http404
+    try:
+        data = get_photo_store().get(photo_ref, variant, width, fmt)
+    except PhotoUnavailable:
+        raise Http404
+    response = HttpResponse(data, content_type=CONTENT_TYPES[fmt])
+    # The URL changes with the photo, so the file never does
+    patch_cache_control(response, public=True, max_age=31536000, immutable=True)
+    return response
+
+
+@public_page
+@conditional_page(listing_index_validators)
+@cache_anonymous_page
 def home(request: HttpRequest) -> HttpResponse:
     listings, near_me_context = get_filtered_listings(request)
-    listings_count = len(listings) if isinstance(listings, list) else listings.count()
+    page, next_page_url, stream = _page_or_stream(request, listings, near_me_context["ordering"])
+    if _is_htmx(request) and request.GET.get("cursor"):
+        return tag_response(_render_next_page(request, page, next_page_url), ALL_LISTINGS_TAG)
+
+    listings_count = count_listings(listings)
     
     # Check if filters are applied for dynamic meta (prefer county)
     county = request.GET.get('county', '')
@@ -42,28 +178,32 @@ def home(request: HttpRequest) -> HttpResponse:
         page_title = f"{SITE_NAME} - Find the Best Saunas in Ireland"
         meta_description = f"Discover {listings_count}+ saunas across Ireland. Filter by county, rating, and amenities to find your perfect sauna experience. Verified listings with photos, reviews, and contact info."
 
-    map_listings = []
-    for listing in listings:
-        if listing.latitude is None or listing.longitude is None:
-            continue
-        map_listings.append(
-            {
-                "name": listing.name,
-                "lat": listing.latitude,
-                "lng": listing.longitude,
-                "location": listing.county or listing.city,
-                "address": listing.address,
-                "url": f"/listing/{listing.slug}/",
-                "distance_km": getattr(listing, "distance_km", None),
-            }
-        )
-    
+    # "Search this area" limits results to a map viewport until cleared
+    clear_map_area_url = ""
+    if "bbox" in near_me_context["filter_state"]:
+        area_params = request.GET.copy()
+        area_params.pop("bbox", None)
+        area_params.pop("cursor", None)
+        clear_map_area_url = reverse("home") + (f"?{area_params.urlencode()}" if area_params else "")
+
+    # Markers load separately from the cacheable map-data endpoint
+    map_params = request.GET.copy()
+    map_params.pop("cursor", None)
+    map_data_url = reverse("map_data")
+    map_clusters_url = reverse("map_clusters")
+    if map_params:
+        map_data_url = f"{map_data_url}?{map_params.urlencode()}"
+        map_clusters_url = f"{map_clusters_url}?{map_params.urlencode()}"
+
     context = {
         "site_name": SITE_NAME,
         "domain": DOMAIN,
         "filters": FILTERS,
-        "listings": listings,
+        "listings": page,
         "listings_count": listings_count,
+        "next_page_url": next_page_url,
+        "facet_counts": get_facet_counts(near_me_context["filter_state"], near_me_context["near"]),
+        "facet_oob": _is_htmx(request),
         "google_maps_api_key": settings.GOOGLE_MAPS_API_KEY,
         "map_provider": getattr(settings, "MAP_PROVIDER", "leaflet"),
         "map_tiles_url": getattr(
@@ -79,10 +219,13 @@ def home(request: HttpRequest) -> HttpResponse:
         "map_center_lat": getattr(settings, "MAP_DEFAULT_CENTER_LAT", 53.1424),
         "map_center_lng": getattr(settings, "MAP_DEFAULT_CENTER_LNG", -7.6921),
         "map_default_zoom": getattr(settings, "MAP_DEFAULT_ZOOM", 7),
-        "map_listings_json": mark_safe(json.dumps(map_listings)),
+        "map_data_url": map_data_url,
+        "map_clusters_url": map_clusters_url,
         "map_enabled": True,
+        "clear_map_area_url": clear_map_area_url,
         "page_title": page_title,
         "meta_description": meta_description,
+        "schema_items": _schema_items(request, listings, near_me_context["ordering"], page, stream),
         "near_me_active": near_me_context.get("near_me"),
         "near_me_distance_km": near_me_context.get("distance_km", 50),
         "user_lat": near_me_context.get("user_lat"),
@@ -90,11 +233,14 @@ def home(request: HttpRequest) -> HttpResponse:
     }
 
     if _is_htmx(request):
-        return render(request, "partials/listing_results.html", context)
+        return tag_response(render(request, "partials/listing_results.html", context), ALL_LISTINGS_TAG)
 
-    return render(request, "home.html", context)
+    return tag_response(_render_listing_page(request, "home.html", context, stream), ALL_LISTINGS_TAG)
 
 
+@public_page
+@conditional_page(listing_index_validators)
+@cache_anonymous_page
 def pseo_landing(request: HttpRequest, county: str) -> HttpResponse:
     county_slug = county
     county_display = county.replace("-", " ").title()
@@ -102,6 +248,7 @@ def pseo_landing(request: HttpRequest, county: str) -> HttpResponse:
     if selected_county and slugify(selected_county) != county_slug:
         redirect_params = request.GET.copy()
         redirect_params.pop("county", None)
+        redirect_params.pop("cursor", None)
         query_pairs = [(key, value) for key, values in redirect_params.lists() for value in values if value]
         query_string = urlencode(query_pairs, doseq=True)
         path = f"/{slugify(selected_county)}/"
@@ -109,25 +256,29 @@ def pseo_landing(request: HttpRequest, county: str) -> HttpResponse:
             path = f"{path}?{query_string}"
         return redirect(path)
 
+    # One indexed slug lookup resolves the canonical name and totals
+    county_summary = County.objects.filter(slug=county_slug).first()
+    if county_summary is not None:
+        county_display = county_summary.name
+
     query_params = request.GET.copy()
     query_params["county"] = county_display
     request.GET = query_params
+    # get_filtered_listings already restricts results to this county
     listings, near_me_context = get_filtered_listings(request)
-    if isinstance(listings, list):
-        listings = [
-            listing
-            for listing in listings
-            if listing.county and slugify(listing.county) == county_slug
-        ]
-        listings_count = len(listings)
+    page, next_page_url, stream = _page_or_stream(request, listings, near_me_context["ordering"])
+    # The county facet shows every county's total, hence the counts tag; under
+    # other filters those totals depend on any listing's filtered fields
+    page_tags = (county_tag(county_slug), COUNTY_COUNTS_TAG)
+    if list(near_me_context["filter_state"]) != ["county"]:
+        page_tags += (ALL_LISTINGS_TAG,)
+    if _is_htmx(request) and request.GET.get("cursor"):
+        return tag_response(_render_next_page(request, page, next_page_url), *page_tags)
+
+    if list(near_me_context["filter_state"]) == ["county"] and not near_me_context["near_me"]:
+        listings_count = county_summary.listings_count if county_summary else 0
     else:
-        listings = (
-            listings.filter(county__iexact=county_display)
-            | listings.filter(county__in=[county.replace("-", " ")])
-        ).distinct().order_by("-is_featured", "name")
-        if listings.exists():
-            county_display = listings.first().county or county_display
-        listings_count = listings.count()
+        listings_count = count_listings(listings)
 
     page_title = f"Saunas in {county_display} | {SITE_NAME}"
     meta_description = (
@@ -137,61 +288,68 @@ def pseo_landing(request: HttpRequest, county: str) -> HttpResponse:
     
     # Generate Schema.org structured data
     breadcrumb_schema = generate_breadcrumb_schema(county_display, SITE_NAME, county_slug)
-    listing_schemas = [generate_listing_schema(listing) for listing in listings[:5]]  # Top 5 listings
+    schema_items = _schema_items(request, listings, near_me_context["ordering"], page, stream)
+    # Top 5 listings, serialised when each listing was saved; list rows leave
+    # schema_json out, so only these five copies are read
+    top_ids = [listing.id for listing in schema_items[:5]]
+    schemas = dict(Listing.objects.filter(id__in=top_ids).values_list("id", "schema_json"))
+    # Rows not re-saved since the column was added have no copy yet
+    for listing in Listing.objects.filter(id__in=[listing_id for listing_id, schema in schemas.items() if not schema]):
+        schemas[listing.id] = listing_schema_json(listing)
+    listing_schemas = "[" + ",".join(schemas[listing_id] for listing_id in top_ids if listing_id in schemas) + "]"
     
     context = {
         "site_name": SITE_NAME,
         "domain": DOMAIN,
         "filters": FILTERS,
-        "listings": listings,
+        "listings": page,
         "listings_count": listings_count,
+        "next_page_url": next_page_url,
+        "facet_counts": get_facet_counts(near_me_context["filter_state"], near_me_context["near"]),
+        "facet_oob": _is_htmx(request),
         "google_maps_api_key": settings.GOOGLE_MAPS_API_KEY,
         "page_title": page_title,
         "meta_description": meta_description,
         "county": county_display,
         "county_slug": county_slug,
+        "county_summary": county_summary,
         "schema_breadcrumb": mark_safe(json.dumps(breadcrumb_schema)),
-        "schema_listings": mark_safe(json.dumps(listing_schemas)),
+        "schema_listings": mark_safe(listing_schemas),
+        "schema_items": schema_items,
         "map_enabled": False,
     }
 
     if _is_htmx(request):
-        return render(request, "partials/listing_results.html", context)
+        return tag_response(render(request, "partials/listing_results.html", context), *page_tags)
 
-    return render(request, "pseo_landing.html", context)
+    return tag_response(_render_listing_page(request, "pseo_landing.html", context, stream), *page_tags)
 
 
+@public_page
+@conditional_page(listing_detail_validators)
+@cache_anonymous_page
 def listing_detail(request: HttpRequest, slug: str) -> HttpResponse:
-    listing = get_object_or_404(Listing, slug=slug, is_active=True)
+    # Related listings are precomputed nearest neighbours, fetched in one prefetch
+    related_links = (
+        RelatedListing.objects.filter(related__is_active=True)
+        .select_related("related")
+        .only("listing", "distance_km", *(f"related__{field}" for field in LISTING_CARD_FIELDS))
+    )
+    listing = get_object_or_404(
+        Listing.objects.prefetch_related(Prefetch("related_links", queryset=related_links)),
+        slug=slug,
+        is_active=True,
+    )
     county_slug = slugify(listing.county) if listing.county else ""
+    if not listing.schema_json:
+        listing.schema_json = listing_schema_json(listing)
     
     # Get Google reviews from structured_data
     google_reviews = listing.structured_data.get('google_reviews', []) if listing.structured_data else []
-    
-    # Get related listings (prefer same county, fallback to city)
-    if listing.county:
-        related_queryset = (
-            Listing.objects
-            .filter(is_active=True, county=listing.county)
-            .exclude(id=listing.id)
-        )
-    else:
-        related_queryset = (
-            Listing.objects
-            .filter(is_active=True, city=listing.city)
-            .exclude(id=listing.id)
-        )
-    related_listings = list(related_queryset[:4])
-
-    # If not enough in county, try city as a fallback
-    if len(related_listings) < 4 and listing.city:
-        additional = (
-            Listing.objects
-            .filter(is_active=True, city=listing.city)
-            .exclude(id=listing.id)
-            .exclude(id__in=[l.id for l in related_listings])[:4 - len(related_listings)]
-        )
-        related_listings = related_listings + list(additional)
+    related_listings = []
+    for link in listing.related_links.all():
+        link.related.distance_km = link.distance_km
+        related_listings.append(link.related)
     
     # Enhanced SEO title with location and rating
     title_parts = [listing.name]
@@ -241,7 +399,11 @@ def listing_detail(request: HttpRequest, slug: str) -> HttpResponse:
         "county_slug": county_slug,
     }
 
-    return render(request, "listing_detail.html", context)
+    return tag_response(
+        render(request, "listing_detail.html", context),
+        listing_tag(listing.id),
+        *[listing_tag(related.id) for related in related_listings],
+    )
 
 
 def submit_sauna(request: HttpRequest) -> HttpResponse:
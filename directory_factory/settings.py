@@ -17,18 +17,21 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.sitemaps",
+    "django.contrib.postgres",
     "directory",
     "blog",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "django.middleware.gzip.GZipMiddleware",  # Enable GZIP compression
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "directory.middleware.PublicPageMiddleware",  # Cookie-free, shared-cacheable public pages
+    "directory.middleware.StreamingGZipMiddleware",  # GZIP compression that flushes streamed pages
+    # Session, CSRF, auth and messages are skipped for public pages without a session
+    "directory.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
+    "directory.middleware.CsrfViewMiddleware",
+    "directory.middleware.AuthenticationMiddleware",
+    "directory.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
@@ -101,4 +104,54 @@ MAP_DEFAULT_CENTER_LAT = float(os.getenv("MAP_DEFAULT_CENTER_LAT", "53.1424"))
 MAP_DEFAULT_CENTER_LNG = float(os.getenv("MAP_DEFAULT_CENTER_LNG", "-7.6921"))
 MAP_DEFAULT_ZOOM = int(os.getenv("MAP_DEFAULT_ZOOM", "7"))
 
+# Cache shared by every gunicorn worker and management command. Without it each
+# process has its own LocMemCache, which never hears about edits made elsewhere,
+# so the listing result, facet and page caches below stay off by default.
+REDIS_URL = os.getenv("REDIS_URL", "")
+SHARED_CACHE = bool(REDIS_URL)
+if SHARED_CACHE:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}}
+_SHARED_CACHE_TIMEOUT = "300" if SHARED_CACHE else "0"
+
+# Listings per page on home and county pages (further pages load via HTMX)
+LISTINGS_PAGE_SIZE = int(os.getenv("LISTINGS_PAGE_SIZE", "24"))
+
+# Serve listing filters from an in-memory snapshot in each worker instead of Postgres.
+LISTING_SNAPSHOT_ENABLED = os.getenv("LISTING_SNAPSHOT_ENABLED", "false").lower() == "true"
+# Upper bound (seconds) on snapshot staleness when workers don't share a cache.
+LISTING_SNAPSHOT_TTL = int(os.getenv("LISTING_SNAPSHOT_TTL", "300"))
+
+# Seconds to cache the ordered ids per filter combination (0 disables; listing changes invalidate them)
+LISTING_RESULT_CACHE_TIMEOUT = int(os.getenv("LISTING_RESULT_CACHE_TIMEOUT", _SHARED_CACHE_TIMEOUT))
+
+# Seconds to cache sidebar facet counts per filter state (listing changes invalidate them)
+FACET_CACHE_TIMEOUT = int(os.getenv("FACET_CACHE_TIMEOUT", _SHARED_CACHE_TIMEOUT))
+
+# Browser/CDN max-age (seconds) for /suggest/ typeahead responses
+SUGGEST_CACHE_MAX_AGE = int(os.getenv("SUGGEST_CACHE_MAX_AGE", "300"))
+
+# Cache rendered anonymous pages (with gzip/brotli variants); edits purge only the affected pages.
+# Needs REDIS_URL: purges made by one process must reach every worker.
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "false").lower() == "true"
+PAGE_CACHE_TIMEOUT = int(os.getenv("PAGE_CACHE_TIMEOUT", "600"))
+
+# Seconds to cache each rendered listing card (0 disables; edits change the card's key)
+LISTING_CARD_CACHE_TIMEOUT = int(os.getenv("LISTING_CARD_CACHE_TIMEOUT", "86400"))
+
+# Shared-cache (nginx/CDN) lifetime of anonymous public pages, and how long a stale copy may be served while refreshing
+PUBLIC_PAGE_S_MAXAGE = int(os.getenv("PUBLIC_PAGE_S_MAXAGE", "300"))
+PUBLIC_PAGE_STALE_WHILE_REVALIDATE = int(os.getenv("PUBLIC_PAGE_STALE_WHILE_REVALIDATE", "3600"))
+
+# Stream home and county pages: head and filters first, then the listing cards in chunks
+STREAMING_PAGES_ENABLED = os.getenv("STREAMING_PAGES_ENABLED", "false").lower() == "true"
+
+# Local time zone of the listings' opening hours, for the "open now" filter
+OPENING_HOURS_TIME_ZONE = os.getenv("OPENING_HOURS_TIME_ZONE", "Europe/Dublin")
+
+# Local copies of listing photos, resized per page; least recently used files go once the directory passes the cap
+PHOTO_CACHE_DIR = os.getenv("PHOTO_CACHE_DIR", str(BASE_DIR / "photo_cache"))
+PHOTO_CACHE_MAX_BYTES = int(os.getenv("PHOTO_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+# Dotted path of the class that fetches original photos by photo_ref
+PHOTO_UPSTREAM = os.getenv("PHOTO_UPSTREAM", "directory.photos.GooglePlacePhotoUpstream")
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -3,6 +3,7 @@ from django.urls import path, include
 from django.contrib.sitemaps.views import sitemap
 from directory.sitemaps import LandingPageSitemap, ListingSitemap
 from directory import views as directory_views
+from directory.middleware import public_page
 
 sitemaps = {
     "pages": LandingPageSitemap,
@@ -15,7 +16,7 @@ urlpatterns = [
     path("robots.txt", directory_views.robots_txt, name="robots_txt"),
     path(
         "sitemap.xml",
-        sitemap,
+        public_page(sitemap),
         {"sitemaps": sitemaps},
         name="django.contrib.sitemaps.views.sitemap",
     ),